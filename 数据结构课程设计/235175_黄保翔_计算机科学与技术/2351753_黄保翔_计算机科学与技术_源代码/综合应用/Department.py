@@ -1,10 +1,93 @@
 #该文件对Department类进行了定义，包括了Department类中的属性和方法。
-from math import degrees
+import sys
+from collections import deque
+from functools import lru_cache
+from types import MappingProxyType
 
 
 # Department.py (Corrected and Refined)
 
+# 部门内职务的分类，顺序即保存时的顺序
+ROLE_CATEGORIES = ('主管', '副主管', '其他人员')
+# 尚无人员的部门共用的只读空容器
+_EMPTY_ROLE_CATEGORIES = MappingProxyType({category: () for category in ROLE_CATEGORIES})
+_EMPTY_ROLES = MappingProxyType({})
+
+
+class StaffSet:
+    """
+    某个职务分类中的人员：按加入顺序排列的多重集合，加入、查询和移除均为 O(1)。
+    同一人员在同一分类中可以出现多次（担任多个同类职务），每次出现都保持其加入时的位置；
+    移除时去掉该人员最后加入的一次出现。
+    """
+    __slots__ = ('_entries', '_counts')
+
+    def __init__(self, people=()):
+        self._entries = {}  # (Person, 第几次出现) -> None，字典保持插入顺序
+        self._counts = {}  # Person -> 出现次数
+        for person in people:
+            self.add(person)
+
+    def add(self, person):
+        """加入一次人员。"""
+        count = self._counts.get(person, 0)
+        self._entries[(person, count)] = None
+        self._counts[person] = count + 1
+
+    def discard(self, person) -> bool:
+        """移除人员最后加入的一次出现；人员不在其中时返回 False。"""
+        count = self._counts.get(person)
+        if not count:
+            return False
+        del self._entries[(person, count - 1)]
+        if count == 1:
+            del self._counts[person]
+        else:
+            self._counts[person] = count - 1
+        return True
+
+    def __contains__(self, person):
+        return person in self._counts
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        for person, _ in self._entries:
+            yield person
+
+    def __repr__(self):
+        return f"StaffSet({list(self)!r})"
+
+
+def member_profile(person) -> tuple:
+    """
+    人员在统计中所属的分组键：(('gender', 性别), ('age', 年龄段))。
+    性别为空时记为 '未知'；年龄按十岁分段，如 '30-39'，无法解析时记为 '未知'。
+    """
+    try:
+        return _profile_key(person.gender, person.age)
+    except TypeError:  # 不可哈希的取值
+        return _profile_key.__wrapped__(person.gender, person.age)
+
+
+@lru_cache(maxsize=4096)
+def _profile_key(gender, age) -> tuple:
+    gender = gender if gender not in (None, '') else '未知'
+    try:
+        decade = int(age) // 10 * 10
+        age_group = f"{decade}-{decade + 9}"
+    except (TypeError, ValueError):
+        age_group = '未知'
+    return ('gender', gender), ('age', age_group)
+
+
 class Department:
+    # 使用 __slots__ 代替实例 __dict__；大量部门没有任何人员，
+    # 因此 roles 和 role_categories 在第一次添加人员时才分配
+    __slots__ = ('department_id', 'name', 'parent', 'children', '_roles', '_role_categories',
+                 '_subtree_size', '_headcount', '_vacancies', '_profile', '__weakref__')
+
     def __init__(self, department_id: str, name: str, parent=None):
         """
         构造函数，用于初始化 Department 对象的属性。
@@ -16,42 +99,272 @@ class Department:
         self.name: str = name
         self.parent = parent
         self.children = []
-        # roles 字典用于存储担任具体职务的人员
-        self.roles = {}  # 例如: {'院长': person_obj, '教学副院长': person_obj}
-        # role_categories 列表用于定义部门内职务的分类
-        self.role_categories = {'主管': [], '副主管': [], '其他人员': []}
+        self._roles = None
+        self._role_categories = None
+        # 以本部门为根的子树的统计量，随修改沿父部门链增量维护：
+        # 部门数（含自身）、任职人数、缺少主管的部门数，以及按性别/年龄段的任职人数
+        self._subtree_size = 1
+        self._headcount = 0
+        self._vacancies = 1
+        self._profile = None  # {(分组, 取值): 人数}，子树中有人任职时才分配
+
+    @property
+    def subtree_size(self) -> int:
+        """以本部门为根的子树中的部门数（含本部门），O(1)。"""
+        return self._subtree_size
+
+    @property
+    def headcount(self) -> int:
+        """以本部门为根的子树中的任职人数（一人担任多个职位时按职位计），O(1)。"""
+        return self._headcount
+
+    @property
+    def vacancies(self) -> int:
+        """以本部门为根的子树中没有主管的部门数，O(1)。"""
+        return self._vacancies
+
+    def subtree_stats(self) -> dict:
+        """
+        子树的汇总统计，直接读取增量维护的结果，不遍历子树。
+        :return: {'departments', 'headcount', 'vacancies', 'gender': {性别: 人数}, 'age': {年龄段: 人数}}
+        """
+        stats = {'departments': self._subtree_size, 'headcount': self._headcount,
+                 'vacancies': self._vacancies, 'gender': {}, 'age': {}}
+        for (kind, value), count in (self._profile or {}).items():
+            stats[kind][value] = count
+        return stats
+
+    def _merge_profile(self, delta: dict, sign: int):
+        profile = self._profile
+        if profile is None:
+            profile = self._profile = {}
+        for key, count in delta.items():
+            total = profile.get(key, 0) + sign * count
+            if total:
+                profile[key] = total
+            else:
+                del profile[key]
+
+    def _propagate(self, size_delta: int, headcount_delta: int, vacancy_delta: int = 0,
+                   profile_delta: dict = None, sign: int = 1):
+        """把子树统计量的变化累加到本部门及其所有祖先上（profile_delta 按 sign 加减）。"""
+        node = self
+        while node is not None:
+            node._subtree_size += size_delta
+            node._headcount += headcount_delta
+            node._vacancies += vacancy_delta
+            if profile_delta:
+                node._merge_profile(profile_delta, sign)
+            node = node.parent
+
+    def retally_member(self, old_profile: tuple, new_profile: tuple):
+        """本部门一名任职人员的性别或年龄变化后，更新本部门及各级祖先的分布统计。"""
+        if old_profile != new_profile:
+            self._propagate(0, 0, profile_delta=dict.fromkeys(old_profile, 1), sign=-1)
+            self._propagate(0, 0, profile_delta=dict.fromkeys(new_profile, 1))
+
+    def recount_subtree(self):
+        """按后序重新计算子树中每个部门的统计量（批量建树后调用一次），O(子树大小)。"""
+        for dept in self.iter_subtree('post'):
+            size, headcount = 1, dept.member_count()
+            vacancies = 0 if dept._role_categories and dept._role_categories['主管'] else 1
+            dept._profile = None
+            for staff in (dept._role_categories or {}).values():
+                for person in staff:
+                    dept._merge_profile(dict.fromkeys(member_profile(person), 1), 1)
+            for child in dept.children:
+                size += child._subtree_size
+                headcount += child._headcount
+                vacancies += child._vacancies
+                if child._profile:
+                    dept._merge_profile(child._profile, 1)
+            dept._subtree_size, dept._headcount, dept._vacancies = size, headcount, vacancies
+
+    def member_count(self) -> int:
+        """本部门自身的任职人数（不含子部门）。"""
+        if self._role_categories is None:
+            return 0
+        return sum(len(staff) for staff in self._role_categories.values())
+
+    @property
+    def roles(self):
+        """担任具体职务的人员（只读视图），例如: {'院长': person_obj, '教学副院长': person_obj}"""
+        return _EMPTY_ROLES if self._roles is None else MappingProxyType(self._roles)
+
+    @property
+    def role_categories(self):
+        """按职务分类 ('主管', '副主管', '其他人员') 存放的人员集合 StaffSet（只读视图）"""
+        if self._role_categories is None:
+            return _EMPTY_ROLE_CATEGORIES
+        return MappingProxyType(self._role_categories)
+
+    def add_member(self, category: str, person, update_ancestors: bool = True):
+        """
+        将人员加入某个职务分类。
+        :param category: 职务分类，必须是 ROLE_CATEGORIES 之一
+        :param person: Person 对象
+        :param update_ancestors: 是否同时更新各级部门的任职人数；批量建树时传 False，最后调用 recount_subtree
+        """
+        if self._role_categories is None:
+            self._role_categories = {name: StaffSet() for name in ROLE_CATEGORIES}
+        staff = self._role_categories[category]
+        filled = category == '主管' and not staff
+        staff.add(person)
+        if update_ancestors:
+            self._propagate(0, 1, -1 if filled else 0, dict.fromkeys(member_profile(person), 1))
+
+    def add_members(self, members):
+        """
+        批量加入人员，各级部门的统计量只更新一次。
+        :param members: [(职务分类, Person 对象), ...]
+        """
+        add_members_in_bulk([(self, members)])
+
+    def remove_member(self, category: str, person) -> bool:
+        """从职务分类中移除人员的一次出现；不在其中时返回 False。"""
+        staff = self._role_categories.get(category) if self._role_categories is not None else None
+        if staff is None or not staff.discard(person):
+            return False
+        vacated = category == '主管' and not staff
+        self._propagate(0, -1, 1 if vacated else 0, dict.fromkeys(member_profile(person), 1), sign=-1)
+        return True
+
+    def set_role(self, title: str, person):
+        """设置担任某职务的人员，职务名称会被驻留以共享重复的字符串。"""
+        if self._roles is None:
+            self._roles = {}
+        self._roles[sys.intern(title) if isinstance(title, str) else title] = person
+
+    def remove_role(self, title: str):
+        """移除某职务。"""
+        if self._roles is not None:
+            self._roles.pop(title, None)
 
     def add_child(self, child):
         """添加一个子部门"""
         if child not in self.children:
             self.children.append(child)
             child.parent = self
+            self._propagate(child._subtree_size, child._headcount, child._vacancies, child._profile)
 
     def remove_child(self, child):
         """移除一个子部门"""
         if child in self.children:
             self.children.remove(child)
             child.parent = None
+            self._propagate(-child._subtree_size, -child._headcount, -child._vacancies, child._profile, sign=-1)
+
+    def iter_subtree(self, order: str = 'pre', include_self: bool = True):
+        """
+        非递归地逐个产生子树中的部门，可随时停止迭代。
+        :param order: 'pre' 先序（父部门在前）、'post' 后序（子部门在前）或 'bfs' 层序
+        :param include_self: 是否包含本部门
+        """
+        if order == 'pre':
+            stack = [self] if include_self else list(reversed(self.children))
+            while stack:
+                dept = stack.pop()
+                yield dept
+                stack.extend(reversed(dept.children))
+        elif order == 'post':
+            # 每一帧: (部门, 其子部门的迭代器)
+            stack = [(self, iter(self.children))]
+            while stack:
+                dept, children = stack[-1]
+                child = next(children, None)
+                if child is not None:
+                    stack.append((child, iter(child.children)))
+                    continue
+                stack.pop()
+                if stack or include_self:
+                    yield dept
+        elif order == 'bfs':
+            queue = deque([self] if include_self else self.children)
+            while queue:
+                dept = queue.popleft()
+                yield dept
+                queue.extend(dept.children)
+        else:
+            raise ValueError(f"未知的遍历顺序: {order!r}")
 
     def get_all_children(self):
-        """递归获取所有层级的子部门"""
-        all_children = []
-        for child in self.children:
-            all_children.append(child)
-            all_children.extend(child.get_all_children())
-        return all_children
+        """获取所有层级的子部门（先序）"""
+        return list(self.iter_subtree('pre', include_self=False))
 
     def to_dict(self):
-        """将 Department 对象及其所有子部门递归地转换为字典。"""
-        return {
-            'department_id': self.department_id,
-            'name': self.name,
-            # 存储子部门的字典列表，而不是对象
-            'children': [child.to_dict() for child in self.children],
-            # 存储人员的 ID，而不是对象
-            'roles': {title: person.employee_id for title, person in self.roles.items()},
-            'role_categories': {
-                category: [person.employee_id for person in plist]
-                for category, plist in self.role_categories.items()
+        """将 Department 对象及其所有子部门转换为嵌套字典（按后序构造，不使用递归）。"""
+        converted = {}
+        for dept in self.iter_subtree('post'):
+            converted[id(dept)] = {
+                'department_id': dept.department_id,
+                'name': dept.name,
+                # 存储子部门的字典列表，而不是对象
+                'children': [converted.pop(id(child)) for child in dept.children],
+                # 存储人员的 ID，而不是对象
+                'roles': {title: person.employee_id for title, person in dept.roles.items()},
+                'role_categories': {
+                    category: [person.employee_id for person in plist]
+                    for category, plist in dept.role_categories.items()
+                }
             }
-        }
\ No newline at end of file
+        return converted[id(self)]
+
+
+def add_members_in_bulk(groups):
+    """
+    向多个部门批量加入人员。先把各部门自身的统计变化算好，再按深度自下而上逐层合并给父部门，
+    每个受影响的部门（及其祖先）只更新一次，而不是每个部门各自沿父部门链传播一遍。
+    :param groups: [(Department, [(职务分类, Person 对象), ...]), ...]
+    """
+    # id(部门) -> [部门, 任职人数变化, 缺主管数变化, {分组键: 人数}]
+    deltas = {}
+    for dept, members in groups:
+        if not members:
+            continue
+        if dept._role_categories is None:
+            dept._role_categories = {name: StaffSet() for name in ROLE_CATEGORIES}
+        categories = dept._role_categories
+        had_head = bool(categories['主管'])
+        pairs = {}
+        for category, person in members:
+            categories[category].add(person)
+            pair = (person.gender, person.age)
+            pairs[pair] = pairs.get(pair, 0) + 1
+        profile = {}
+        for (gender, age), count in pairs.items():
+            try:
+                keys = _profile_key(gender, age)
+            except TypeError:
+                keys = _profile_key.__wrapped__(gender, age)
+            for key in keys:
+                profile[key] = profile.get(key, 0) + count
+        delta = deltas.setdefault(id(dept), [dept, 0, 0, {}])
+        delta[1] += len(members)
+        delta[2] += -1 if not had_head and categories['主管'] else 0
+        for key, count in profile.items():
+            delta[3][key] = delta[3].get(key, 0) + count
+
+    # 按深度分桶，从最深的一层开始，把每个部门累计的变化应用到自身后并入父部门
+    levels: dict[int, list] = {}
+    for delta in deltas.values():
+        depth, node = 0, delta[0].parent
+        while node is not None:
+            depth, node = depth + 1, node.parent
+        levels.setdefault(depth, []).append(delta)
+    # 逐层向上直到根部门：上层的桶可能是在处理下一层时才建立的
+    for depth in range(max(levels, default=-1), -1, -1):
+        for dept, headcount, vacancies, profile in levels.get(depth, ()):
+            dept._headcount += headcount
+            dept._vacancies += vacancies
+            dept._merge_profile(profile, 1)
+            parent = dept.parent
+            if parent is None:
+                continue
+            upper = deltas.get(id(parent))
+            if upper is None:
+                upper = deltas[id(parent)] = [parent, 0, 0, {}]
+                levels.setdefault(depth - 1, []).append(upper)
+            upper[1] += headcount
+            upper[2] += vacancies
+            for key, count in profile.items():
+                upper[3][key] = upper[3].get(key, 0) + count
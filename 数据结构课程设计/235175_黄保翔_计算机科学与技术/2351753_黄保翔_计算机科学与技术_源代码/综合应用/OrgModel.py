@@ -1,13 +1,49 @@
 '''数据模型管理器'''
-from Department import Department
 # OrgModel.py (Completed)
 
-from Department import Department
-from Person import Person
+from Department import Department, member_profile, add_members_in_bulk
+from Person import Person, intern_value
 import uuid  # 用于生成唯一的部门ID
-import json  # 用于保存和加载数据
+from bisect import bisect_left, insort
+import gc
+import os
+import logging
+import threading
+import weakref
+import json_stream  # 用于流式保存和加载数据
+import snapshot  # 二进制快照格式
+import bulk_import  # 批量导入的读取与校验
+import query  # 人员查询
+from person_index import PersonIndex
+from department_names import DepartmentNameIndex
+from background import Cancelled
+from OrgModelBase import OrgModelBase
 
-class OrgModel:
+logger = logging.getLogger('org.model')
+
+
+# 区间编号（见 _ensure_tour）：整个范围至少为 _LABEL_SPAN，编号之间留有大量空隙。新加入或移入的子树取父部门
+# 末尾空隙的 1/_LABEL_SHARE，并要求平均每个部门至少分到 _LABEL_MIN_UNIT 个编号；不够时重排最近的一个
+# 平均每部门至少有 _LABEL_RELABEL_UNIT 个编号的祖先子树
+_LABEL_SPAN = 1 << 62
+_LABEL_SHARE = 16
+_LABEL_MIN_UNIT = 1 << 8
+_LABEL_RELABEL_UNIT = _LABEL_MIN_UNIT * _LABEL_SHARE ** 2
+
+def _reporting(records, progress, position, total: int, every: int = 4096):
+    """
+    原样产生记录，每 every 条调用一次 progress(position(已产生的记录数), total)。
+    """
+    count = 0
+    for record in records:
+        count += 1
+        if count % every == 0:
+            progress(position(count), total)
+        yield record
+    progress(position(count), total)
+
+
+class OrgModel(OrgModelBase):
     """数据模型管理器，封装所有数据操作逻辑"""
 
     def __init__(self):
@@ -15,6 +51,410 @@ class OrgModel:
         self.root_department: Department = Department("root", "同济大学")
         # personnel_roster 以 employee_id 为键，Person 对象为值，便于快速查找
         self.personnel_roster: dict[str, Person] = {}
+        # department_index 以 department_id 为键，Department 对象为值，使部门查找为 O(1)
+        self.department_index: dict[str, Department] = {}
+        # 部门名称 -> 部门ID 的索引（见 department_names.py），供按名称查找部门和名称补全使用
+        self.department_names = DepartmentNameIndex()
+        self._reset_department_index()
+        # position_index 以 employee_id 为键，记录该员工的全部任职 (部门, 职位类别, 职位名称)，
+        # 使删除人员、卸任职位只需处理该员工自己的任职，而无需遍历整个组织
+        self.position_index: dict[str, list[tuple[Department, str, str]]] = {}
+        # 人员的姓名、年龄、电话、性别与任职数索引（见 person_index.py），供 select 与姓名查找使用
+        self.person_index = PersonIndex()
+        # 最近一次加载的文件中附带的额外信息（如日志序号）
+        self.file_meta: dict = {}
+        # 操作日志（见 journal.py）；设置后每次成功的修改都会追加一条记录
+        self.journal = None
+        # 变更监听器，见 subscribe
+        self._listeners: list = []
+        # 部门的区间编号 {部门ID: (进入序号, 离开序号)}，第一次查询时建立，此后随部门的增删、移动局部调整
+        self._tour: dict[str, tuple[int, int]] | None = None
+        # 按部门进入序号排序的任职索引 [(进入序号, 员工ID)]，随 _tour 一同建立和维护
+        self._member_index: list[tuple[int, str]] | None = None
+        # 倍增祖先表 {部门ID: (深度, [第 1, 2, 4, ... 级祖先])}，增删部门时增量维护，加载后按需重建
+        self._lift: dict[str, tuple[int, list[Department]]] | None = None
+        # 仍在使用中的冻结版本（见 freeze 和 frozen.py），修改对象前要先为它们保存旧状态
+        self._frozen = weakref.WeakSet()
+        self._frozen_lock = threading.Lock()
+
+    def _record(self, op: str, **args):
+        """若已启用操作日志，则追加一条修改记录。"""
+        if self.journal is not None:
+            self.journal.append(op, args)
+
+    def subscribe(self, listener):
+        """
+        注册变更监听器。每次成功的修改后以 listener(event, **data) 的形式通知：
+          'department_added'    department
+          'department_removed'  department, parent（被删部门的子部门随之删除，不再单独通知）
+          'department_renamed'  department
+          'department_moved'    department, old_parent
+          'person_assigned'     person, department, role_category, position_title
+          'person_unassigned'   person, department, role_category, position_title
+          'person_updated'      person（姓名、年龄等基本信息改变）
+          'person_removed'      employee_id（在此之前先为其每条任职通知 'person_unassigned'）
+          'bulk_imported'       count（批量导入后只通知一次）
+        :param listener: 回调函数
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """取消注册变更监听器。"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, event: str, **data):
+        """通知所有监听器。"""
+        for listener in list(self._listeners):
+            listener(event, **data)
+
+    def freeze(self):
+        """
+        取得当前组织的只读冻结版本，O(1)。此后的修改只为它复制被修改的部门（及其祖先链）和人员，
+        因此可以把它交给后台线程保存、导出或统计，而编辑照常进行。应在两次修改之间调用。
+        :return: FrozenOrg 对象，用完后调用其 release()（或使用 with 语句）
+        """
+        from frozen import FrozenOrg  # frozen.py 借用了 OrgModel 的只读方法
+        org = FrozenOrg(self, self._frozen_lock)
+        with self._frozen_lock:
+            self._frozen.add(org)
+        return org
+
+    def _release_frozen(self, org):
+        with self._frozen_lock:
+            self._frozen.discard(org)
+
+    def _before_change(self, departments=(), paths=(), people=(), added_departments=(), added_people=(),
+                       removing_people=False):
+        """
+        在修改之前为所有存活的冻结版本保存对象的当前状态（调用方先检查 self._frozen 是否为空）。
+        :param departments: 将被修改的部门
+        :param paths: 将被修改的部门，连同其所有祖先一起保存（子树统计量会沿祖先链变化）
+        :param people: 将被修改的人员
+        :param added_departments: 即将新增的部门ID
+        :param added_people: 即将新增的员工ID
+        :param removing_people: 是否将从花名册中删除人员
+        """
+        departments = list(departments)
+        for dept in paths:
+            while dept is not None:
+                departments.append(dept)
+                dept = dept.parent
+        with self._frozen_lock:
+            for org in self._frozen:
+                org._keep(departments, people, added_departments, added_people, removing_people)
+
+    def _invalidate_tour(self):
+        """整个部门树被替换（加载文件），区间编号与任职索引需要在下次查询时重建。"""
+        self._tour = None
+        self._member_index = None
+
+    def _ensure_tour(self) -> dict[str, tuple[int, int]]:
+        """
+        为每个部门分配区间编号：子树中的部门恰好落在 [进入序号, 离开序号] 之内，且进入序号按先序递增。
+        编号之间留有大量空隙，增删、移动部门时只在局部调整（见 _place_labels），
+        只有加载文件后才需要在这里整体重建，O(部门数 + 任职数)。
+        """
+        if self._tour is None:
+            tour = {}
+            root = self.root_department
+            if root is not None:
+                self._layout_labels(tour, root, 0, max(_LABEL_SPAN, root.subtree_size * _LABEL_RELABEL_UNIT
+                                                       * _LABEL_SHARE ** 2))
+            self._member_index = self._members_in_label_order(tour)
+            self._tour = tour
+        return self._tour
+
+    def _members_in_label_order(self, tour: dict) -> list[tuple[int, str]]:
+        """按先序逐个部门取出任职，得到按进入序号排好的任职索引，无需整体排序。"""
+        by_department: dict[str, list[str]] = {}
+        for employee_id, entries in self.position_index.items():
+            for dept, _, _ in entries:
+                by_department.setdefault(dept.department_id, []).append(employee_id)
+        members = []
+        if self.root_department is not None:
+            for dept in self.root_department.iter_subtree('pre'):
+                employee_ids = by_department.get(dept.department_id)
+                if employee_ids:
+                    label = tour[dept.department_id][0]
+                    members.extend((label, employee_id) for employee_id in sorted(employee_ids))
+        return members
+
+    @staticmethod
+    def _layout_labels(tour: dict, top: Department, lo: int, width: int):
+        """
+        在 [lo, lo + width) 中为 top 的子树重新分配编号：每个部门平均分到 width // 子树规模 个编号，
+        部门自身占第一个，子部门依次紧随其后，多出的部分作为末尾空隙留给以后加入的子部门。
+        """
+        stack = [(top, lo, width)]
+        while stack:
+            dept, lo, width = stack.pop()
+            tour[dept.department_id] = (lo, lo + width - 1)
+            unit = width // dept.subtree_size
+            start = lo + 1
+            for child in dept.children:
+                child_width = unit * child.subtree_size
+                stack.append((child, start, child_width))
+                start += child_width
+
+    def _place_labels(self, dept: Department, members: list = ()):
+        """
+        为刚接到父部门末尾的部门（连同其子树）分配编号，并把其中的任职 [(部门ID, 员工ID)] 放回任职索引。
+        通常只需取父部门末尾空隙的 1/_LABEL_SHARE，代价与该子树的规模成正比；空隙不足时，
+        重排最近的一个编号足够稀疏的祖先子树，并原地改写其中任职的编号（顺序不变，无需重新排序）。
+        """
+        tour = self._tour
+        parent = dept.parent
+        siblings = parent.children
+        start = tour[siblings[-2].department_id][1] + 1 if len(siblings) > 1 else tour[parent.department_id][0] + 1
+        width = (tour[parent.department_id][1] - start + 1) // _LABEL_SHARE
+        if width >= dept.subtree_size * _LABEL_MIN_UNIT:
+            self._layout_labels(tour, dept, start, width)
+        else:
+            top = parent
+            while top.parent is not None and self._label_unit(top) < _LABEL_RELABEL_UNIT:
+                top = top.parent
+            self._relabel(top)
+        if members:
+            label = tour[dept.department_id][0]
+            block = [(tour[department_id][0], employee_id) for department_id, employee_id in members]
+            i = bisect_left(self._member_index, (label,))
+            self._member_index[i:i] = block
+
+    def _label_unit(self, dept: Department) -> int:
+        """部门子树中平均每个部门可用的编号数。"""
+        lo, hi = self._tour[dept.department_id]
+        return (hi - lo + 1) // dept.subtree_size
+
+    def _relabel(self, top: Department):
+        """在 top 原有的区间内重新分配其子树的编号（根部门过于拥挤时扩大整个编号范围）。"""
+        tour, members = self._tour, self._member_index
+        lo, hi = tour[top.department_id]
+        width = hi - lo + 1
+        if top.parent is None and width // top.subtree_size < _LABEL_RELABEL_UNIT:
+            width = top.subtree_size * _LABEL_RELABEL_UNIT * _LABEL_SHARE ** 2
+        old = {tour[d.department_id][0]: d.department_id for d in top.iter_subtree() if d.department_id in tour}
+        self._layout_labels(tour, top, lo, width)
+        # 重排保持先序，编号的映射单调递增，任职索引中这一段的顺序不变
+        i = bisect_left(members, (lo,))
+        j = bisect_left(members, (hi + 1,), i)
+        members[i:j] = [(tour[old[label]][0], employee_id) for label, employee_id in members[i:j]]
+
+    def _unplace_labels(self, dept: Department) -> list:
+        """
+        收回部门子树的编号，并从任职索引中取出其中的任职（删除或移动部门时使用）。
+        :return: 取出的任职 [(部门ID, 员工ID)]，顺序与任职索引中相同
+        """
+        tour, members = self._tour, self._member_index
+        lo, hi = tour[dept.department_id]
+        i = bisect_left(members, (lo,))
+        j = bisect_left(members, (hi + 1,), i)
+        taken = members[i:j]
+        del members[i:j]
+        owner = {tour.pop(d.department_id)[0]: d.department_id for d in dept.iter_subtree()}
+        return [(owner[label], employee_id) for label, employee_id in taken]
+
+    def _index_member(self, dept: Department, employee_id: str):
+        """把一条新任职加入已建好的任职索引（索引尚未建立时无需处理）。"""
+        if self._tour is not None:
+            insort(self._member_index, (self._tour[dept.department_id][0], employee_id))
+
+    def _index_members(self, entries: list):
+        """
+        把一批新任职 [(部门, 员工ID)] 加入已建好的任职索引：排好序后接在末尾再整体排序，
+        timsort 只需把这两段有序序列归并一次，O(任职数 + k log k)。
+        """
+        if self._tour is not None and entries:
+            tour = self._tour
+            self._member_index.extend(sorted((tour[dept.department_id][0], employee_id)
+                                             for dept, employee_id in entries))
+            self._member_index.sort()
+
+    def _unindex_member(self, dept: Department, employee_id: str):
+        """从已建好的任职索引中移除一条任职。"""
+        if self._tour is not None and dept.department_id in self._tour:
+            key = (self._tour[dept.department_id][0], employee_id)
+            i = bisect_left(self._member_index, key)
+            if i < len(self._member_index) and self._member_index[i] == key:
+                del self._member_index[i]
+
+    def _lift_entry(self, dept: Department, lift: dict) -> tuple[int, list[Department]]:
+        """由父部门的倍增表算出本部门的倍增表，O(log 深度)。"""
+        if dept.parent is None:
+            return 0, []
+        parent_depth, _ = lift[dept.parent.department_id]
+        jumps = [dept.parent]
+        while True:
+            above = lift[jumps[-1].department_id][1]
+            k = len(jumps) - 1
+            if k >= len(above):
+                break
+            jumps.append(above[k])
+        return parent_depth + 1, jumps
+
+    def _relift(self, top: Department):
+        """按层序（父部门先于子部门）重新计算 top 子树中所有部门的倍增表。"""
+        for dept in top.iter_subtree('bfs'):
+            self._lift[dept.department_id] = self._lift_entry(dept, self._lift)
+
+    def _ensure_lift(self) -> dict[str, tuple[int, list[Department]]]:
+        if self._lift is None:
+            self._lift = {}
+            if self.root_department is not None:
+                self._relift(self.root_department)
+        return self._lift
+
+    def _jump(self, dept: Department, k: int) -> Department | None:
+        """返回 dept 的第 k 级祖先，按 k 的二进制位跳跃，O(log k)。"""
+        lift = self._ensure_lift()
+        bit = 0
+        while k and dept is not None:
+            if k & 1:
+                jumps = lift[dept.department_id][1]
+                dept = jumps[bit] if bit < len(jumps) else None
+            k >>= 1
+            bit += 1
+        return dept
+
+    def department_depth(self, department_id: str) -> int | None:
+        """部门的深度（根部门为 0）；部门不存在时返回 None。"""
+        entry = self._ensure_lift().get(department_id)
+        return entry[0] if entry else None
+
+    def kth_ancestor(self, department_id: str, k: int) -> Department | None:
+        """
+        返回部门向上第 k 级的祖先（k=0 为自身），O(log 深度)。
+        :return: Department 对象；部门不存在或 k 超过其深度时返回 None
+        """
+        dept = self.department_index.get(department_id)
+        if dept is None or k < 0 or department_id not in self._ensure_lift():
+            return None
+        return self._jump(dept, k)
+
+    def lowest_common_ancestor(self, dept_id_a: str, dept_id_b: str) -> Department | None:
+        """
+        两个部门的最近公共上级部门（其中一个是另一个的祖先时即为该部门），O(log 深度)。
+        :return: Department 对象；任一部门不存在时返回 None
+        """
+        lift = self._ensure_lift()
+        if dept_id_a not in lift or dept_id_b not in lift:
+            return None
+        a, b = self.department_index[dept_id_a], self.department_index[dept_id_b]
+        depth_a, depth_b = lift[dept_id_a][0], lift[dept_id_b][0]
+        # 先把较深的一方提到同一深度
+        if depth_a > depth_b:
+            a = self._jump(a, depth_a - depth_b)
+        elif depth_b > depth_a:
+            b = self._jump(b, depth_b - depth_a)
+        if a is b:
+            return a
+        # 再从最大步长开始，两者同时上跳到仍不相同的最高位置
+        for bit in range(len(lift[a.department_id][1]) - 1, -1, -1):
+            jumps_a, jumps_b = lift[a.department_id][1], lift[b.department_id][1]
+            if bit < len(jumps_a) and jumps_a[bit] is not jumps_b[bit]:
+                a, b = jumps_a[bit], jumps_b[bit]
+        return a.parent
+
+    def supervisor_chain(self, employee_id: str, department_id: str = None) -> list:
+        """
+        从员工的任职部门起逐级向上，列出每一级部门的主管，用于审批流转。
+        员工本人担任的主管职位不计入；没有主管的部门被跳过。
+        :param employee_id: 员工ID
+        :param department_id: 起始部门ID，默认为该员工的第一个任职部门
+        :return: [(部门, 主管 Person), ...]，由近及远；员工不存在或没有任职时为空列表
+        """
+        person = self.get_person(employee_id)
+        if person is None:
+            return []
+        if department_id is None:
+            if not person.assigment:
+                return []
+            dept = person.assigment[0][0]
+        else:
+            dept = self.find_department(department_id)
+        chain = []
+        while dept is not None:
+            for head in dept.role_categories['主管']:
+                if head is not person:
+                    chain.append((dept, head))
+            dept = dept.parent
+        return chain
+
+    def department_stats(self, department_id: str) -> dict | None:
+        """
+        部门（含所有下级部门）的汇总统计：部门数、任职人数、缺少主管的部门数及性别、年龄段分布，O(1)。
+        :param department_id: 部门ID
+        :return: 统计字典（见 Department.subtree_stats），部门不存在时返回 None
+        """
+        dept = self.find_department(department_id)
+        return dept.subtree_stats() if dept else None
+
+    def is_ancestor(self, ancestor_id: str, department_id: str) -> bool:
+        """
+        判断部门 department_id 是否位于 ancestor_id 的子树中（部门自身也算），
+        只需比较两个区间编号，O(1)。
+        :param ancestor_id: 祖先部门ID
+        :param department_id: 待判断的部门ID
+        :return: 是则返回 True；任一部门不存在时返回 False
+        """
+        tour = self._ensure_tour()
+        outer, inner = tour.get(ancestor_id), tour.get(department_id)
+        if outer is None or inner is None:
+            return False
+        return outer[0] <= inner[0] <= outer[1]
+
+    def people_in_subtree(self, department_id: str) -> list:
+        """
+        返回在该部门及其所有子部门中任职的人员（每人一次，按部门先序）。
+        在按编号排序的任职索引上二分查找区间，O(log 任职数 + 结果数)。
+        :param department_id: 部门ID
+        :return: Person 对象列表；部门不存在时为空列表
+        """
+        label = self._ensure_tour().get(department_id)
+        if label is None:
+            return []
+        members = self._member_index
+        lo = bisect_left(members, (label[0],))
+        hi = bisect_left(members, (label[1] + 1,), lo)
+        employee_ids = dict.fromkeys(employee_id for _, employee_id in members[lo:hi])
+        return [self.personnel_roster[employee_id] for employee_id in employee_ids]
+
+    def _subtree_assignment_count(self, department_id: str) -> int:
+        """该部门子树中的任职条数（同一人的多条任职分别计数），O(log 任职数)。"""
+        label = self._ensure_tour().get(department_id)
+        if label is None:
+            return 0
+        members = self._member_index
+        lo = bisect_left(members, (label[0],))
+        return bisect_left(members, (label[1] + 1,), lo) - lo
+
+    def select(self, q, limit: int = None) -> list:
+        """
+        按组合条件查找人员（条件的写法见 query.py）。先从候选最少的索引（年龄、性别、电话、任职数、
+        部门子树）取出人员，再用其余条件逐个检查，代价与最有选择性的条件的候选人数成正比。
+        :param q: Query 对象
+        :param limit: 最多返回的人数，默认不限
+        :return: Person 对象列表，顺序取决于所用的索引
+        """
+        return query.run(self, q, limit)
+
+    def explain(self, q) -> str:
+        """
+        说明 select 将如何执行该查询：使用哪个索引、候选人数以及逐个检查的其余条件。
+        :param q: Query 对象
+        """
+        driver, rest, count = query.plan(self, q)
+        source = f"索引: {driver!r}" if driver is not None else "扫描整个花名册"
+        checks = '，'.join(map(repr, rest)) or '无'
+        return f"{source}（候选 {count} 人）；逐个检查: {checks}"
+
+    def _reset_department_index(self):
+        """清空部门索引，并只登记当前根部门。"""
+        self.department_index = {}
+        if self.root_department is not None:
+            self.department_index[self.root_department.department_id] = self.root_department
+        self.department_names = DepartmentNameIndex.build(self.department_index.values())
 
     def add_person(self, employee_id, name, age, gender, phone_number):
         """
@@ -23,11 +463,17 @@ class OrgModel:
         :return: 成功则返回 Person 对象, 若ID已存在则返回 None
         """
         if employee_id in self.personnel_roster:
-            print(f"错误: 员工ID '{employee_id}' 已存在。")
+            logger.warning("员工ID '%s' 已存在。", employee_id)
             return None
         new_person = Person(employee_id, name, age, gender, phone_number, [])
-        print(f"2. 准备创建Person对象: ID='{employee_id}', 类型={type(employee_id)}")
+        logger.debug("创建 Person 对象: ID=%r", employee_id)
+        if self._frozen:
+            self._before_change(added_people=(employee_id,))
         self.personnel_roster[employee_id] = new_person
+        self.position_index[employee_id] = []
+        self.person_index.add(new_person)
+        self._record('add_person', employee_id=employee_id, name=name, age=age, gender=gender,
+                     phone_number=phone_number)
         return new_person
 
     def delete_person(self, employee_id: str) -> bool:
@@ -37,30 +483,37 @@ class OrgModel:
         :return: 成功返回 True, 失败返回 False
         """
         if employee_id not in self.personnel_roster:
-            print(f"错误: 员工ID '{employee_id}' 不存在。")
+            logger.warning("员工ID '%s' 不存在。", employee_id)
             return False
 
         person_to_delete = self.personnel_roster[employee_id]
+        if self._frozen:
+            self._before_change(paths=[dept for dept, _, _ in self.position_index.get(employee_id, [])],
+                                people=(person_to_delete,), removing_people=True)
 
         del self.personnel_roster[employee_id]
 
-        # 首先获取包括根部门在内的所有部门列表
-        all_departments = [self.root_department] + self.root_department.get_all_children()
-
-        for dept in all_departments:
-            # 遍历所有职位类别：'主管', '副主管', '其他人员'
-            for category, staff_list in dept.role_categories.items():
-                # 如果员工在列表中，则移除
-                if person_to_delete in staff_list:
-                    staff_list.remove(person_to_delete)
-
-            # 清理 roles 字典（可选，但更严谨）
-            roles_to_delete = [title for title, person in dept.roles.items() if person == person_to_delete]
-            for title in roles_to_delete:
-                del dept.roles[title]
+        # 只需处理该员工自己的任职记录
+        positions = self.position_index.pop(employee_id, [])
+        self.person_index.remove(person_to_delete, len(positions))
+        for dept, category, title in positions:
+            self._detach_position(person_to_delete, dept, category, title)
+        person_to_delete.assigment = []
 
+        self._record('delete_person', employee_id=employee_id)
+        for dept, category, title in positions:
+            self._emit('person_unassigned', person=person_to_delete, department=dept,
+                       role_category=category, position_title=title)
+        self._emit('person_removed', employee_id=employee_id)
         return True
 
+    def _detach_position(self, person: Person, dept: Department, category: str, title: str):
+        """从部门的 role_categories 和 roles 中移除员工的一条任职记录。"""
+        if dept.remove_member(category, person):
+            self._unindex_member(dept, person.employee_id)
+        if dept.roles.get(title) is person:
+            dept.remove_role(title)
+
     def get_person(self, employee_id: str) -> Person | None:
         """
         根据员工ID从花名册中查找员工。
@@ -71,40 +524,126 @@ class OrgModel:
 
     def find_department(self, department_id: str, start_node=None) -> Department | None:
         """
-        在组织树中递归查找指定ID的部门。
+        通过部门索引查找指定ID的部门，时间复杂度为 O(1)。
         :param department_id: 要查找的部门ID
-        :param start_node: 查找的起始节点，默认为根节点
+        :param start_node: 查找的起始节点，默认为根节点；指定时只返回位于该节点子树中的部门
         :return: 找到则返回 Department 对象，否则返回 None
         """
-        if start_node is None:
-            start_node = self.root_department
+        department = self.department_index.get(department_id)
+        if department is None or start_node is None:
+            return department
 
-        if start_node.department_id == department_id:
-            return start_node
-
-        for child in start_node.children:
-            found = self.find_department(department_id, child)
-            if found:
-                return found
+        # 沿父部门指针向上确认该部门位于 start_node 的子树中
+        node = department
+        while node is not None:
+            if node is start_node:
+                return department
+            node = node.parent
         return None
 
-    def add_department(self, name: str, parent_dept_id: str) -> Department | None:
+    def find_departments_by_name(self, name: str) -> list:
+        """
+        通过部门名称索引查找名称为 name 的所有部门（同名部门全部返回）。
+        :return: Department 对象列表，按建立的先后排列
+        """
+        index = self.department_index
+        return [index[department_id] for department_id in self.department_names.ids(name)]
+
+    def departments_with_prefix(self, prefix: str, limit: int = None) -> list:
+        """
+        名称以 prefix 开头的部门，用于输入部门名称时的自动补全。
+        :param limit: 最多返回的部门数，默认不限
+        :return: Department 对象列表，按名称的字符顺序排列
+        """
+        index = self.department_index
+        return [index[department_id] for department_id in self.department_names.ids_with_prefix(prefix, limit)]
+
+    def add_department(self, name: str, parent_dept_id: str, department_id: str = None) -> Department | None:
         """
         动态建立组织结构，添加新部门。
         :param name: 新部门的名称
         :param parent_dept_id: 父部门的ID
-        :return: 成功则返回新创建的 Department 对象，若父部门不存在则返回 None
+        :param department_id: 指定新部门的ID（重放操作日志时使用），默认自动生成
+        :return: 成功则返回新创建的 Department 对象，若父部门不存在或ID已被占用则返回 None
         """
         parent_dept = self.find_department(parent_dept_id)
         if parent_dept is None:
-            print(f"错误: 未找到ID为 '{parent_dept_id}' 的父部门。")
+            logger.warning("未找到ID为 '%s' 的父部门。", parent_dept_id)
+            return None
+        if department_id is not None and department_id in self.department_index:
+            logger.warning("部门ID '%s' 已存在。", department_id)
             return None
 
         # 使用 uuid 生成一个唯一的部门 ID
-        new_dept_id = str(uuid.uuid4())
+        new_dept_id = department_id if department_id is not None else str(uuid.uuid4())
+        if self._frozen:
+            self._before_change(paths=(parent_dept,), added_departments=(new_dept_id,))
         new_department = Department(new_dept_id, name, parent=parent_dept)
         parent_dept.add_child(new_department)
+        self.department_index[new_dept_id] = new_department
+        self.department_names.add(name, new_dept_id)
+        if self._tour is not None:
+            self._place_labels(new_department)
+        if self._lift is not None:
+            self._lift[new_dept_id] = self._lift_entry(new_department, self._lift)
+        self._record('add_department', name=name, parent_dept_id=parent_dept_id, department_id=new_dept_id)
+        self._emit('department_added', department=new_department)
         return new_department
+
+    def rename_department(self, department_id: str, new_name: str) -> bool:
+        """
+        修改部门名称。
+        :param department_id: 部门ID
+        :param new_name: 新名称
+        :return: 成功返回 True, 部门不存在返回 False
+        """
+        department = self.find_department(department_id)
+        if department is None:
+            logger.warning("未找到ID为 '%s' 的部门。", department_id)
+            return False
+        if self._frozen:
+            self._before_change(departments=(department,))
+        self.department_names.remove(department.name, department_id)
+        department.name = new_name
+        self.department_names.add(new_name, department_id)
+        self._record('rename_department', department_id=department_id, new_name=new_name)
+        self._emit('department_renamed', department=department)
+        return True
+
+    def move_department(self, department_id: str, new_parent_id: str) -> bool:
+        """
+        将部门（连同其子部门和人员）移动到另一个父部门之下。
+        :param department_id: 要移动的部门ID
+        :param new_parent_id: 新父部门的ID，不能是该部门自身或其子部门
+        :return: 成功返回 True, 失败返回 False
+        """
+        department = self.find_department(department_id)
+        new_parent = self.find_department(new_parent_id)
+        if department is None or new_parent is None:
+            logger.warning("部门或目标父部门不存在。")
+            return False
+        if department.parent is None:
+            logger.warning("不能移动根部门。")
+            return False
+        depth_gap = self.department_depth(new_parent_id) - self.department_depth(department_id)
+        if depth_gap >= 0 and self._jump(new_parent, depth_gap) is department:
+            logger.warning("不能将部门 '%s' 移动到其自身或子部门之下。", department.name)
+            return False
+        old_parent = department.parent
+        if old_parent is new_parent:
+            return True
+        if self._frozen:
+            self._before_change(departments=(department,), paths=(old_parent, new_parent))
+        members = self._unplace_labels(department) if self._tour is not None else None
+        old_parent.remove_child(department)
+        new_parent.add_child(department)
+        if members is not None:
+            self._place_labels(department, members)
+        self._relift(department)
+        self._record('move_department', department_id=department_id, new_parent_id=new_parent_id)
+        self._emit('department_moved', department=department, old_parent=old_parent)
+        return True
+
     def delete_department(self, department_id: str) -> bool:
         """
         从组织结构中彻底删除一个部门，包括所有子部门和人员。
@@ -114,19 +653,51 @@ class OrgModel:
         # 1. 找到要删除的部门
         dept_to_delete = self.find_department(department_id)
         if dept_to_delete is None:
-            print(f"错误: 未找到ID为 '{department_id}' 的部门。")
+            logger.warning("未找到ID为 '%s' 的部门。", department_id)
             return False
-        # 2. 递归删除所有子部门
-        for child in dept_to_delete.children:
-            self.delete_department(child.department_id)
-        # 3. 删除部门自身
+        # 2. 将该部门及其所有子部门从索引中移除，并撤销其中人员的任职
+        removed = list(dept_to_delete.iter_subtree())
+        if self._frozen:
+            self._before_change(departments=removed, paths=(dept_to_delete.parent,),
+                                people=self._members_of(removed).values())
+        for dept in removed:
+            self.department_index.pop(dept.department_id, None)
+            self.department_names.remove(dept.name, dept.department_id)
+            if self._lift is not None:
+                self._lift.pop(dept.department_id, None)
+        self._drop_positions_in(removed)
+        if self._tour is not None:
+            self._unplace_labels(dept_to_delete)
+        # 3. 删除部门自身（子部门随之脱离组织树）
         parent = dept_to_delete.parent
 
         if parent:
             parent.remove_child(dept_to_delete)
         else:#没有父节点，说明是根部门
             self.root_department = None
+        self._record('delete_department', department_id=department_id)
+        self._emit('department_removed', department=dept_to_delete, parent=parent)
         return True
+
+    @staticmethod
+    def _members_of(departments) -> dict:
+        """在给定部门中任职的人员 {员工ID: Person}。"""
+        members = {}
+        for dept in departments:
+            for staff_list in dept.role_categories.values():
+                for person in staff_list:
+                    members[person.employee_id] = person
+        return members
+
+    def _drop_positions_in(self, departments: list):
+        """撤销所有人员在给定部门中的任职记录（用于删除部门时）。"""
+        removed_ids = {id(dept) for dept in departments}
+        for employee_id, person in self._members_of(departments).items():
+            entries = self.position_index.get(employee_id, [])
+            kept = self.position_index[employee_id] = [e for e in entries if id(e[0]) not in removed_ids]
+            self.person_index.move_posts(employee_id, len(entries), len(kept))
+            person.assigment = [(d, p) for d, p in person.assigment if id(d) not in removed_ids]
+
     def assign_person_to_department(self, employee_id: str, dept_id: str, role_category: str,
                                     position_title: str) -> bool:
         """
@@ -141,27 +712,105 @@ class OrgModel:
         department = self.find_department(dept_id)
 
         if not person or not department:
-            print("错误: 员工或部门不存在。")
+            logger.warning("员工或部门不存在。")
             return False
 
         if role_category not in department.role_categories:
-            print(f"错误: 无效的职位类别 '{role_category}'。")
+            logger.warning("无效的职位类别 '%s'。", role_category)
             return False
 
         # 处理主管职位的唯一性
         if role_category == '主管' and department.role_categories['主管']:
-            print(f"错误: 部门 '{department.name}' 已存在一名主管。")
+            logger.warning("部门 '%s' 已存在一名主管。", department.name)
             return False
 
+        if self._frozen:
+            self._before_change(paths=(department,), people=(person,))
         # 在部门中记录人员和职位
-        department.role_categories[role_category].append(person)
-        department.roles[position_title] = person
+        department.add_member(role_category, person)
+        department.set_role(position_title, person)
 
         # 在人员信息中记录所属部门和职位
         person.add_assigment(department, position_title)
+        entries = self.position_index[employee_id]
+        entries.append((department, role_category, position_title))
+        self.person_index.move_posts(employee_id, len(entries) - 1, len(entries))
+        self._index_member(department, employee_id)
 
+        self._record('assign_person_to_department', employee_id=employee_id, dept_id=dept_id,
+                     role_category=role_category, position_title=position_title)
+        self._emit('person_assigned', person=person, department=department,
+                   role_category=role_category, position_title=position_title)
         return True
 
+    def bulk_import(self, rows) -> dict:
+        """
+        批量导入人员与任职（行格式见 bulk_import.py）。先校验全部行，再一次性应用所有通过校验的行：
+        不逐条调用 add_person / assign_person_to_department，各部门的统计量只更新一次，
+        操作日志只写一条记录，监听器也只收到一次 'bulk_imported' 通知。
+        :param rows: 行字典的可迭代对象
+        :return: {'total': 总行数, 'imported': 导入行数, 'errors': [{'row', 'employee_id', 'error'}]}
+        """
+        # 与加载相同：批量创建大量对象期间暂停循环垃圾回收
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            accepted, errors = bulk_import.validate_rows(self, rows)
+            if self._frozen and accepted:
+                self._before_bulk_rows(accepted)
+            self._apply_bulk_rows(accepted)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        if accepted:
+            self._record('bulk_import', rows=[row for _, row in accepted])
+            self._emit('bulk_imported', count=len(accepted))
+        return {'total': len(accepted) + len(errors), 'imported': len(accepted), 'errors': errors}
+
+    def _before_bulk_rows(self, accepted):
+        """为冻结版本保存批量导入将修改的部门（连同祖先）和已有人员，并登记新增的人员。"""
+        added, people, departments = [], {}, {}
+        for _, row in accepted:
+            employee_id = row['employee_id']
+            if 'name' in row:
+                added.append(employee_id)
+            elif 'department_id' in row:
+                people[employee_id] = self.personnel_roster[employee_id]
+            if 'department_id' in row:
+                departments[row['department_id']] = self.department_index[row['department_id']]
+        self._before_change(paths=departments.values(), people=people.values(), added_people=added)
+
+    def _apply_bulk_rows(self, accepted):
+        """应用已通过校验的批量导入行。"""
+        roster, position_index = self.personnel_roster, self.position_index
+        new_members: dict[str, tuple[Department, list]] = {}
+        # 获得新任职的人员导入前的任职数，最后一并更新任职数索引
+        old_posts: dict[str, int] = {}
+        indexed = []
+        for _, row in accepted:
+            employee_id = row['employee_id']
+            if 'name' in row:
+                person = roster[employee_id] = Person(employee_id, row['name'], row.get('age'), row.get('gender'),
+                                                      row.get('phone_number'), [])
+                position_index[employee_id] = []
+                self.person_index.add(person)
+            if 'department_id' in row:
+                person = roster[employee_id]
+                if employee_id not in old_posts:
+                    old_posts[employee_id] = len(position_index[employee_id])
+                dept = self.department_index[row['department_id']]
+                category, title = row['role_category'], intern_value(row['position_title'])
+                new_members.setdefault(dept.department_id, (dept, []))[1].append((category, person))
+                dept.set_role(title, person)
+                person.assigment.append((dept, title))
+                position_index[employee_id].append((dept, category, title))
+                indexed.append((dept, employee_id))
+        for employee_id, posts in old_posts.items():
+            self.person_index.move_posts(employee_id, posts, len(position_index[employee_id]))
+        add_members_in_bulk(new_members.values())
+        self._index_members(indexed)
+
     def find_person_by_name(self, name: str) -> list:
         """
         根据输入的人员名，查找其所在的部门、职位等信息。
@@ -169,14 +818,34 @@ class OrgModel:
         :return: 一个包含所有匹配人员信息的列表
         """
         found_people_info = []
-        for person in self.personnel_roster.values():
-            if person.name == name:
-                info = person.get_info()  #
-                # 为了显示清晰，将 assigment 中的对象转换为名称
-                info['assigment'] = [(d.name, pos) for d, pos in person.assigment]
-                found_people_info.append(info)
+        for person in self._people_named(name):
+            info = person.get_info()  #
+            # 为了显示清晰，将 assigment 中的对象转换为名称
+            info['assigment'] = [(d.name, pos) for d, pos in person.assigment]
+            found_people_info.append(info)
         return found_people_info
 
+    def _people_named(self, name: str):
+        """姓名与 name 完全相同的人员，由姓名索引得出。"""
+        roster = self.personnel_roster
+        return [roster[employee_id] for employee_id in self.person_index.name_ids(name)]
+
+    def assignment_categories(self, person) -> list:
+        """与 person.assigment 一一对应的职位类别，取自任职索引。"""
+        return [category for _, category, _ in self.position_index.get(person.employee_id, ())]
+
+    def search_people(self, text: str, limit: int = None) -> list:
+        """
+        按姓名中的任意一段文字查找人员，如输入 "三丰" 可以找到 "张三丰"。
+        结果按相关程度排列：姓名完全相同的在前，其次是以 text 开头的，最后是其他位置包含 text 的，
+        同一档中姓名较短的在前，同名的按员工ID排列。由姓名的二元组倒排索引得出，代价与候选姓名数成正比。
+        :param text: 要查找的文字
+        :param limit: 最多返回的人数，默认不限
+        :return: Person 对象列表
+        """
+        roster = self.personnel_roster
+        return [roster[employee_id] for employee_id in self.person_index.search_name(text, limit)]
+
     def get_all_people(self) -> list:
         """
         返回花名册中所有 Person 对象的列表。
@@ -184,97 +853,193 @@ class OrgModel:
         """
         return list(self.personnel_roster.values())
 
-    def save_to_file(self, filepath: str):
+    def save_to_file(self, filepath: str, indent=None, meta=None, progress=None) -> bool:
         """
-        将整个组织模型的数据保存到 JSON 文件。
+        将整个组织模型的数据以流式方式保存到 JSON 文件。
+        人员和部门逐条写出，不先构造整个嵌套字典，也不使用递归。
+        扩展名为 .orgs 时改为保存二进制快照（见 snapshot.py）。
+        数据先写入同目录下的临时文件，完成后再替换目标文件，失败或取消时原文件保持不变。
         :param filepath: 文件路径 (例如 'data.json')
+        :param indent: 缩进空格数；默认为 None，即输出紧凑格式
+        :param meta: 随数据一同保存的额外信息字典，加载后见 file_meta
+        :param progress: 进度回调 progress(已写出的人员与部门数, 总数)，抛出异常即中止保存
+        :return: 成功返回 True, 失败返回 False
         """
-        # 构建要保存的完整数据结构，包含人员信息和部门结构
-        all_data = {
-            # 1. 序列化所有人员信息
-            # 使用列表推导式将人员对象转换为字典格式
-            'personnel': [person.to_dict() for person in self.personnel_roster.values()],
-            # 2. 序列化整个部门树结构
-            'departments': self.root_department.to_dict()
-        }
-
+        # 临时文件名带上线程ID，使多个线程同时保存到同一路径时互不干扰；保留扩展名，使写出的格式不变
+        root, ext = os.path.splitext(filepath)
+        temp_path = f"{root}.saving-{threading.get_ident()}{ext}"
         try:
-            # 使用 with 语句打开文件，确保文件正确关闭
-            # 设置编码为 utf-8 以支持中文
-            with open(filepath, 'w', encoding='utf-8') as f:
-                # 使用 indent=4 美化输出，ensure_ascii=False 保证中文正常显示
-                json.dump(all_data, f, indent=4, ensure_ascii=False)
-            print(f"数据成功保存到 {filepath}")
+            if filepath.endswith(snapshot.SNAPSHOT_SUFFIX):
+                snapshot.write_snapshot(self, temp_path, meta=meta, progress=progress)
+            else:
+                # 设置编码为 utf-8 以支持中文
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json_stream.dump_org(self, f, indent=indent, meta=meta, progress=progress)
+            os.replace(temp_path, filepath)
+            logger.info("数据成功保存到 %s", filepath)
+            return True
+        except Cancelled:
+            logger.info("已取消保存到 %s", filepath)
         except Exception as e:
-            print(f"保存失败: {e}")
+            logger.error("保存失败: %s", e)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
 
         # --- 新增加载功能 ---
 
-    def load_from_file(self, filepath: str):
+    def load_from_file(self, filepath: str, progress=None) -> bool:
         """
-        从 JSON 文件加载数据并重建组织模型。
+        从 JSON 文件流式加载数据并重建组织模型；二进制快照按文件头自动识别。
+        读取完成后才整体替换模型状态，失败或取消时模型保持不变。
         :param filepath: 文件路径
+        :param progress: 进度回调 progress(已完成, 总量)，JSON 文件按字节、快照按记录数计；抛出异常即中止加载
+        :return: 成功返回 True, 失败返回 False
         """
+        # 批量创建大量对象时暂停循环垃圾回收，否则分代回收会反复扫描新建的对象
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                all_data = json.load(f)
+            if snapshot.is_snapshot(filepath):
+                with snapshot.SnapshotReader(filepath) as reader:
+                    records = reader.iter_records()
+                    if progress is not None:
+                        records = _reporting(records, progress, lambda count: count,
+                                             reader.person_count + reader.department_count)
+                    self._load_records(records)
+            else:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    records = json_stream.iter_org_records(f)
+                    if progress is not None:
+                        # 以底层字节流的位置估计进度（文本层的预读至多几十 KB）
+                        records = _reporting(records, progress, lambda count: f.buffer.tell(),
+                                             os.fstat(f.fileno()).st_size)
+                    self._load_records(records)
         except FileNotFoundError:
-            print(f"错误: 文件 {filepath} 未找到。")
-            return
+            logger.error("文件 %s 未找到。", filepath)
+            return False
+        except Cancelled:
+            logger.info("已取消加载 %s", filepath)
+            return False
         except Exception as e:
-            print(f"加载失败: {e}")
-            return
-
-        # 1. 清空当前模型
-        self.root_department = Department("root", "同济大学")
-        self.personnel_roster = {}
-
-        # 2. 加载所有人员信息
-        for person_data in all_data['personnel']:
-            emp_id = person_data['employee_id']
-            print(f"1. 从JSON加载: ID='{emp_id}', 类型={type(emp_id)}")
-            self.add_person(
-                person_data['employee_id'],
-                person_data['name'],
-                person_data.get('age'),
-                person_data.get('gender'),
-                person_data.get('phone_number')
-            )
-
-        # 3. 递归重建部门树
-        if 'departments' in all_data:
-            self._build_departments_recursively(all_data['departments'], self.root_department)
-
-        # 4. 重新链接人员和部门的关系 (关键步骤)
-        for person_data in all_data['personnel']:
-            for assignment in person_data.get('assigment', []):
-                # 找到职位类别
-                dept = self.find_department(assignment['department_id'])
-                if not dept: continue
-                role_cat = "其他人员"  # 默认为其他
-                for cat, emp_ids in all_data['departments']['role_categories'].items():
-                    if person_data['employee_id'] in emp_ids:
-                        role_cat = cat
-                        break
-
-                self.assign_person_to_department(
-                    person_data['employee_id'],
-                    assignment['department_id'],
-                    role_cat,
-                    assignment['position']
-                )
-
-        print(f"数据从 {filepath} 加载成功。")
-
-    def _build_departments_recursively(self, data: dict, parent: Department):
-        """用于加载的辅助函数，递归创建部门。"""
-        for child_data in data['children']:
-            child_dept = self.add_department(child_data['name'], parent.department_id)
-            # 确保ID一致，以便后续链接
-            child_dept.department_id = child_data['department_id']
-
-            # 递归为子部门创建它们的子部门
-            self._build_departments_recursively(child_data, child_dept)
+            logger.error("加载失败: %s", e)
+            return False
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        logger.info("数据从 %s 加载成功。", filepath)
+        return True
+
+    def _load_records(self, records):
+        """
+        用逐条产生的记录一次性重建整个模型（记录格式见 json_stream.iter_org_records）。
+        借助 ID 映射直接建立部门树、花名册和任职关系，不经过逐条调用的公共修改方法，
+        整体复杂度为 O(人员数 + 部门数 + 任职数)。记录的先后顺序不影响结果。
+        :param records: ('person' | 'department' | 'meta', 数据) 的可迭代对象
+        """
+        roster: dict[str, Person] = {}
+        index: dict[str, Department] = {}
+        meta = {}
+        root = None
+        pending_assignments = []  # (Person, 文件中的任职列表)，待部门全部就绪后链接
+        pending_members = []      # (Department, roles, role_categories)，待人员全部就绪后链接
+
+        def department_for(dept_id):
+            """取得指定ID的部门；父部门的记录尚未读到时先建立占位对象。"""
+            dept = index.get(dept_id)
+            if dept is None:
+                dept = index[dept_id] = Department(dept_id, "")
+            return dept
+
+        # 1. 读入人员与部门，按ID建立映射
+        for kind, data in records:
+            if kind == 'person':
+                emp_id = data['employee_id']
+                if emp_id in roster:
+                    continue  # ID 重复时保留第一条，与 add_person 的行为一致
+                person = Person(emp_id, data['name'], data.get('age'),
+                                data.get('gender'), data.get('phone_number'), [])
+                roster[emp_id] = person
+                pending_assignments.append((person, data.get('assigment', [])))
+            elif kind == 'department':
+                dept = department_for(data['department_id'])
+                dept.name = data['name']
+                if data['parent_id'] is None:
+                    root = dept
+                else:
+                    # 兄弟部门的记录按原顺序到达，依次追加即可保持子部门顺序
+                    parent = department_for(data['parent_id'])
+                    dept.parent = parent
+                    parent.children.append(dept)
+                pending_members.append((dept, data.get('roles', {}), data.get('role_categories', {})))
+            elif kind == 'meta':
+                key, value = data
+                meta[key] = value
+
+        if root is None:
+            root = Department("root", "同济大学")
+            index[root.department_id] = root
+
+        # 2. 恢复每个部门自己的 roles 和 role_categories
+        # (部门ID, 员工ID) -> 该员工在该部门中按顺序出现的职位类别
+        member_categories: dict[tuple[str, str], list[str]] = {}
+        for dept, roles, role_categories in pending_members:
+            for category, emp_ids in role_categories.items():
+                if category not in dept.role_categories:
+                    continue
+                for emp_id in emp_ids:
+                    person = roster.get(emp_id)
+                    if person is not None:
+                        dept.add_member(category, person, update_ancestors=False)
+                        member_categories.setdefault((dept.department_id, emp_id), []).append(category)
+            for title, emp_id in roles.items():
+                person = roster.get(emp_id)
+                if person is not None:
+                    dept.set_role(title, person)
+
+        # 3. 按人员记录重新链接任职关系，职位类别取自任职记录，并与该部门自己的 role_categories 核对
+        position_index: dict[str, list[tuple[Department, str, str]]] = {}
+        for person, assignments in pending_assignments:
+            entries = position_index[person.employee_id] = []
+            for assignment in assignments:
+                dept = index.get(assignment['department_id'])
+                if dept is None:
+                    continue
+                title = intern_value(assignment['position'])
+                categories = member_categories.get((dept.department_id, person.employee_id))
+                category = assignment.get('role_category')
+                if categories and category in categories:
+                    # 文件中记录了该任职的类别（同一部门中的多条任职可能属于不同类别）
+                    if len(categories) > 1:
+                        categories.remove(category)
+                elif categories:
+                    # 较早的文件没有记录类别：同一部门中的多条任职按出现顺序依次对应
+                    category = categories.pop(0) if len(categories) > 1 else categories[0]
+                else:
+                    # 文件中部门一侧缺少该记录时，按“其他人员”补全，保证两侧一致
+                    category = "其他人员"
+                    dept.add_member(category, person, update_ancestors=False)
+                    if title not in dept.roles:
+                        dept.set_role(title, person)
+                person.assigment.append((dept, title))
+                entries.append((dept, category, title))
+
+        # 4. 一次后序遍历算出各部门的子树规模
+        root.recount_subtree()
+
+        # 5. 整体替换模型状态。原有对象此后不再被修改，冻结版本可以继续直接读取它们
+        with self._frozen_lock:
+            self._frozen = weakref.WeakSet()
+        self.root_department = root
+        self.personnel_roster = roster
+        self.department_index = index
+        self.department_names = DepartmentNameIndex.build(index.values())
+        self.position_index = position_index
+        self.person_index = PersonIndex.build(roster, position_index)
+        self.file_meta = meta
+        self._invalidate_tour()
+        self._lift = None
 
     def update_person_info(self, employee_id, new_data):
         """
@@ -287,10 +1052,22 @@ class OrgModel:
         if not person:
             return False
 
+        if self._frozen:
+            self._before_change(paths=[dept for dept, _, _ in self.position_index.get(employee_id, [])],
+                                people=(person,))
+        old_profile = member_profile(person)
+        old_name, old_age, old_gender, old_phone = person.name, person.age, person.gender, person.phone_number
         person.name = new_data.get("name", person.name)
-        person.age = new_data.get("age", person.age)
-        person.gender = new_data.get("gender", person.gender)
+        person.age = intern_value(new_data.get("age", person.age))
+        person.gender = intern_value(new_data.get("gender", person.gender))
         person.phone_number = new_data.get("phone_number", person.phone_number)
+        # 性别或年龄段变化时，更新其任职部门及各级上级部门的分布统计
+        new_profile = member_profile(person)
+        for dept, _, _ in self.position_index.get(employee_id, []):
+            dept.retally_member(old_profile, new_profile)
+        self.person_index.update(person, old_name, old_age, old_gender, old_phone)
+        self._record('update_person_info', employee_id=employee_id, new_data=dict(new_data))
+        self._emit('person_updated', person=person)
         return True
 
     def remove_person_assignment(self, employee_id, dept_name, position_title):
@@ -305,24 +1082,55 @@ class OrgModel:
         if not person:
             return False
 
-        # 从 Person 对象的 assigment 列表中移除
-        original_len = len(person.assigment)
-        person.assigment = [(d, p) for d, p in person.assigment if not (d.name == dept_name and p == position_title)]
-
-        if len(person.assigment) == original_len:
+        # 在该员工的任职索引中找出匹配的记录；同名部门中的该职位会一并卸任
+        matched = [e for e in self.position_index.get(employee_id, [])
+                   if e[0].name == dept_name and e[2] == position_title]
+        if not matched:
             return False  # 没有找到匹配的职位
+        self._remove_positions(person, matched)
+        self._record('remove_person_assignment', employee_id=employee_id, dept_name=dept_name,
+                     position_title=position_title)
+        self._emit_unassigned(person, matched)
+        return True
+
+    def remove_assignment(self, employee_id: str, department_id: str, position_title: str) -> bool:
+        """
+        按部门ID移除一个员工的特定职位。与 remove_person_assignment 不同，同名的其他部门不受影响。
+        :param employee_id: 员工ID
+        :param department_id: 职位所在的部门ID
+        :param position_title: 职位名称
+        :return: 成功返回 True, 失败返回 False
+        """
+        person = self.get_person(employee_id)
+        if not person:
+            return False
+        matched = [e for e in self.position_index.get(employee_id, [])
+                   if e[0].department_id == department_id and e[2] == position_title]
+        if not matched:
+            return False
+        self._remove_positions(person, matched)
+        self._record('remove_assignment', employee_id=employee_id, department_id=department_id,
+                     position_title=position_title)
+        self._emit_unassigned(person, matched)
+        return True
 
+    def _remove_positions(self, person, matched: list):
+        """撤销该员工的若干条任职记录 [(部门, 职位类别, 职位名称)]。"""
+        employee_id = person.employee_id
+        entries = self.position_index.get(employee_id, [])
+        if self._frozen:
+            self._before_change(paths=[dept for dept, _, _ in matched], people=(person,))
         # 从 Department 对象的 roles 和 role_categories 中移除
-        all_departments = [self.root_department] + self.root_department.get_all_children()
-        for dept in all_departments:
-            if dept.name == dept_name:
-                # 从 roles 字典移除
-                if dept.roles.get(position_title) == person:
-                    del dept.roles[position_title]
-                # 从 role_categories 列表移除
-                for category in dept.role_categories.values():
-                    if person in category:
-                        category.remove(person)
-                        break
-                break
-        return True
\ No newline at end of file
+        for dept, category, title in matched:
+            self._detach_position(person, dept, category, title)
+        self.position_index[employee_id] = [e for e in entries if e not in matched]
+        self.person_index.move_posts(employee_id, len(entries), len(entries) - len(matched))
+
+        # 从 Person 对象的 assigment 列表中移除
+        removed = {(id(dept), title) for dept, _, title in matched}
+        person.assigment = [(d, p) for d, p in person.assigment if (id(d), p) not in removed]
+
+    def _emit_unassigned(self, person, matched: list):
+        for dept, category, title in matched:
+            self._emit('person_unassigned', person=person, department=dept,
+                       role_category=category, position_title=title)
@@ -0,0 +1,208 @@
+'''数据模型接口'''
+# OrgModelBase.py
+#
+# OrgModel（内存）与 SqliteOrgModel（数据库）共同实现的接口。Controller、MainApplication、
+# 批量导入与基准测试只依赖这里列出的方法，因此两种模型可以互相替换。
+# 只有内存模型才有的功能（组合查询 select/explain、冻结 freeze 以及各个内存索引）在这里给出
+# 默认实现，调用时抛出 UnsupportedOperation，而不是让属性缺失、由调用方用 hasattr 猜测。
+
+from abc import ABC, abstractmethod
+
+from Department import Department
+from Person import Person
+
+
+class UnsupportedOperation(RuntimeError):
+    """当前数据模型不支持该操作（不是未完成的实现，因此不派生自 NotImplementedError）。"""
+
+
+class _Unsupported:
+    """
+    只有内存模型才有的属性（如 position_index）。OrgModel 在构造时把同名的实例属性写入对象，
+    实例属性优先于本描述符；其他模型读取时抛出 UnsupportedOperation。
+    """
+
+    def __set_name__(self, owner, name):
+        self._name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        raise UnsupportedOperation(f"{type(instance).__name__} 不支持 {self._name}")
+
+
+class OrgModelBase(ABC):
+    """
+    数据模型的公共接口。除下列方法外，实现还须提供以下属性：
+    root_department（根部门）、personnel_roster（employee_id -> Person 的映射）、
+    file_meta（最近一次加载的文件附带的信息）与 journal（操作日志，可为 None）。
+    """
+
+    root_department: Department | None
+    personnel_roster: dict[str, Person]
+    file_meta: dict
+    journal: object
+
+    # ---------- 只有内存模型才支持的功能 ----------
+
+    department_index = _Unsupported()
+    position_index = _Unsupported()
+    person_index = _Unsupported()
+    department_names = _Unsupported()
+
+    def select(self, q, limit: int = None) -> list:
+        """按组合条件查找人员（见 query.py）。"""
+        raise UnsupportedOperation(f"{type(self).__name__} 不支持组合查询 select")
+
+    def explain(self, q) -> str:
+        """说明 select 将如何执行该查询。"""
+        raise UnsupportedOperation(f"{type(self).__name__} 不支持组合查询 explain")
+
+    def freeze(self):
+        """取得当前组织的只读冻结版本。"""
+        raise UnsupportedOperation(f"{type(self).__name__} 不支持冻结 freeze")
+
+    # ---------- 后台加载 ----------
+
+    def staging_model(self):
+        """
+        用于在后台线程中加载文件的新的空模型，加载完成后交给 replaced_by。
+        默认与本模型同类；不能在其他线程中使用的模型应返回内存模型。
+        """
+        return type(self)()
+
+    def replaced_by(self, loaded):
+        """
+        在界面线程中用 staging_model 加载好的模型取代本模型的数据。
+        :return: 此后应使用的模型对象，默认即为 loaded
+        """
+        return loaded
+
+    # ---------- 变更通知 ----------
+
+    @abstractmethod
+    def subscribe(self, listener):
+        """登记变更监听器，listener(event, **data) 在每次成功的修改后被调用。"""
+
+    @abstractmethod
+    def unsubscribe(self, listener):
+        """取消登记变更监听器。"""
+
+    # ---------- 查询 ----------
+
+    @abstractmethod
+    def get_person(self, employee_id: str) -> Person | None:
+        """按员工ID查找人员。"""
+
+    @abstractmethod
+    def get_all_people(self) -> list:
+        """全部人员，按加入的先后排列。"""
+
+    @abstractmethod
+    def find_person_by_name(self, name: str) -> list:
+        """姓名恰为 name 的人员。"""
+
+    @abstractmethod
+    def search_people(self, text: str, limit: int = None) -> list:
+        """姓名中含有 text 的人员。"""
+
+    @abstractmethod
+    def assignment_categories(self, person) -> list:
+        """与 person.assigment 一一对应的职位类别，保存文件时写入每条任职。"""
+
+    @abstractmethod
+    def find_department(self, department_id: str, start_node=None) -> Department | None:
+        """按部门ID查找部门。"""
+
+    @abstractmethod
+    def find_departments_by_name(self, name: str) -> list:
+        """名称恰为 name 的部门。"""
+
+    @abstractmethod
+    def departments_with_prefix(self, prefix: str, limit: int = None) -> list:
+        """名称以 prefix 开头的部门，按名称的字符顺序排列。"""
+
+    @abstractmethod
+    def department_stats(self, department_id: str) -> dict | None:
+        """部门（含全部子部门）的人数、空缺、性别与年龄统计。"""
+
+    @abstractmethod
+    def supervisor_chain(self, employee_id: str, department_id: str = None) -> list:
+        """该员工所在部门向上直到根部门的各级负责人。"""
+
+    @abstractmethod
+    def people_in_subtree(self, department_id: str) -> list:
+        """部门及其全部子部门中任职的人员。"""
+
+    @abstractmethod
+    def is_ancestor(self, ancestor_id: str, department_id: str) -> bool:
+        """ancestor_id 是否为 department_id 本身或其祖先部门。"""
+
+    @abstractmethod
+    def department_depth(self, department_id: str) -> int | None:
+        """部门的深度，根部门为 0。"""
+
+    @abstractmethod
+    def kth_ancestor(self, department_id: str, k: int) -> Department | None:
+        """部门向上第 k 级的祖先部门。"""
+
+    @abstractmethod
+    def lowest_common_ancestor(self, dept_id_a: str, dept_id_b: str) -> Department | None:
+        """两个部门的最近公共祖先部门。"""
+
+    # ---------- 修改 ----------
+
+    @abstractmethod
+    def add_person(self, employee_id, name, age, gender, phone_number):
+        """添加人员。"""
+
+    @abstractmethod
+    def update_person_info(self, employee_id, new_data):
+        """修改人员信息。"""
+
+    @abstractmethod
+    def delete_person(self, employee_id: str) -> bool:
+        """删除人员及其全部任职。"""
+
+    @abstractmethod
+    def add_department(self, name: str, parent_dept_id: str, department_id: str = None) -> Department | None:
+        """在 parent_dept_id 下添加部门。"""
+
+    @abstractmethod
+    def rename_department(self, department_id: str, new_name: str) -> bool:
+        """修改部门名称。"""
+
+    @abstractmethod
+    def move_department(self, department_id: str, new_parent_id: str) -> bool:
+        """把部门连同子部门移到 new_parent_id 之下。"""
+
+    @abstractmethod
+    def delete_department(self, department_id: str) -> bool:
+        """删除部门及其全部子部门。"""
+
+    @abstractmethod
+    def assign_person_to_department(self, employee_id: str, dept_id: str, role_category: str,
+                                    position_title: str) -> bool:
+        """任命人员到部门的职位。"""
+
+    @abstractmethod
+    def remove_assignment(self, employee_id: str, department_id: str, position_title: str) -> bool:
+        """按部门ID卸任职位。"""
+
+    @abstractmethod
+    def remove_person_assignment(self, employee_id, dept_name, position_title):
+        """按部门名称卸任职位。"""
+
+    @abstractmethod
+    def bulk_import(self, rows) -> dict:
+        """批量导入人员与任职（见 bulk_import.py）。"""
+
+    # ---------- 文件 ----------
+
+    @abstractmethod
+    def save_to_file(self, filepath: str, indent=None, meta=None, progress=None) -> bool:
+        """保存到文件。"""
+
+    @abstractmethod
+    def load_from_file(self, filepath: str, progress=None) -> bool:
+        """从文件加载，替换当前数据。"""
@@ -1,8 +1,16 @@
 #该文件对Person类进行了定义，包括构造函数、属性和方法。
-from operator import ifloordiv
+import sys
+
+
+def intern_value(value):
+    """驻留字符串值（性别、年龄、职位名称等大量重复的取值），使所有对象共享同一份；其他值原样返回。"""
+    return sys.intern(value) if isinstance(value, str) else value
 
 
 class Person:
+    # 使用 __slots__ 代替实例 __dict__，减少每个人员对象的内存占用
+    __slots__ = ('employee_id', 'name', 'age', 'gender', 'phone_number', 'assigment', '__weakref__')
+
     def __init__(self,employee_id, name, age, gender,phone_number,assigment): #构造函数，用于初始化Person对象的属性
         '''
         :param employee_id: 员工id
@@ -14,8 +22,8 @@ class Person:
         '''
         self.employee_id:str = employee_id
         self.name = name
-        self.age = age
-        self.gender = gender
+        self.age = intern_value(age)
+        self.gender = intern_value(gender)
         self.phone_number = phone_number
         self.assigment = assigment if assigment else [] #如果assigment为空，则初始化为空列表
 
@@ -24,18 +32,25 @@ class Person:
         :param department_object: 部门对象
         :param position_title: 职位名称
         '''
-        self.assigment.append((department_object, position_title))
+        self.assigment.append((department_object, intern_value(position_title)))
     def get_info(self): #获取个人信息的方法
         #返回json格式的个人信息
         return {"employee_id":self.employee_id,"name":self.name,"age":self.age,"gender":self.gender,"phone_number":self.phone_number,"assigment":self.assigment}
 
-    def to_dict(self):
-        """将 Person 对象转换为可序列化为 JSON 的字典。"""
+    def to_dict(self, categories=None):
+        """
+        将 Person 对象转换为可序列化为 JSON 的字典。
+        :param categories: 与 assigment 一一对应的职位类别（由模型的 assignment_categories 得出），
+                           给出时写入每条任职，加载时据此恢复同一部门中多条任职各自的类别
+        """
         # 关键点：不能直接存储 department 对象，而是存储其 ID，以便后续重构关系。
         assignments_serializable = [
             {'department_id': dept.department_id, 'position': pos}
             for dept, pos in self.assigment
         ]
+        if categories is not None:
+            for entry, category in zip(assignments_serializable, categories):
+                entry['role_category'] = category
         return {
             "employee_id": self.employee_id,
             "name": self.name,
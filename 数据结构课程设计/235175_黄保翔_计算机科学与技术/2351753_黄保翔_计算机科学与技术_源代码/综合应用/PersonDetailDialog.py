@@ -67,11 +67,13 @@ class PersonDetailDialog(tk.Toplevel):
         assignment_frame = ttk.LabelFrame(main_frame, text="职位信息", padding="10")
         assignment_frame.pack(fill="both", expand=True, pady=(10, 0))
 
-        cols = ('department', 'position')
+        cols = ('department', 'department_id', 'position')
         self.assignment_tree = ttk.Treeview(assignment_frame, columns=cols, show='headings', height=5)
         self.assignment_tree.heading('department', text='所在部门')
+        self.assignment_tree.heading('department_id', text='部门ID')
         self.assignment_tree.heading('position', text='担任职位')
         self.assignment_tree.column('department', width=150)
+        self.assignment_tree.column('department_id', width=150)
         self.assignment_tree.column('position', width=150)
         self.assignment_tree.pack(side="left", fill="both", expand=True)
 
@@ -111,8 +113,11 @@ class PersonDetailDialog(tk.Toplevel):
         for i in self.assignment_tree.get_children():
             self.assignment_tree.delete(i)
 
-        for dept_name, position in self.person_info.get('assigment', []):
-            self.assignment_tree.insert("", "end", values=(dept_name, position))
+        # 每行的 iid 为其在任职列表中的序号，卸任时据此取得部门ID，而不是按部门名称匹配
+        dept_ids = self.person_info.get('department_ids', [])
+        for i, (dept_name, position) in enumerate(self.person_info.get('assigment', [])):
+            dept_id = dept_ids[i] if i < len(dept_ids) else ''
+            self.assignment_tree.insert("", "end", iid=str(i), values=(dept_name, dept_id, position))
 
     def _update_person_info(self):
         """收集输入框数据并调用控制器进行更新。"""
@@ -132,8 +137,10 @@ class PersonDetailDialog(tk.Toplevel):
             messagebox.showwarning("未选择", "请先在列表中选择一个要卸任的职位。", parent=self)
             return
 
-        selected_item = self.assignment_tree.item(selection[0])
-        dept_name, position_title = selected_item['values']
+        # 直接从任职列表中取值：Treeview 会把 "007" 这样的职位名称转换为数字
+        index = int(selection[0])
+        dept_name, position_title = self.person_info['assigment'][index]
+        dept_id = self.person_info['department_ids'][index]
 
         is_confirmed = messagebox.askyesno(
             "确认卸任",
@@ -144,7 +151,7 @@ class PersonDetailDialog(tk.Toplevel):
         if not is_confirmed:
             return
 
-        success = self.controller.remove_person_assignment(self.employee_id, dept_name, str(position_title))
+        success = self.controller.remove_person_assignment(self.employee_id, dept_id, position_title)
 
         if success:
             messagebox.showinfo("成功", "职位已成功卸任。", parent=self)
@@ -0,0 +1,803 @@
+'''基于 SQLite 的数据模型'''
+# SqliteOrgModel.py
+#
+# 与 OrgModel 实现相同的接口（OrgModelBase），可直接替换给 Controller 和 MainApplication 使用。
+# 部门、人员、任职与职务分别存放在带索引的表中，Department 和 Person 对象只在被访问时
+# 才从数据库中取出：子部门列表、部门内人员以及个人任职都在第一次读取时查询。
+# 任职表同时记录个人任职顺序 (seq) 与部门成员顺序 (member_seq)，职务表对应 Department.roles，
+# 因此导入后再导出的数据与内存模型完全一致。
+
+import logging
+import sqlite3
+import uuid
+from collections.abc import Mapping
+
+from Department import Department, ROLE_CATEGORIES, StaffSet, member_profile
+from Person import Person
+from OrgModel import OrgModel
+from OrgModelBase import OrgModelBase
+import bulk_import
+
+logger = logging.getLogger('org.sqlite')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS departments (
+    department_id TEXT PRIMARY KEY,
+    name          TEXT NOT NULL,
+    parent_id     TEXT,
+    seq           INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_departments_parent ON departments(parent_id, seq);
+CREATE INDEX IF NOT EXISTS idx_departments_name ON departments(name, seq);
+CREATE TABLE IF NOT EXISTS people (
+    seq           INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id   TEXT NOT NULL UNIQUE,
+    name,
+    age,
+    gender,
+    phone_number
+);
+CREATE INDEX IF NOT EXISTS idx_people_name ON people(name);
+CREATE TABLE IF NOT EXISTS assignments (
+    seq           INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id   TEXT NOT NULL,
+    department_id TEXT NOT NULL,
+    category      TEXT NOT NULL,
+    title,
+    member_seq    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_assignments_person ON assignments(employee_id);
+CREATE INDEX IF NOT EXISTS idx_assignments_department ON assignments(department_id, member_seq);
+CREATE TABLE IF NOT EXISTS roles (
+    seq           INTEGER PRIMARY KEY AUTOINCREMENT,
+    department_id TEXT NOT NULL,
+    title,
+    employee_id   TEXT NOT NULL,
+    UNIQUE (department_id, title)
+);
+CREATE INDEX IF NOT EXISTS idx_roles_person ON roles(employee_id);
+"""
+
+# 取得某部门及其全部子部门ID的递归查询
+_SUBTREE = """
+WITH RECURSIVE subtree(department_id) AS (
+    SELECT ?
+    UNION ALL
+    SELECT d.department_id FROM departments d JOIN subtree s ON d.parent_id = s.department_id
+)
+"""
+
+_NOT_LOADED = object()
+
+
+class _LazyDepartment(Department):
+    """子部门、roles 和 role_categories 在第一次访问时才从数据库读取的部门对象。"""
+
+    def __init__(self, store, department_id, name, parent=None):
+        self._store = store
+        self._children = _NOT_LOADED
+        super().__init__(department_id, name, parent)
+        # 基类构造函数会写入空容器，这里恢复为“未加载”
+        self.unload()
+
+    def unload(self, children=True):
+        """丢弃已缓存的成员信息（以及子部门列表），下次访问时重新查询。"""
+        self._roles = _NOT_LOADED
+        self._role_categories = _NOT_LOADED
+        if children:
+            self._children = _NOT_LOADED
+
+    @property
+    def children(self):
+        if self._children is _NOT_LOADED:
+            self._children = self._store._load_children(self)
+        return self._children
+
+    @children.setter
+    def children(self, value):
+        self._children = value
+
+    def children_loaded(self) -> bool:
+        return self._children is not _NOT_LOADED
+
+    @property
+    def subtree_size(self) -> int:
+        return self._store._subtree_counts(self.department_id)[0]
+
+    @property
+    def headcount(self) -> int:
+        return self._store._subtree_counts(self.department_id)[1]
+
+    @property
+    def vacancies(self) -> int:
+        return self._store._subtree_stats(self.department_id)['vacancies']
+
+    def subtree_stats(self) -> dict:
+        return self._store._subtree_stats(self.department_id)
+
+    def _ensure_members(self):
+        if self._roles is _NOT_LOADED or self._role_categories is _NOT_LOADED:
+            self._role_categories, self._roles = self._store._load_members(self)
+
+    @property
+    def roles(self):
+        self._ensure_members()
+        return Department.roles.fget(self)
+
+    @property
+    def role_categories(self):
+        self._ensure_members()
+        return Department.role_categories.fget(self)
+
+    def add_member(self, category, person):
+        self._ensure_members()
+        super().add_member(category, person)
+
+    def remove_member(self, category, person) -> bool:
+        self._ensure_members()
+        return super().remove_member(category, person)
+
+    def set_role(self, title, person):
+        self._ensure_members()
+        super().set_role(title, person)
+
+    def remove_role(self, title):
+        self._ensure_members()
+        super().remove_role(title)
+
+
+class _LazyPerson(Person):
+    """任职列表在第一次访问时才从数据库读取的人员对象。"""
+
+    def __init__(self, store, employee_id, name, age, gender, phone_number):
+        self._store = store
+        self._assigment = _NOT_LOADED
+        super().__init__(employee_id, name, age, gender, phone_number, [])
+        self._assigment = _NOT_LOADED
+
+    def unload(self):
+        self._assigment = _NOT_LOADED
+
+    @property
+    def assigment(self):
+        if self._assigment is _NOT_LOADED:
+            self._assigment = self._store._load_assignments(self)
+        return self._assigment
+
+    @assigment.setter
+    def assigment(self, value):
+        self._assigment = value
+
+
+class _Roster(Mapping):
+    """以 employee_id 为键的只读花名册视图，按需从数据库取出 Person 对象。"""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, employee_id):
+        person = self._store.get_person(employee_id)
+        if person is None:
+            raise KeyError(employee_id)
+        return person
+
+    def __contains__(self, employee_id):
+        return self._store._conn.execute(
+            "SELECT 1 FROM people WHERE employee_id = ?", (employee_id,)).fetchone() is not None
+
+    def __iter__(self):
+        for (employee_id,) in self._store._conn.execute("SELECT employee_id FROM people ORDER BY seq"):
+            yield employee_id
+
+    def __len__(self):
+        return self._store._conn.execute("SELECT COUNT(*) FROM people").fetchone()[0]
+
+    def values(self):
+        # 一次查询取出所有行，避免逐个 ID 查询
+        rows = self._store._conn.execute(
+            "SELECT employee_id, name, age, gender, phone_number FROM people ORDER BY seq").fetchall()
+        return [self._store._person_from_row(row) for row in rows]
+
+
+class SqliteOrgModel(OrgModelBase):
+    """
+    以 SQLite 数据库为存储的模型，实现与 OrgModel 相同的接口（见 OrgModelBase.py）。
+    select、explain、freeze 与内存索引（position_index 等）不受支持，调用时抛出 UnsupportedOperation。
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        """
+        打开（或新建）数据库。
+        :param db_path: 数据库文件路径，默认为内存数据库
+        """
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.executescript(_SCHEMA)
+        # 已取出的对象，保证同一ID始终对应同一个对象
+        self._departments: dict[str, _LazyDepartment] = {}
+        self._people: dict[str, _LazyPerson] = {}
+        self.personnel_roster = _Roster(self)
+        self.file_meta: dict = {}
+        self.journal = None
+        self._listeners: list = []
+        if self._conn.execute("SELECT 1 FROM departments WHERE parent_id IS NULL").fetchone() is None:
+            with self._conn:
+                self._conn.execute("INSERT INTO departments VALUES ('root', '同济大学', NULL, 0)")
+
+    _record = OrgModel._record
+    subscribe = OrgModel.subscribe
+    unsubscribe = OrgModel.unsubscribe
+    _emit = OrgModel._emit
+
+    def close(self):
+        self._conn.close()
+
+    # ---------- 按需加载 ----------
+
+    def _department_from_row(self, department_id, name, parent) -> _LazyDepartment:
+        dept = self._departments.get(department_id)
+        if dept is None:
+            dept = self._departments[department_id] = _LazyDepartment(self, department_id, name, parent)
+        return dept
+
+    def _person_from_row(self, row) -> _LazyPerson:
+        person = self._people.get(row[0])
+        if person is None:
+            person = self._people[row[0]] = _LazyPerson(self, *row)
+        return person
+
+    def _load_children(self, dept: _LazyDepartment) -> list:
+        rows = self._conn.execute(
+            "SELECT department_id, name FROM departments WHERE parent_id = ? ORDER BY seq",
+            (dept.department_id,)).fetchall()
+        return [self._department_from_row(dept_id, name, dept) for dept_id, name in rows]
+
+    def _load_members(self, dept: _LazyDepartment):
+        role_categories = {category: StaffSet() for category in ROLE_CATEGORIES}
+        roles = {}
+        rows = self._conn.execute(
+            "SELECT p.employee_id, p.name, p.age, p.gender, p.phone_number, a.category "
+            "FROM assignments a JOIN people p ON p.employee_id = a.employee_id "
+            "WHERE a.department_id = ? ORDER BY a.member_seq", (dept.department_id,)).fetchall()
+        for row in rows:
+            if row[5] in role_categories:
+                role_categories[row[5]].add(self._person_from_row(row[:5]))
+        rows = self._conn.execute(
+            "SELECT p.employee_id, p.name, p.age, p.gender, p.phone_number, r.title "
+            "FROM roles r JOIN people p ON p.employee_id = r.employee_id "
+            "WHERE r.department_id = ? ORDER BY r.seq", (dept.department_id,)).fetchall()
+        for row in rows:
+            roles[row[5]] = self._person_from_row(row[:5])
+        return role_categories, roles
+
+    def _load_assignments(self, person: _LazyPerson) -> list:
+        rows = self._conn.execute(
+            "SELECT department_id, title FROM assignments WHERE employee_id = ? ORDER BY seq",
+            (person.employee_id,)).fetchall()
+        assignments = []
+        for dept_id, title in rows:
+            dept = self.find_department(dept_id)
+            if dept is not None:
+                assignments.append((dept, title))
+        return assignments
+
+    def assignment_categories(self, person) -> list:
+        rows = self._conn.execute(
+            "SELECT a.category FROM assignments a JOIN departments d ON d.department_id = a.department_id "
+            "WHERE a.employee_id = ? ORDER BY a.seq", (person.employee_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def _subtree_counts(self, department_id: str) -> tuple[int, int]:
+        """子树中的部门数与任职人数（由数据库统计，不必取出子树）。"""
+        return self._conn.execute(
+            _SUBTREE + "SELECT (SELECT COUNT(*) FROM subtree), (SELECT COUNT(*) FROM assignments "
+                       "WHERE department_id IN (SELECT department_id FROM subtree))", (department_id,)).fetchone()
+
+    def _subtree_stats(self, department_id: str) -> dict:
+        """与 Department.subtree_stats 相同的统计，由数据库在子树上聚合得出。"""
+        departments, headcount = self._subtree_counts(department_id)
+        vacancies = self._conn.execute(
+            _SUBTREE + "SELECT COUNT(*) FROM subtree s WHERE NOT EXISTS ("
+                       "SELECT 1 FROM assignments a WHERE a.department_id = s.department_id AND a.category = '主管')",
+            (department_id,)).fetchone()[0]
+        stats = {'departments': departments, 'headcount': headcount, 'vacancies': vacancies, 'gender': {}, 'age': {}}
+        rows = self._conn.execute(
+            _SUBTREE + "SELECT p.gender, p.age, COUNT(*) FROM assignments a "
+                       "JOIN people p ON p.employee_id = a.employee_id "
+                       "WHERE a.department_id IN (SELECT department_id FROM subtree) GROUP BY p.gender, p.age",
+            (department_id,))
+        for gender, age, count in rows:
+            for kind, value in member_profile(Person(None, None, age, gender, None, [])):
+                stats[kind][value] = stats[kind].get(value, 0) + count
+        return stats
+
+    def _unload_people(self, employee_ids):
+        for employee_id in employee_ids:
+            person = self._people.get(employee_id)
+            if person is not None:
+                person.unload()
+
+    def _unload_departments(self, department_ids):
+        for department_id in department_ids:
+            dept = self._departments.get(department_id)
+            if dept is not None:
+                dept.unload(children=False)
+
+    # ---------- 与 OrgModel 相同的公共接口 ----------
+
+    @property
+    def root_department(self) -> Department | None:
+        row = self._conn.execute("SELECT department_id FROM departments WHERE parent_id IS NULL").fetchone()
+        return self.find_department(row[0]) if row else None
+
+    def get_person(self, employee_id: str) -> Person | None:
+        person = self._people.get(employee_id)
+        if person is not None:
+            return person
+        row = self._conn.execute(
+            "SELECT employee_id, name, age, gender, phone_number FROM people WHERE employee_id = ?",
+            (employee_id,)).fetchone()
+        return self._person_from_row(row) if row else None
+
+    def find_department(self, department_id: str, start_node=None) -> Department | None:
+        """按ID取出部门；其祖先链也会一并取出，以便设置 parent。"""
+        dept = self._departments.get(department_id)
+        if dept is None:
+            row = self._conn.execute(
+                "SELECT name, parent_id FROM departments WHERE department_id = ?", (department_id,)).fetchone()
+            if row is None:
+                return None
+            parent = self.find_department(row[1]) if row[1] is not None else None
+            dept = self._department_from_row(department_id, row[0], parent)
+        if start_node is None:
+            return dept
+        node = dept
+        while node is not None:
+            if node is start_node:
+                return dept
+            node = node.parent
+        return None
+
+    def find_departments_by_name(self, name: str) -> list:
+        rows = self._conn.execute(
+            "SELECT department_id FROM departments WHERE name = ? ORDER BY seq", (name,)).fetchall()
+        return [self.find_department(row[0]) for row in rows]
+
+    def departments_with_prefix(self, prefix: str, limit: int = None) -> list:
+        # 以 prefix 开头的名称位于 [prefix, prefix 末字加一) 之间，可以在 name 索引上做范围查找
+        if limit is not None and limit <= 0:
+            return []
+        if prefix and ord(prefix[-1]) < 0x10FFFF:
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            rows = self._conn.execute(
+                "SELECT department_id FROM departments WHERE name >= ? AND name < ? ORDER BY name, seq LIMIT ?",
+                (prefix, upper, -1 if limit is None else limit)).fetchall()
+        else:
+            rows = self._conn.execute(
+                "SELECT department_id FROM departments WHERE substr(name, 1, ?) = ? ORDER BY name, seq LIMIT ?",
+                (len(prefix), prefix, -1 if limit is None else limit)).fetchall()
+        return [self.find_department(row[0]) for row in rows]
+
+    def is_ancestor(self, ancestor_id: str, department_id: str) -> bool:
+        """沿 parent_id 向上查找（数据库中没有区间编号，复杂度为 O(深度)）。"""
+        row = self._conn.execute(
+            "WITH RECURSIVE ancestors(department_id, parent_id) AS ("
+            "    SELECT department_id, parent_id FROM departments WHERE department_id = ?"
+            "    UNION ALL"
+            "    SELECT d.department_id, d.parent_id FROM departments d JOIN ancestors a ON d.department_id = a.parent_id"
+            ") SELECT 1 FROM ancestors WHERE department_id = ?", (department_id, ancestor_id)).fetchone()
+        return row is not None
+
+    def _ancestors(self, department_id: str) -> list:
+        """部门自身及其全部祖先，由近及远（取出部门时其祖先链已一并取出）。"""
+        chain = []
+        dept = self.find_department(department_id)
+        while dept is not None:
+            chain.append(dept)
+            dept = dept.parent
+        return chain
+
+    def department_depth(self, department_id: str) -> int | None:
+        chain = self._ancestors(department_id)
+        return len(chain) - 1 if chain else None
+
+    def kth_ancestor(self, department_id: str, k: int) -> Department | None:
+        chain = self._ancestors(department_id)
+        return chain[k] if 0 <= k < len(chain) else None
+
+    def lowest_common_ancestor(self, dept_id_a: str, dept_id_b: str) -> Department | None:
+        chain_a, chain_b = self._ancestors(dept_id_a), self._ancestors(dept_id_b)
+        common = None
+        for a, b in zip(reversed(chain_a), reversed(chain_b)):
+            if a is not b:
+                break
+            common = a
+        return common
+
+    supervisor_chain = OrgModel.supervisor_chain
+
+    department_stats = OrgModel.department_stats
+
+    def people_in_subtree(self, department_id: str) -> list:
+        rows = self._conn.execute(
+            _SUBTREE + "SELECT DISTINCT p.employee_id, p.name, p.age, p.gender, p.phone_number "
+                       "FROM assignments a JOIN people p ON p.employee_id = a.employee_id "
+                       "WHERE a.department_id IN (SELECT department_id FROM subtree) ORDER BY p.seq",
+            (department_id,)).fetchall()
+        return [self._person_from_row(row) for row in rows]
+
+    def add_person(self, employee_id, name, age, gender, phone_number):
+        if employee_id in self.personnel_roster:
+            logger.warning("员工ID '%s' 已存在。", employee_id)
+            return None
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO people (employee_id, name, age, gender, phone_number) VALUES (?, ?, ?, ?, ?)",
+                (employee_id, name, age, gender, phone_number))
+        self._record('add_person', employee_id=employee_id, name=name, age=age, gender=gender,
+                     phone_number=phone_number)
+        return self.get_person(employee_id)
+
+    def delete_person(self, employee_id: str) -> bool:
+        if employee_id not in self.personnel_roster:
+            logger.warning("员工ID '%s' 不存在。", employee_id)
+            return False
+        positions = self._conn.execute(
+            "SELECT department_id, category, title FROM assignments WHERE employee_id = ? ORDER BY seq",
+            (employee_id,)).fetchall()
+        dept_ids = {dept_id for dept_id, _, _ in positions}
+        with self._conn:
+            self._conn.execute("DELETE FROM assignments WHERE employee_id = ?", (employee_id,))
+            self._conn.execute("DELETE FROM roles WHERE employee_id = ?", (employee_id,))
+            self._conn.execute("DELETE FROM people WHERE employee_id = ?", (employee_id,))
+        self._unload_departments(dept_ids)
+        person = self._people.pop(employee_id, None)
+        if person is not None:
+            person.assigment = []
+        self._record('delete_person', employee_id=employee_id)
+        for dept_id, category, title in positions:
+            dept = self.find_department(dept_id)
+            if person is not None and dept is not None:
+                self._emit('person_unassigned', person=person, department=dept,
+                           role_category=category, position_title=title)
+        self._emit('person_removed', employee_id=employee_id)
+        return True
+
+    def add_department(self, name: str, parent_dept_id: str, department_id: str = None) -> Department | None:
+        parent_dept = self.find_department(parent_dept_id)
+        if parent_dept is None:
+            logger.warning("未找到ID为 '%s' 的父部门。", parent_dept_id)
+            return None
+        if department_id is not None and self.find_department(department_id) is not None:
+            logger.warning("部门ID '%s' 已存在。", department_id)
+            return None
+        new_dept_id = department_id if department_id is not None else str(uuid.uuid4())
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO departments VALUES (?, ?, ?, "
+                "(SELECT COALESCE(MAX(seq), -1) + 1 FROM departments WHERE parent_id = ?))",
+                (new_dept_id, name, parent_dept_id, parent_dept_id))
+        new_department = self._department_from_row(new_dept_id, name, parent_dept)
+        if parent_dept.children_loaded():
+            parent_dept.children.append(new_department)
+        self._record('add_department', name=name, parent_dept_id=parent_dept_id, department_id=new_dept_id)
+        self._emit('department_added', department=new_department)
+        return new_department
+
+    def rename_department(self, department_id: str, new_name: str) -> bool:
+        department = self.find_department(department_id)
+        if department is None:
+            logger.warning("未找到ID为 '%s' 的部门。", department_id)
+            return False
+        with self._conn:
+            self._conn.execute("UPDATE departments SET name = ? WHERE department_id = ?", (new_name, department_id))
+        department.name = new_name
+        self._record('rename_department', department_id=department_id, new_name=new_name)
+        self._emit('department_renamed', department=department)
+        return True
+
+    def move_department(self, department_id: str, new_parent_id: str) -> bool:
+        department = self.find_department(department_id)
+        new_parent = self.find_department(new_parent_id)
+        if department is None or new_parent is None:
+            logger.warning("部门或目标父部门不存在。")
+            return False
+        if department.parent is None:
+            logger.warning("不能移动根部门。")
+            return False
+        if self.find_department(new_parent_id, start_node=department) is not None:
+            logger.warning("不能将部门 '%s' 移动到其自身或子部门之下。", department.name)
+            return False
+        old_parent = department.parent
+        if old_parent is new_parent:
+            return True
+        with self._conn:
+            self._conn.execute(
+                "UPDATE departments SET parent_id = ?, "
+                "seq = (SELECT COALESCE(MAX(seq), -1) + 1 FROM departments WHERE parent_id = ?) "
+                "WHERE department_id = ?", (new_parent_id, new_parent_id, department_id))
+        if old_parent.children_loaded():
+            old_parent.children.remove(department)
+        if new_parent.children_loaded():
+            new_parent.children.append(department)
+        department.parent = new_parent
+        self._record('move_department', department_id=department_id, new_parent_id=new_parent_id)
+        self._emit('department_moved', department=department, old_parent=old_parent)
+        return True
+
+    def delete_department(self, department_id: str) -> bool:
+        dept = self.find_department(department_id)
+        if dept is None:
+            logger.warning("未找到ID为 '%s' 的部门。", department_id)
+            return False
+        removed = [row[0] for row in self._conn.execute(_SUBTREE + "SELECT department_id FROM subtree",
+                                                         (department_id,))]
+        affected = [row[0] for row in self._conn.execute(
+            _SUBTREE + "SELECT DISTINCT employee_id FROM assignments "
+                       "WHERE department_id IN (SELECT department_id FROM subtree)", (department_id,))]
+        with self._conn:
+            for table in ('assignments', 'roles'):
+                self._conn.execute(_SUBTREE + f"DELETE FROM {table} "
+                                   "WHERE department_id IN (SELECT department_id FROM subtree)", (department_id,))
+            self._conn.execute(_SUBTREE + "DELETE FROM departments "
+                               "WHERE department_id IN (SELECT department_id FROM subtree)", (department_id,))
+        for removed_id in removed:
+            self._departments.pop(removed_id, None)
+        self._unload_people(affected)
+        if dept.parent is not None and dept.parent.children_loaded():
+            dept.parent.children.remove(dept)
+        parent, dept.parent = dept.parent, None
+        self._record('delete_department', department_id=department_id)
+        self._emit('department_removed', department=dept, parent=parent)
+        return True
+
+    def assign_person_to_department(self, employee_id: str, dept_id: str, role_category: str,
+                                    position_title: str) -> bool:
+        person = self.get_person(employee_id)
+        department = self.find_department(dept_id)
+        if not person or not department:
+            logger.warning("员工或部门不存在。")
+            return False
+        if role_category not in department.role_categories:
+            logger.warning("无效的职位类别 '%s'。", role_category)
+            return False
+        if role_category == '主管' and department.role_categories['主管']:
+            logger.warning("部门 '%s' 已存在一名主管。", department.name)
+            return False
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO assignments (employee_id, department_id, category, title, member_seq) "
+                "VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(member_seq), -1) + 1 FROM assignments "
+                "WHERE department_id = ?))",
+                (employee_id, dept_id, role_category, position_title, dept_id))
+            # 与字典赋值相同：同名职务改由新人员担任，但保留原有位置
+            self._conn.execute(
+                "INSERT INTO roles (department_id, title, employee_id) VALUES (?, ?, ?) "
+                "ON CONFLICT (department_id, title) DO UPDATE SET employee_id = excluded.employee_id",
+                (dept_id, position_title, employee_id))
+        department.add_member(role_category, person)
+        department.set_role(position_title, person)
+        person.unload()  # 下次访问时连同新任职一起重新读取
+        self._record('assign_person_to_department', employee_id=employee_id, dept_id=dept_id,
+                     role_category=role_category, position_title=position_title)
+        self._emit('person_assigned', person=person, department=department,
+                   role_category=role_category, position_title=position_title)
+        return True
+
+    def bulk_import(self, rows) -> dict:
+        """批量导入人员与任职（见 OrgModel.bulk_import），所有通过校验的行在一个事务中写入。"""
+        accepted, errors = bulk_import.validate_rows(self, rows)
+        person_rows, assignment_rows, role_rows = [], [], []
+        next_member_seq: dict[str, int] = {}
+        for _, row in accepted:
+            employee_id = row['employee_id']
+            if 'name' in row:
+                person_rows.append((employee_id, row['name'], row.get('age'), row.get('gender'),
+                                    row.get('phone_number')))
+            if 'department_id' in row:
+                dept_id = row['department_id']
+                if dept_id not in next_member_seq:
+                    next_member_seq[dept_id] = self._conn.execute(
+                        "SELECT COALESCE(MAX(member_seq), -1) + 1 FROM assignments WHERE department_id = ?",
+                        (dept_id,)).fetchone()[0]
+                assignment_rows.append((employee_id, dept_id, row['role_category'], row['position_title'],
+                                        next_member_seq[dept_id]))
+                next_member_seq[dept_id] += 1
+                role_rows.append((dept_id, row['position_title'], employee_id))
+
+        if accepted:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO people (employee_id, name, age, gender, phone_number) VALUES (?, ?, ?, ?, ?)",
+                    person_rows)
+                self._conn.executemany(
+                    "INSERT INTO assignments (employee_id, department_id, category, title, member_seq) "
+                    "VALUES (?, ?, ?, ?, ?)", assignment_rows)
+                self._conn.executemany(
+                    "INSERT INTO roles (department_id, title, employee_id) VALUES (?, ?, ?) "
+                    "ON CONFLICT (department_id, title) DO UPDATE SET employee_id = excluded.employee_id",
+                    role_rows)
+            self._unload_departments(next_member_seq)
+            self._unload_people({row[0] for row in assignment_rows})
+            self._record('bulk_import', rows=[row for _, row in accepted])
+            self._emit('bulk_imported', count=len(accepted))
+        return {'total': len(accepted) + len(errors), 'imported': len(accepted), 'errors': errors}
+
+    def find_person_by_name(self, name: str) -> list:
+        rows = self._conn.execute(
+            "SELECT employee_id, name, age, gender, phone_number FROM people WHERE name = ? ORDER BY seq",
+            (name,)).fetchall()
+        found_people_info = []
+        for row in rows:
+            person = self._person_from_row(row)
+            info = person.get_info()
+            info['assigment'] = [(d.name, pos) for d, pos in person.assigment]
+            found_people_info.append(info)
+        return found_people_info
+
+    def search_people(self, text: str, limit: int = None) -> list:
+        # 子串无法使用 name 上的 B 树索引，这里逐行比较；排序规则与 OrgModel.search_people 相同
+        if not text or (limit is not None and limit <= 0):
+            return []
+        rows = self._conn.execute(
+            "SELECT employee_id, name, age, gender, phone_number FROM people WHERE instr(name, ?) > 0 "
+            "ORDER BY CASE WHEN name = ? THEN 0 WHEN instr(name, ?) = 1 THEN 1 ELSE 2 END, length(name), name, employee_id "
+            "LIMIT ?",
+            (text, text, text, -1 if limit is None else limit)).fetchall()
+        return [self._person_from_row(row) for row in rows]
+
+    def get_all_people(self) -> list:
+        return self.personnel_roster.values()
+
+    def update_person_info(self, employee_id, new_data):
+        person = self.get_person(employee_id)
+        if not person:
+            return False
+        person.name = new_data.get("name", person.name)
+        person.age = new_data.get("age", person.age)
+        person.gender = new_data.get("gender", person.gender)
+        person.phone_number = new_data.get("phone_number", person.phone_number)
+        with self._conn:
+            self._conn.execute(
+                "UPDATE people SET name = ?, age = ?, gender = ?, phone_number = ? WHERE employee_id = ?",
+                (person.name, person.age, person.gender, person.phone_number, employee_id))
+        self._record('update_person_info', employee_id=employee_id, new_data=dict(new_data))
+        self._emit('person_updated', person=person)
+        return True
+
+    def remove_person_assignment(self, employee_id, dept_name, position_title):
+        person = self.get_person(employee_id)
+        if not person:
+            return False
+        matched = self._conn.execute(
+            "SELECT a.department_id, a.category FROM assignments a "
+            "JOIN departments d ON d.department_id = a.department_id "
+            "WHERE a.employee_id = ? AND d.name = ? AND a.title = ? ORDER BY a.seq",
+            (employee_id, dept_name, position_title)).fetchall()
+        if not matched:
+            return False
+        self._remove_positions(person, matched, position_title)
+        self._record('remove_person_assignment', employee_id=employee_id, dept_name=dept_name,
+                     position_title=position_title)
+        self._emit_unassigned(person, matched, position_title)
+        return True
+
+    def remove_assignment(self, employee_id, department_id, position_title):
+        person = self.get_person(employee_id)
+        if not person:
+            return False
+        matched = self._conn.execute(
+            "SELECT department_id, category FROM assignments "
+            "WHERE employee_id = ? AND department_id = ? AND title = ? ORDER BY seq",
+            (employee_id, department_id, position_title)).fetchall()
+        if not matched:
+            return False
+        self._remove_positions(person, matched, position_title)
+        self._record('remove_assignment', employee_id=employee_id, department_id=department_id,
+                     position_title=position_title)
+        self._emit_unassigned(person, matched, position_title)
+        return True
+
+    def _remove_positions(self, person, matched, position_title):
+        employee_id = person.employee_id
+        dept_ids = list(dict.fromkeys(dept_id for dept_id, _ in matched))
+        with self._conn:
+            # 被删除任职所在的每个 (部门, 分类) 中，该人员原来占有的全部 member_seq
+            held = {}
+            for dept_id in dept_ids:
+                for category, member_seq in self._conn.execute(
+                        "SELECT category, member_seq FROM assignments WHERE employee_id = ? AND department_id = ? "
+                        "AND category IN (SELECT category FROM assignments "
+                        "WHERE employee_id = ? AND department_id = ? AND title = ?) ORDER BY member_seq",
+                        (employee_id, dept_id, employee_id, dept_id, position_title)):
+                    held.setdefault((dept_id, category), []).append(member_seq)
+            for table in ('assignments', 'roles'):
+                self._conn.executemany(
+                    f"DELETE FROM {table} WHERE employee_id = ? AND department_id = ? AND title = ?",
+                    [(employee_id, dept_id, position_title) for dept_id in dept_ids])
+            # 与 StaffSet 相同：去掉的是该人员在分类中最后的几次出现，
+            # 即剩下的任职依次占用其原来最早的几个 member_seq
+            updates = []
+            for (dept_id, category), member_seqs in held.items():
+                remaining = self._conn.execute(
+                    "SELECT seq FROM assignments WHERE employee_id = ? AND department_id = ? AND category = ? "
+                    "ORDER BY member_seq", (employee_id, dept_id, category)).fetchall()
+                updates.extend((member_seq, seq) for (seq,), member_seq in zip(remaining, member_seqs))
+            self._conn.executemany("UPDATE assignments SET member_seq = ? WHERE seq = ?", updates)
+        self._unload_departments(dept_ids)
+        person.unload()
+
+    def _emit_unassigned(self, person, matched, position_title):
+        for dept_id, category in matched:
+            self._emit('person_unassigned', person=person, department=self.find_department(dept_id),
+                       role_category=category, position_title=position_title)
+
+    # ---------- 文件导入导出 ----------
+
+    def save_to_file(self, filepath: str, indent=None, meta=None, progress=None) -> bool:
+        """将数据库内容导出为 JSON 文件或二进制快照（格式与 OrgModel 相同）。"""
+        return OrgModel.save_to_file(self, filepath, indent=indent, meta=meta, progress=progress)
+
+    def load_from_file(self, filepath: str, progress=None) -> bool:
+        """用 JSON 文件或二进制快照中的数据替换数据库的全部内容。"""
+        model = OrgModel()
+        if not model.load_from_file(filepath, progress=progress):
+            return False
+        self.import_model(model)
+        self.file_meta = model.file_meta
+        return True
+
+    def staging_model(self):
+        """数据库连接只能在创建它的线程中使用，后台加载改用内存模型。"""
+        return OrgModel()
+
+    def replaced_by(self, loaded):
+        """在一个事务中把加载好的内存模型写入数据库，日志随之转到本模型上；返回本模型。"""
+        self.import_model(loaded)
+        self.file_meta = loaded.file_meta
+        self.journal, loaded.journal = loaded.journal, None
+        return self
+
+    def import_model(self, model: OrgModel):
+        """用内存模型的数据整体替换数据库内容（一个事务内完成）。"""
+        departments = [(model.root_department, None, 0)] if model.root_department is not None else []
+        i = 0
+        while i < len(departments):
+            dept = departments[i][0]
+            departments.extend((child, dept.department_id, seq) for seq, child in enumerate(dept.children))
+            i += 1
+
+        # 任职记录按个人任职顺序写入；再按部门成员顺序为其编号 member_seq
+        assignment_rows = []
+        pending: dict[tuple, list[int]] = {}
+        for person in model.personnel_roster.values():
+            for dept, category, title in model.position_index.get(person.employee_id, []):
+                pending.setdefault((person.employee_id, id(dept), category), []).append(len(assignment_rows))
+                assignment_rows.append([person.employee_id, dept.department_id, category, title, 0])
+        role_rows = []
+        for dept, _, _ in departments:
+            member_seq = 0
+            for category, staff_list in dept.role_categories.items():
+                for person in staff_list:
+                    queue = pending.get((person.employee_id, id(dept), category))
+                    if queue:
+                        assignment_rows[queue.pop(0)][4] = member_seq
+                        member_seq += 1
+            role_rows.extend((dept.department_id, title, person.employee_id) for title, person in dept.roles.items())
+
+        with self._conn:
+            for table in ('roles', 'assignments', 'people', 'departments'):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.executemany(
+                "INSERT INTO departments VALUES (?, ?, ?, ?)",
+                [(dept.department_id, dept.name, parent_id, seq) for dept, parent_id, seq in departments])
+            self._conn.executemany(
+                "INSERT INTO people (employee_id, name, age, gender, phone_number) VALUES (?, ?, ?, ?, ?)",
+                [(p.employee_id, p.name, p.age, p.gender, p.phone_number) for p in model.personnel_roster.values()])
+            self._conn.executemany(
+                "INSERT INTO assignments (employee_id, department_id, category, title, member_seq) "
+                "VALUES (?, ?, ?, ?, ?)", assignment_rows)
+            self._conn.executemany(
+                "INSERT INTO roles (department_id, title, employee_id) VALUES (?, ?, ?)", role_rows)
+        self._departments.clear()
+        self._people.clear()
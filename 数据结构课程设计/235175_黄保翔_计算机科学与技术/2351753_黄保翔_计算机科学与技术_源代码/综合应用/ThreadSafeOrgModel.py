@@ -0,0 +1,88 @@
+'''线程安全的数据模型'''
+# ThreadSafeOrgModel.py
+#
+# 与 OrgModel 提供相同的接口，每个公共方法都在模型的读写锁中执行：查找、统计等只读方法
+# 可以在多个工作线程中同时进行，修改方法独占模型。Tk 主循环中的编辑与工作线程中的搜索、导出、
+# 保存因此可以安全地并发进行。
+#
+# 公共方法返回的是模型中的活动对象（Person、Department），锁在方法返回时即释放。
+# 需要连续读取多个对象并保持一致时，应在 `with model.lock.read():` 中进行，
+# 或者改用 freeze() 得到的冻结版本（它不占用锁，见 frozen.py）。
+
+import threading
+
+from OrgModel import OrgModel
+from rwlock import RWLock
+
+# 在读锁中执行的只读方法
+READ_OPS = (
+    'get_person', 'find_department', 'find_person_by_name', 'search_people', 'get_all_people',
+    'department_stats', 'supervisor_chain', 'is_ancestor', 'people_in_subtree',
+    'department_depth', 'kth_ancestor', 'lowest_common_ancestor', 'freeze', 'select', 'explain',
+    'find_departments_by_name', 'departments_with_prefix',
+)
+# 在写锁中执行的修改方法
+WRITE_OPS = (
+    'add_person', 'delete_person', 'add_department', 'rename_department', 'move_department',
+    'delete_department', 'assign_person_to_department', 'bulk_import', 'update_person_info',
+    'remove_person_assignment', 'remove_assignment', 'load_from_file', 'subscribe', 'unsubscribe',
+)
+
+
+def _read_locked(name: str):
+    def method(self, *args, **kwargs):
+        lock = self.lock
+        lock.acquire_read()
+        try:
+            return getattr(OrgModel, name)(self, *args, **kwargs)
+        finally:
+            lock.release_read()
+    method.__name__ = name
+    method.__doc__ = getattr(OrgModel, name).__doc__
+    return method
+
+
+def _write_locked(name: str):
+    def method(self, *args, **kwargs):
+        lock = self.lock
+        lock.acquire_write()
+        try:
+            return getattr(OrgModel, name)(self, *args, **kwargs)
+        finally:
+            lock.release_write()
+    method.__name__ = name
+    method.__doc__ = getattr(OrgModel, name).__doc__
+    return method
+
+
+class ThreadSafeOrgModel(OrgModel):
+    """带读写锁的 OrgModel：多个读者可以并发，写者独占。"""
+
+    def __init__(self):
+        self.lock = RWLock()
+        # 只读方法会按需重建区间编号和倍增表，多个读者同时重建时需要互斥
+        self._cache_lock = threading.Lock()
+        super().__init__()
+
+    def _ensure_tour(self):
+        with self._cache_lock:
+            return OrgModel._ensure_tour(self)
+
+    def _ensure_lift(self):
+        with self._cache_lock:
+            return OrgModel._ensure_lift(self)
+
+    def save_to_file(self, filepath: str, indent=None, meta=None, progress=None) -> bool:
+        """
+        保存到文件（参数见 OrgModel.save_to_file）。只在取得冻结版本的瞬间持有读锁，
+        写文件期间不阻塞其他线程的修改，写出的仍是调用时刻的一致数据。
+        """
+        with self.freeze() as org:
+            return org.save_to_file(filepath, indent=indent, meta=meta, progress=progress)
+
+
+for _name in READ_OPS:
+    setattr(ThreadSafeOrgModel, _name, _read_locked(_name))
+for _name in WRITE_OPS:
+    setattr(ThreadSafeOrgModel, _name, _write_locked(_name))
+del _name
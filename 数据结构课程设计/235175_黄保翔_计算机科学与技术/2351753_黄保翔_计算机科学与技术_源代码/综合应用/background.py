@@ -0,0 +1,87 @@
+'''后台任务'''
+# background.py
+#
+# 在工作线程中执行耗时的保存、加载，使 Tk 主循环不被阻塞。
+# 工作函数通过 task.report(已完成, 总量) 汇报进度；取消后下一次汇报会抛出 Cancelled，
+# 工作函数借此尽快结束。界面线程只读取 progress、done 等属性（用 after 定时轮询），
+# 任务本身从不调用 Tk，因为 Tk 只能在创建它的线程中使用。
+#
+#     task = BackgroundTask("加载", lambda task: model.load_from_file(path, progress=task.report))
+#     task.start()
+#     ...
+#     if task.done: print(task.result)
+
+import logging
+import threading
+
+logger = logging.getLogger('org.background')
+
+
+class Cancelled(Exception):
+    """任务已被取消。由 BackgroundTask.report 抛出，穿过工作函数后由任务捕获。"""
+
+
+class BackgroundTask:
+    """在守护线程中执行 func(task) 的任务，记录进度、结果和异常。"""
+
+    def __init__(self, title: str, func):
+        """
+        :param title: 任务名称，用于状态栏与提示信息
+        :param func: 工作函数 func(task)，其返回值即任务结果
+        """
+        self.title = title
+        self._func = func
+        # 最近一次汇报的 (已完成, 总量)，尚未汇报时为 None
+        self.progress: tuple[int, int] | None = None
+        self.result = None
+        # 工作函数抛出的异常（取消除外）
+        self.error: BaseException | None = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"background-{title}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.result = self._func(self)
+        except Cancelled:
+            pass
+        except Exception as e:
+            logger.exception("后台任务 %s 失败", self.title)
+            self.error = e
+
+    def report(self, done: int, total: int):
+        """
+        由工作函数调用，汇报进度。任务已被取消时抛出 Cancelled。
+        :param done: 已完成的量（记录数、字节数等）
+        :param total: 总量，未知时为 0
+        """
+        if self._cancel.is_set():
+            raise Cancelled()
+        self.progress = (done, total)
+
+    def fraction(self) -> float | None:
+        """已完成的比例（0~1）；尚无进度或总量未知时为 None。"""
+        progress = self.progress
+        if progress is None or not progress[1]:
+            return None
+        return min(1.0, progress[0] / progress[1])
+
+    def cancel(self):
+        """请求取消。工作函数在下一次汇报进度时结束，结果由调用方决定是否丢弃。"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self._thread.ident is not None and not self._thread.is_alive()
+
+    def wait(self, timeout: float = None) -> bool:
+        """等待任务结束；返回任务是否已结束。"""
+        self._thread.join(timeout)
+        return self.done
@@ -0,0 +1,490 @@
+'''性能基准测试脚本'''
+# benchmark.py
+#
+# 用法:
+#   python benchmark.py ops --sizes 1000 10000 100000 -o base.json   在不同规模的合成组织上测量各操作耗时
+#   python benchmark.py compare base.json new.json      对比两次 ops 结果，有明显变慢的操作时退出码为 1
+#   python benchmark.py snapshot data.json     比较 JSON 与二进制快照的文件大小和加载时间
+#   python benchmark.py memory --people 1000000  统计合成组织中每个人员、每个部门占用的内存
+#   python benchmark.py stress --threads 8 --seconds 10  多线程混合读写后检查索引与部门树是否一致
+#
+# 所有结果都以 JSON 输出，并可通过 -o 写入文件，便于在不同版本之间比较。
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from Department import ROLE_CATEGORIES
+from OrgModel import OrgModel
+from OrgModelBase import UnsupportedOperation
+from query import Query
+from SqliteOrgModel import SqliteOrgModel
+from consistency import check_consistency
+from ThreadSafeOrgModel import ThreadSafeOrgModel
+import generator
+import snapshot
+
+# 可选的模型实现
+BACKENDS = {'memory': OrgModel, 'sqlite': SqliteOrgModel, 'threadsafe': ThreadSafeOrgModel}
+# ops 测量的操作，依次执行；只读操作在前，修改操作在后
+OPERATIONS = (
+    'find_department', 'find_person_by_name', 'search_people', 'select', 'save_to_file', 'load_from_file',
+    'add_department', 'assign_person_to_department', 'delete_person', 'delete_department',
+)
+# 压力测试结束后等待线程退出的最长时间（秒）
+_STRESS_GRACE = 30.0
+# 只按部门总数限制部门树时使用的层数上限
+_UNBOUNDED_DEPTH = 64
+
+
+def _best_time(func, repeat: int) -> float:
+    """重复执行 repeat 次，返回最短耗时（秒）。"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _time_calls(func, arg_list) -> float:
+    """依次以 arg_list 中的参数调用 func，返回总耗时（秒）。"""
+    start = time.perf_counter()
+    for args in arg_list:
+        func(*args)
+    return time.perf_counter() - start
+
+
+def _op_result(calls: int, total: float) -> dict:
+    return {
+        'calls': calls,
+        'total_s': round(total, 6),
+        'per_call_us': round(total / calls * 1e6, 3) if calls else 0.0,
+    }
+
+
+def bench_operations_at(size: int, backend: str = 'memory', ops: int = 1000, repeat: int = 3,
+                        depth: int = _UNBOUNDED_DEPTH, fanout: int = 8, assignments_per_person: int = 1,
+                        seed: int = 1) -> dict:
+    """
+    生成 size 名人员、size / 10 个部门的合成组织，测量 OPERATIONS 中各操作的耗时。
+    只读操作与保存、加载取 repeat 次中的最好成绩，修改操作各执行一轮。
+    :param size: 人员数
+    :param backend: 'memory'（OrgModel）或 'sqlite'（内存中的 SqliteOrgModel）
+    :param ops: 每种查找、修改操作的调用次数（不超过现有对象数）
+    :return: {'size', 'people', 'departments', 'build_s', 'ops': {操作名: {...}}}
+    """
+    model_cls = BACKENDS[backend]
+    rng = random.Random(seed)
+    model = model_cls()
+    start = time.perf_counter()
+    dept_ids = generator.generate(model, size, depth=depth, fanout=fanout, departments=max(1, size // 10),
+                                  assignments_per_person=assignments_per_person, seed=seed)
+    build_s = time.perf_counter() - start
+    employee_ids = [f"e{i}" for i in range(size)]
+    results = {}
+
+    def best(func, arg_list, n=repeat):
+        return min(_time_calls(func, arg_list) for _ in range(n))
+
+    lookups = [(rng.choice(dept_ids),) for _ in range(ops)]
+    results['find_department'] = _op_result(ops, best(model.find_department, lookups))
+    names = [(f"员工{rng.randrange(1000)}",) for _ in range(ops)]
+    results['find_person_by_name'] = _op_result(ops, best(model.find_person_by_name, names))
+    # 姓名中的一段文字，最多取界面显示的条数
+    fragments = [(f"{rng.randrange(100)}", 500) for _ in range(ops)]
+    results['search_people'] = _op_result(ops, best(model.search_people, fragments))
+    # 组合条件：两岁宽的年龄区间 + 性别，限定在随机部门的子树中
+    queries = [(Query().age(age, age + 1).gender("男女"[age % 2]).in_department(rng.choice(dept_ids)),)
+               for age in (rng.randrange(20, 60) for _ in range(ops))]
+    try:
+        results['select'] = _op_result(ops, best(model.select, queries))
+    except UnsupportedOperation:
+        pass  # SQLite 模型没有组合查询
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'org.json')
+        results['save_to_file'] = _op_result(1, best(model.save_to_file, [(path,)]))
+        results['load_from_file'] = _op_result(
+            1, min(_time_calls(model_cls().load_from_file, [(path,)]) for _ in range(repeat)))
+
+    new_depts = [(f"部门{i}", rng.choice(dept_ids), f"bench-d{i}") for i in range(ops)]
+    results['add_department'] = _op_result(ops, _time_calls(model.add_department, new_depts))
+
+    assignments = [(rng.choice(employee_ids), rng.choice(dept_ids), '其他人员', f"基准职位{i}") for i in range(ops)]
+    results['assign_person_to_department'] = _op_result(
+        len(assignments), _time_calls(model.assign_person_to_department, assignments))
+
+    victims = [(employee_id,) for employee_id in rng.sample(employee_ids, min(ops, size))]
+    results['delete_person'] = _op_result(len(victims), _time_calls(model.delete_person, victims))
+
+    # 删除部门会连同子部门一起删除，只对仍然存在的部门计时
+    candidates = rng.sample(dept_ids[1:], len(dept_ids) - 1)
+    calls, total = 0, 0.0
+    for dept_id in candidates:
+        if calls >= ops:
+            break
+        if model.find_department(dept_id) is None:
+            continue
+        start = time.perf_counter()
+        model.delete_department(dept_id)
+        total += time.perf_counter() - start
+        calls += 1
+    results['delete_department'] = _op_result(calls, total)
+
+    return {
+        'size': size,
+        'people': size,
+        'departments': len(dept_ids),
+        'build_s': round(build_s, 6),
+        'ops': {op: results[op] for op in OPERATIONS if op in results},
+    }
+
+
+def _git_revision() -> str | None:
+    """当前代码的 git 提交号；不在 git 仓库中时为 None。"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_operations(sizes=(1000, 10000, 100000), backend: str = 'memory', ops: int = 1000, repeat: int = 3,
+                     depth: int = _UNBOUNDED_DEPTH, fanout: int = 8, assignments_per_person: int = 1,
+                     seed: int = 1) -> dict:
+    """
+    在逐步增大的合成组织上依次运行 bench_operations_at。
+    :param sizes: 各轮的人员数
+    :return: {'meta': 运行环境与参数, 'results': [每个规模的结果]}
+    """
+    meta = {
+        'benchmark': 'ops',
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'backend': backend,
+        'ops': ops,
+        'repeat': repeat,
+        'depth': depth,
+        'fanout': fanout,
+        'assignments_per_person': assignments_per_person,
+        'seed': seed,
+    }
+    results = [bench_operations_at(size, backend, ops, repeat, depth, fanout, assignments_per_person, seed)
+               for size in sizes]
+    return {'meta': meta, 'results': results}
+
+
+def compare(baseline: dict, current: dict, threshold: float = 1.2) -> dict:
+    """
+    对比两次 bench_operations 的结果。
+    :param threshold: 单次调用耗时之比超过该值即视为变慢
+    :return: {'rows': [{size, op, baseline_us, current_us, ratio}], 'regressions': [变慢的行]}
+    """
+    base_by_size = {entry['size']: entry['ops'] for entry in baseline['results']}
+    rows = []
+    for entry in current['results']:
+        base_ops = base_by_size.get(entry['size'])
+        if base_ops is None:
+            continue
+        for op, data in entry['ops'].items():
+            if op not in base_ops or not base_ops[op]['per_call_us']:
+                continue
+            ratio = data['per_call_us'] / base_ops[op]['per_call_us']
+            rows.append({'size': entry['size'], 'op': op, 'baseline_us': base_ops[op]['per_call_us'],
+                         'current_us': data['per_call_us'], 'ratio': round(ratio, 3)})
+    return {'rows': rows, 'regressions': [row for row in rows if row['ratio'] > threshold]}
+
+
+def _random_operation(model, rng: random.Random, new_id: str, write_ratio: float, save_path: str) -> str | None:
+    """随机执行一次读或写操作，返回操作名（本次未执行任何操作时为 None）。"""
+    dept_ids = list(model.department_index)
+    employee_ids = list(model.personnel_roster)
+    dept_id = rng.choice(dept_ids)
+    employee_id = rng.choice(employee_ids) if employee_ids else 'none'
+    if rng.random() < write_ratio:
+        op = rng.choice(('add_person', 'delete_person', 'assign', 'unassign', 'update_person',
+                         'add_department', 'rename_department', 'move_department',
+                         'delete_department', 'bulk_import'))
+    else:
+        op = rng.choice(('find_department', 'get_person', 'find_person_by_name', 'search_people', 'select',
+                         'department_stats', 'people_in_subtree', 'lowest_common_ancestor', 'supervisor_chain',
+                         'frozen_stats', 'save_to_file'))
+    if op == 'add_person':
+        model.add_person(new_id, f"员工{rng.randrange(1000)}", str(rng.randrange(20, 60)),
+                         "男女"[rng.randrange(2)], "13900000000")
+    elif op == 'delete_person':
+        model.delete_person(employee_id)
+    elif op == 'assign':
+        model.assign_person_to_department(employee_id, dept_id, rng.choice(ROLE_CATEGORIES),
+                                          f"职位{rng.randrange(50)}")
+    elif op == 'unassign':
+        person = model.get_person(employee_id)
+        assignments = list(person.assigment) if person is not None else []
+        if assignments:
+            dept, title = rng.choice(assignments)
+            if rng.random() < 0.5:
+                model.remove_assignment(employee_id, dept.department_id, title)
+            else:
+                model.remove_person_assignment(employee_id, dept.name, title)
+    elif op == 'update_person':
+        model.update_person_info(employee_id, {'name': f"员工{rng.randrange(1000)}",
+                                               'age': str(rng.randrange(20, 60)),
+                                               'gender': "男女"[rng.randrange(2)]})
+    elif op == 'add_department':
+        model.add_department(f"部门{rng.randrange(500)}", dept_id, department_id=new_id)
+    elif op == 'rename_department':
+        model.rename_department(dept_id, f"部门{rng.randrange(500)}")
+    elif op == 'move_department':
+        model.move_department(dept_id, rng.choice(dept_ids))
+    elif op == 'delete_department':
+        # 只删除叶子部门，避免部门树被迅速删空
+        dept = model.find_department(dept_id)
+        if dept is not None and dept.parent is not None and not dept.children:
+            model.delete_department(dept_id)
+    elif op == 'bulk_import':
+        model.bulk_import([{'employee_id': f"{new_id}-{i}", 'name': f"员工{i}", 'age': '30',
+                            'gender': '女', 'phone_number': '1', 'department_id': dept_id,
+                            'role_category': '其他人员', 'position_title': '批量导入'}
+                           for i in range(5)])
+    elif op == 'find_department':
+        model.find_department(dept_id)
+    elif op == 'get_person':
+        model.get_person(employee_id)
+    elif op == 'find_person_by_name':
+        model.find_person_by_name(f"员工{rng.randrange(1000)}")
+    elif op == 'search_people':
+        model.search_people(f"工{rng.randrange(100)}", 50)
+    elif op == 'select':
+        age = rng.randrange(20, 60)
+        model.select(Query().age(age, age + 5).in_department(dept_id).posts(1))
+    elif op == 'department_stats':
+        model.department_stats(dept_id)
+    elif op == 'people_in_subtree':
+        model.people_in_subtree(dept_id)
+    elif op == 'lowest_common_ancestor':
+        model.lowest_common_ancestor(dept_id, rng.choice(dept_ids))
+    elif op == 'supervisor_chain':
+        model.supervisor_chain(employee_id)
+    elif op == 'frozen_stats':
+        with model.freeze() as org:
+            root = org.root_department
+            if root is not None:
+                root.subtree_stats()
+    elif op == 'save_to_file':
+        if rng.random() >= 0.02:
+            return None
+        model.save_to_file(save_path)
+    return op
+
+
+def _stress_worker(model, seed: int, deadline: float, write_ratio: float, counts: dict, errors: list):
+    """在 deadline 之前不断随机执行读写操作，记录每种操作的次数和抛出的异常。"""
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        save_path = os.path.join(workdir, 'stress.json')
+        serial = 0
+        while time.perf_counter() < deadline:
+            serial += 1
+            try:
+                op = _random_operation(model, rng, f"s{seed}-{serial}", write_ratio, save_path)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                continue
+            if op is not None:
+                counts[op] = counts.get(op, 0) + 1
+
+
+def bench_stress(threads: int = 8, seconds: float = 10.0, people: int = 2000, write_ratio: float = 0.3,
+                 unsafe: bool = False, seed: int = 1) -> dict:
+    """
+    压力测试：多个线程同时对同一模型随机执行读写操作，结束后检查索引与部门树是否一致。
+    :param threads: 线程数
+    :param seconds: 运行时长
+    :param people: 初始人员数（部门数为其十分之一）
+    :param write_ratio: 修改操作所占的比例
+    :param unsafe: 为 True 时使用不加锁的 OrgModel 作为对照
+    :return: 测试结果字典，consistent 为 False 或 errors 非空即表示发现问题
+    """
+    model = OrgModel() if unsafe else ThreadSafeOrgModel()
+    generator.generate(model, people, departments=max(1, people // 10), seed=seed)
+    # 缩短线程切换间隔，让线程更频繁地在操作中途交错
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    counts_per_thread = [{} for _ in range(threads)]
+    errors = []
+    deadline = time.perf_counter() + seconds
+    try:
+        # 守护线程：不加锁的对照组可能把部门树改出环而陷入死循环，届时不等待它们结束
+        workers = [threading.Thread(target=_stress_worker, daemon=True,
+                                    args=(model, seed * 1000 + i, deadline, write_ratio, counts_per_thread[i], errors))
+                   for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(max(0.0, deadline + _STRESS_GRACE - time.perf_counter()))
+    finally:
+        sys.setswitchinterval(switch_interval)
+    hung = sum(worker.is_alive() for worker in workers)
+
+    counts = {}
+    for per_thread in counts_per_thread:
+        for op, count in per_thread.items():
+            counts[op] = counts.get(op, 0) + count
+    problems = check_consistency(model) if not hung else [f"{hung} 个线程在时限后仍未结束"]
+    return {
+        'model': type(model).__name__,
+        'threads': threads,
+        'seconds': seconds,
+        'operations': sum(counts.values()),
+        'counts': dict(sorted(counts.items())),
+        'errors': errors[:20],
+        'error_count': len(errors),
+        'consistent': not problems,
+        'problems': problems[:20],
+        'people': len(model.personnel_roster),
+        'departments': len(model.department_index),
+    }
+
+
+def bench_memory(people: int = 1_000_000, departments: int = None, seed: int = 1) -> dict:
+    """
+    用 tracemalloc 统计合成组织占用的内存，给出平均每个部门、每个人员（含其任职）的字节数。
+    :param people: 人员数
+    :param departments: 部门数，默认为人员数的十分之一
+    :param seed: 随机数种子
+    :return: 测试结果字典
+    """
+    departments = departments or max(1, people // 10)
+    checkpoints = []
+    tracemalloc.start()
+    try:
+        checkpoints.append(tracemalloc.get_traced_memory()[0])
+        model = OrgModel()
+        generator.generate(model, people, depth=_UNBOUNDED_DEPTH, fanout=8, departments=departments, seed=seed,
+                           on_departments_built=lambda: checkpoints.append(tracemalloc.get_traced_memory()[0]))
+        checkpoints.append(tracemalloc.get_traced_memory()[0])
+    finally:
+        tracemalloc.stop()
+    start, after_departments, end = checkpoints
+    return {
+        'people': people,
+        'departments': departments,
+        'bytes_per_department': round((after_departments - start) / departments, 1),
+        'bytes_per_person': round((end - after_departments) / people, 1) if people else 0,
+        'total_bytes': end - start,
+    }
+
+
+def bench_snapshot(source: str, repeat: int = 3) -> dict:
+    """
+    以 source 文件中的组织数据为样本，比较两种格式的大小与加载时间，并校验往返一致性。
+    :param source: 任意可被 OrgModel.load_from_file 读取的文件
+    :param repeat: 每项计时的重复次数
+    :return: 测试结果字典
+    """
+    model = OrgModel()
+    model.load_from_file(source)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        json_path = os.path.join(workdir, 'org.json')
+        binary_path = os.path.join(workdir, 'org' + snapshot.SNAPSHOT_SUFFIX)
+        model.save_to_file(json_path)
+        model.save_to_file(binary_path)
+
+        def load(path):
+            return lambda: OrgModel().load_from_file(path)
+
+        def preview():
+            with snapshot.SnapshotReader(binary_path) as reader:
+                reader.tree_dict(depth=1)
+
+        # 往返校验：二进制快照加载后再导出的 JSON 应与原 JSON 完全一致
+        restored = OrgModel()
+        restored.load_from_file(binary_path)
+        roundtrip_path = os.path.join(workdir, 'roundtrip.json')
+        restored.save_to_file(roundtrip_path)
+        with open(json_path, encoding='utf-8') as a, open(roundtrip_path, encoding='utf-8') as b:
+            roundtrip_ok = a.read() == b.read()
+
+        return {
+            'people': len(model.personnel_roster),
+            'departments': len(model.department_index),
+            'json_bytes': os.path.getsize(json_path),
+            'snapshot_bytes': os.path.getsize(binary_path),
+            'json_load_s': _best_time(load(json_path), repeat),
+            'snapshot_load_s': _best_time(load(binary_path), repeat),
+            'snapshot_first_level_s': _best_time(preview, repeat),
+            'roundtrip_identical': roundtrip_ok,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OrgModel 性能基准测试")
+    parser.add_argument('-o', '--output', metavar='PATH', help="同时把结果写入该 JSON 文件")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_ops = sub.add_parser('ops', help="在不同规模的合成组织上测量各操作耗时")
+    p_ops.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="各轮的人员数")
+    p_ops.add_argument('--backend', choices=sorted(BACKENDS), default='memory')
+    p_ops.add_argument('--ops', type=int, default=1000, help="每种操作的调用次数")
+    p_ops.add_argument('--repeat', type=int, default=3)
+    p_ops.add_argument('--depth', type=int, default=_UNBOUNDED_DEPTH, help="部门树层数上限")
+    p_ops.add_argument('--fanout', type=int, default=8, help="每个部门的子部门数")
+    p_ops.add_argument('--assignments', type=int, default=1, help="每名人员的任职数")
+    p_ops.add_argument('--seed', type=int, default=1)
+    p_stress = sub.add_parser('stress', help="多线程混合读写后检查模型一致性")
+    p_stress.add_argument('--threads', type=int, default=8)
+    p_stress.add_argument('--seconds', type=float, default=10.0)
+    p_stress.add_argument('--people', type=int, default=2000)
+    p_stress.add_argument('--write-ratio', type=float, default=0.3)
+    p_stress.add_argument('--unsafe', action='store_true', help="对照：使用不加锁的 OrgModel")
+    p_stress.add_argument('--seed', type=int, default=1)
+    p_compare = sub.add_parser('compare', help="对比两次 ops 结果")
+    p_compare.add_argument('baseline')
+    p_compare.add_argument('current')
+    p_compare.add_argument('--threshold', type=float, default=1.2, help="耗时之比超过该值视为变慢")
+    p_snapshot = sub.add_parser('snapshot', help="比较 JSON 与二进制快照")
+    p_snapshot.add_argument('source', help="作为样本的数据文件")
+    p_snapshot.add_argument('--repeat', type=int, default=3)
+    p_memory = sub.add_parser('memory', help="统计每个人员、每个部门的内存占用")
+    p_memory.add_argument('--people', type=int, default=1_000_000)
+    p_memory.add_argument('--departments', type=int, default=None, help="默认为人员数的十分之一")
+    p_memory.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    exit_code = 0
+    if args.command == 'ops':
+        result = bench_operations(args.sizes, args.backend, args.ops, args.repeat, args.depth, args.fanout,
+                                  args.assignments, args.seed)
+    elif args.command == 'compare':
+        with open(args.baseline, encoding='utf-8') as a, open(args.current, encoding='utf-8') as b:
+            result = compare(json.load(a), json.load(b), args.threshold)
+        exit_code = 1 if result['regressions'] else 0
+    elif args.command == 'stress':
+        result = bench_stress(args.threads, args.seconds, args.people, args.write_ratio, args.unsafe, args.seed)
+        exit_code = 0 if result['consistent'] and not result['error_count'] else 1
+    elif args.command == 'snapshot':
+        result = bench_snapshot(args.source, args.repeat)
+    elif args.command == 'memory':
+        result = bench_memory(args.people, args.departments, args.seed)
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
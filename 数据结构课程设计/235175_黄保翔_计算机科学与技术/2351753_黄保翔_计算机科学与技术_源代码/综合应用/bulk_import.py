@@ -0,0 +1,97 @@
+'''人员与任职的批量导入'''
+# bulk_import.py
+#
+# 从 CSV 或 JSON Lines 文件读入行，每行可以同时包含人员信息和一条任职：
+#     employee_id, name, age, gender, phone_number, department_id, role_category, position_title
+# 有 name 的行新建人员，有 department_id 的行分配任职（两者可同时出现）。
+# 所有行先整体校验，出错的行整行跳过并记入报告，其余的行再由模型一次性应用。
+
+import csv
+import json
+import os
+
+from Department import ROLE_CATEGORIES
+
+PERSON_FIELDS = ('employee_id', 'name', 'age', 'gender', 'phone_number')
+ASSIGNMENT_FIELDS = ('department_id', 'role_category', 'position_title')
+
+
+def read_rows(filepath: str) -> list[dict]:
+    """
+    读入导入文件。扩展名为 .jsonl 时每行是一个 JSON 对象，否则按带表头的 CSV 读取。
+    :param filepath: 文件路径
+    :return: 行字典列表
+    """
+    if os.path.splitext(filepath)[1].lower() == '.jsonl':
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    # utf-8-sig 可以兼容 Excel 导出的带 BOM 的文件
+    with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def _text(row: dict, key: str) -> str:
+    value = row.get(key)
+    if value is None:
+        return ''
+    return value.strip() if isinstance(value, str) else str(value).strip()
+
+
+def validate_rows(model, rows) -> tuple[list[tuple[int, dict]], list[dict]]:
+    """
+    在不修改模型的前提下校验所有行：员工ID重复或不存在、部门不存在、职位类别无效、
+    部门已有主管或同一批次中出现多名主管等。
+    :param model: OrgModel 或 SqliteOrgModel
+    :param rows: 行字典的可迭代对象
+    :return: (通过校验的 [(行号, 规范化后的行)], 错误报告 [{'row', 'employee_id', 'error'}])，行号从 1 开始
+    """
+    roster = model.personnel_roster
+    accepted, errors = [], []
+    batch_people = set()
+    batch_heads = set()
+    departments = {}
+
+    for row_number, row in enumerate(rows, start=1):
+        employee_id = _text(row, 'employee_id')
+        has_person = bool(_text(row, 'name'))
+        dept_id = _text(row, 'department_id')
+        problems = []
+        if not employee_id:
+            problems.append("缺少员工ID")
+        if not has_person and not dept_id:
+            problems.append("既没有人员信息也没有任职信息")
+        if employee_id and has_person and (employee_id in batch_people or employee_id in roster):
+            problems.append(f"员工ID '{employee_id}' 已存在")
+        if employee_id and not has_person and dept_id and employee_id not in batch_people \
+                and employee_id not in roster:
+            problems.append(f"员工ID '{employee_id}' 不存在")
+
+        category = title = None
+        if dept_id:
+            if dept_id not in departments:
+                departments[dept_id] = model.find_department(dept_id)
+            department = departments[dept_id]
+            category = _text(row, 'role_category') or '其他人员'
+            title = _text(row, 'position_title')
+            if department is None:
+                problems.append(f"部门ID '{dept_id}' 不存在")
+            elif category not in ROLE_CATEGORIES:
+                problems.append(f"无效的职位类别 '{category}'")
+            elif category == '主管' and (dept_id in batch_heads or department.role_categories['主管']):
+                problems.append(f"部门 '{department.name}' 已存在一名主管")
+            if not title:
+                problems.append("缺少职位名称")
+
+        if problems:
+            errors.append({'row': row_number, 'employee_id': employee_id, 'error': "；".join(problems)})
+            continue
+        normalized = {'employee_id': employee_id}
+        if has_person:
+            batch_people.add(employee_id)
+            normalized.update({key: row.get(key) for key in PERSON_FIELDS[1:]})
+        if dept_id:
+            if category == '主管':
+                batch_heads.add(dept_id)
+            normalized.update({'department_id': dept_id, 'role_category': category, 'position_title': title})
+        accepted.append((row_number, normalized))
+    return accepted, errors
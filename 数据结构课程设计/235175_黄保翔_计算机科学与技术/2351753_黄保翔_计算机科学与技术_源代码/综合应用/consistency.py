@@ -0,0 +1,129 @@
+'''数据模型一致性检查'''
+# consistency.py
+#
+# 检查 OrgModel 中增量维护的各个索引是否与部门树和花名册一致。它们本可以由部门树和花名册
+# 重新算出，这里正是把重新算出的结果与模型中的逐项比较。供压力测试 (benchmark.py stress)
+# 与单元测试 (test_org_model.py) 在一系列修改之后调用。
+
+from Department import ROLE_CATEGORIES, member_profile
+from person_index import PersonIndex
+from department_names import DepartmentNameIndex
+
+
+def check_consistency(model) -> list:
+    """
+    检查 OrgModel 各索引与部门树是否彼此一致：父子指针、部门索引、花名册与任职索引、
+    部门成员与人员任职（职位类别与职位名称）、每个部门唯一的主管、人员二级索引、增量维护的子树统计量以及区间编号。
+    :return: 发现的问题描述列表，一致时为空列表
+    """
+    problems = []
+    root = model.root_department
+    # 先序遍历，已访问过的部门不再展开，部门树中出现环时也能结束
+    tree, seen, broken = [], {}, False
+    stack = [root] if root is not None else []
+    while stack:
+        dept = stack.pop()
+        if dept.department_id in seen:
+            problems.append(f"部门 {dept.department_id} 在树中出现多次")
+            broken = True
+            continue
+        seen[dept.department_id] = dept
+        tree.append(dept)
+        for child in dept.children:
+            if child.parent is not dept:
+                problems.append(f"部门 {child.department_id} 的父指针错误")
+        stack.extend(reversed(dept.children))
+    if seen.keys() != model.department_index.keys() or \
+            any(model.department_index[key] is not dept for key, dept in seen.items()):
+        problems.append("部门索引与部门树不一致")
+
+    if model.personnel_roster.keys() != model.position_index.keys():
+        problems.append("花名册与任职索引的员工不一致")
+    # 由人员一侧统计的任职 {(部门, 分类, 员工ID): 次数}，以及任职的 (部门, 职位名称, 员工ID)
+    positions = {}
+    titles = set()
+    for employee_id, entries in model.position_index.items():
+        person = model.personnel_roster.get(employee_id)
+        if person is None:
+            continue
+        if [(id(d), t) for d, _, t in entries] != [(id(d), t) for d, t in person.assigment]:
+            problems.append(f"员工 {employee_id} 的任职列表与任职索引不一致")
+        for dept, category, title in entries:
+            titles.add((dept.department_id, title, employee_id))
+            if seen.get(dept.department_id) is not dept:
+                problems.append(f"员工 {employee_id} 在已删除的部门 {dept.department_id} 中任职")
+            key = (dept.department_id, category, employee_id)
+            positions[key] = positions.get(key, 0) + 1
+    members = {}
+    for dept in tree:
+        if len(dept.role_categories['主管']) > 1:
+            problems.append(f"部门 {dept.department_id} 有多名主管")
+        for category, staff in dept.role_categories.items():
+            for person in staff:
+                if model.personnel_roster.get(person.employee_id) is not person:
+                    problems.append(f"部门 {dept.department_id} 中有不在花名册中的人员 {person.employee_id}")
+                key = (dept.department_id, category, person.employee_id)
+                members[key] = members.get(key, 0) + 1
+        # 同一职位名称后任命的人会覆盖 roles 中的条目，因此只要求 roles 中的每一项都有对应的任职
+        for title, person in dept.roles.items():
+            if (dept.department_id, title, person.employee_id) not in titles:
+                problems.append(f"部门 {dept.department_id} 的职位 {title} 没有对应的任职")
+    if members != positions:
+        problems.append("部门成员与人员任职不一致")
+    if model.person_index != PersonIndex.build(model.personnel_roster, model.position_index):
+        problems.append("人员二级索引与花名册不一致")
+    if model.department_names != DepartmentNameIndex.build(model.department_index.values()):
+        problems.append("部门名称索引与部门索引不一致")
+    if broken:
+        # 部门树已损坏，下面的统计量与区间编号检查无从进行
+        return problems
+
+    # 按后序重新计算子树统计量，与增量维护的结果比较
+    expected = {}
+    for dept in (root.iter_subtree('post') if root is not None else ()):
+        stats = {'departments': 1, 'headcount': 0, 'vacancies': 0 if dept.role_categories['主管'] else 1,
+                 'gender': {}, 'age': {}}
+        for category in ROLE_CATEGORIES:
+            for person in dept.role_categories[category]:
+                stats['headcount'] += 1
+                for kind, value in member_profile(person):
+                    stats[kind][value] = stats[kind].get(value, 0) + 1
+        for child in dept.children:
+            sub = expected[child.department_id]
+            for key in ('departments', 'headcount', 'vacancies'):
+                stats[key] += sub[key]
+            for kind in ('gender', 'age'):
+                for value, count in sub[kind].items():
+                    stats[kind][value] = stats[kind].get(value, 0) + count
+        expected[dept.department_id] = stats
+        if dept.subtree_stats() != stats:
+            problems.append(f"部门 {dept.department_id} 的子树统计量不正确")
+
+    # 区间编号：每个部门都有编号，子部门的区间依次排列在父部门的进入序号之后、离开序号之内；
+    # 任职索引须与按这些编号重新排序的任职相同
+    tour = model._tour
+    if tour is not None:
+        if tour.keys() != seen.keys():
+            problems.append("部门区间编号与部门树不一致")
+        else:
+            for dept in tree:
+                lo, hi = tour[dept.department_id]
+                end = lo
+                for child in dept.children:
+                    child_lo, child_hi = tour[child.department_id]
+                    if not end < child_lo <= child_hi <= hi:
+                        problems.append("部门区间编号与部门树不一致")
+                        break
+                    end = child_hi
+            if model._member_index != sorted((tour[dept.department_id][0], employee_id)
+                                             for employee_id, entries in model.position_index.items()
+                                             for dept, _, _ in entries):
+                problems.append("按区间编号排列的任职索引与任职不一致")
+    # 每个部门都位于其各级祖先的子树中，且不位于其子部门的子树中
+    for dept in tree:
+        if dept.parent is not None and not model.is_ancestor(dept.parent.department_id, dept.department_id):
+            problems.append(f"部门 {dept.department_id} 的区间编号错误")
+        for child in dept.children:
+            if model.is_ancestor(child.department_id, dept.department_id):
+                problems.append(f"部门 {child.department_id} 的区间编号错误")
+    return problems
@@ -1,20 +1,145 @@
 # controller.py
 
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, simpledialog
 from gui import AddDepartmentDialog, AddPersonDialog, AssignPersonDialog,AssignSearchDialog,DeletePersonDialog
+from gui import MoveDepartmentDialog
 from PersonDetailDialog import PersonDetailDialog
+import snapshot
+import bulk_import
+import instrumentation
+from background import BackgroundTask
+from journal import Journal, new_snapshot_meta, wait_for_compaction
+from OrgModelBase import UnsupportedOperation
+import csv
+import functools
+import logging
+import os
+
+logger = logging.getLogger('org.controller')
+
+# 后台任务进行期间轮询其进度的间隔（毫秒）
+_POLL_INTERVAL_MS = 100
+# 姓名查找最多显示的人数，只输入一个常见字时匹配的人可能很多
+SEARCH_RESULT_LIMIT = 500
+# 输入部门名称时下拉列表中最多列出的部门数
+SUGGESTION_LIMIT = 20
+# 操作日志落盘的最长间隔（毫秒）。每次修改只写入操作系统的缓存，不在界面线程中逐条 fsync；
+# 程序崩溃不会丢失已写入缓存的记录，只有断电或系统崩溃时可能丢失这段时间内的修改
+_JOURNAL_SYNC_MS = 1000
+
+
+def _blocked_while_busy(method):
+    """后台保存或加载进行期间拒绝修改操作，以免修改丢失或写进即将被替换的模型。"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._task is not None:
+            messagebox.showinfo("请稍候", f"正在{self._task.title}，请等待完成或取消后再操作。")
+            return False
+        return method(self, *args, **kwargs)
+    return wrapper
+
 
 class Controller:
     def __init__(self, model, view):
         self.model = model
         self.view = view
+        # 正在进行的后台保存或加载（BackgroundTask），同一时间至多一个
+        self._task = None
+        # 人员详情的缓存 {员工ID: ((模型版本, 人员版本), 详情字典)}。人员本身或其任职部门改变时，
+        # on_model_changed 递增该人员的版本；模型整体变化（加载、批量导入、删除部门）时递增模型版本
+        self._details_cache: dict[str, tuple[tuple[int, int], dict]] = {}
+        self._model_version = 0
+        self._person_versions: dict[str, int] = {}
+        # 是否已安排了一次操作日志落盘
+        self._journal_sync_pending = False
         self.view.set_controller(self)
+        # 模型的每次修改只同步到视图中对应的那一行，不再整体重建组织树
+        self.model.subscribe(self.on_model_changed)
         self.refresh_tree_view()
 
+    def on_model_changed(self, event, **data):
+        """把模型的变更事件转换为视图中的单行插入、删除或更新。"""
+        self._bump_versions(event, data)
+        self._schedule_journal_sync()
+        if event in ('department_added', 'department_moved', 'department_renamed', 'department_removed'):
+            department = data['department']
+            if event == 'department_added':
+                self.view.insert_department_row(self._department_node(department), department.parent.department_id)
+            elif event == 'department_moved':
+                self.view.move_department_row(self._department_node(department), department.parent.department_id)
+            elif event == 'department_renamed':
+                self.view.update_department_row(department.department_id, department.name)
+            else:
+                self.view.remove_department_row(department.department_id)
+        elif event in ('person_assigned', 'person_unassigned'):
+            # 只在变更的部门正好处于选中状态时刷新详情面板
+            department = data['department']
+            if self.view.get_selected_department_id() == department.department_id:
+                self.view.display_department_details(department.role_categories, department.roles)
+        elif event == 'bulk_imported':
+            # 批量导入不改变部门树，只需刷新一次当前部门的详情
+            dept_id = self.view.get_selected_department_id()
+            department = self.model.find_department(dept_id) if dept_id else None
+            if department:
+                self.view.display_department_details(department.role_categories, department.roles)
+
+    def _bump_versions(self, event: str, data: dict):
+        """按变更事件递增人员详情缓存的版本号，使受影响人员的缓存失效。"""
+        if event in ('person_assigned', 'person_unassigned', 'person_updated'):
+            self._bump_person(data['person'].employee_id)
+        elif event == 'person_removed':
+            self._details_cache.pop(data['employee_id'], None)
+            self._person_versions.pop(data['employee_id'], None)
+        elif event in ('department_renamed', 'department_moved'):
+            # 详情中列出了任职部门，该部门中任职的人员都要重新生成
+            for staff in data['department'].role_categories.values():
+                for person in staff:
+                    self._bump_person(person.employee_id)
+        elif event in ('department_removed', 'bulk_imported'):
+            # 被删部门的子部门与批量导入涉及的人员都不单独通知，只能整体失效
+            self._invalidate_details()
+
+    def _schedule_journal_sync(self):
+        """修改之后安排一次操作日志落盘，间隔内的多次修改合并为一次 fsync。"""
+        if not self._journal_sync_pending and self.model.journal is not None:
+            self._journal_sync_pending = True
+            self.view.after(_JOURNAL_SYNC_MS, self._sync_journal)
+
+    def _sync_journal(self):
+        self._journal_sync_pending = False
+        if self.model.journal is not None:
+            self.model.journal.sync_to_disk()
+
+    def _bump_person(self, employee_id: str):
+        self._person_versions[employee_id] = self._person_versions.get(employee_id, 0) + 1
+
+    def _invalidate_details(self):
+        """使全部人员详情缓存失效（如加载了新模型之后）。"""
+        self._model_version += 1
+        self._details_cache.clear()
+        self._person_versions.clear()
+
     def refresh_tree_view(self):
-        """从模型获取数据并刷新组织树视图。"""
-        root_data = self.model.root_department.to_dict()
-        self.view.refresh_department_tree(root_data)
+        """从模型获取根部门并刷新组织树视图，子部门由视图在展开时通过 get_department_children 获取。"""
+        root = self.model.root_department
+        self.view.refresh_department_tree(self._department_node(root) if root else None)
+
+    def get_department_children(self, dept_id: str) -> list:
+        """
+        获取部门的直接子部门，用于组织树展开时按需加载。
+        :param dept_id: 部门ID
+        :return: 子部门节点字典列表
+        """
+        department = self.model.find_department(dept_id)
+        if not department:
+            return []
+        return [self._department_node(child) for child in department.children]
+
+    @staticmethod
+    def _department_node(department) -> dict:
+        """组织树节点所需的最少信息：ID、名称以及是否有子部门。"""
+        return {'department_id': department.department_id, 'name': department.name,
+                'has_children': bool(department.children)}
 
     def on_department_select(self, event):
         """当用户在Treeview中选择一个部门时触发。"""
@@ -29,6 +154,7 @@ class Controller:
             self.view.display_department_details(None)
         self.view.show_status(f"已选择部门: {department.name if department else 'None'}")
 
+    @_blocked_while_busy
     def add_department(self):
         """处理添加部门的逻辑。"""
         parent_id = self.view.get_selected_department_id()
@@ -39,15 +165,16 @@ class Controller:
             parent_dept = self.model.find_department(parent_id)
             parent_name = parent_dept.name
 
-        dialog = AddDepartmentDialog(self.view, title="添加新部门", parent_name=parent_name)
+        dialog = AddDepartmentDialog(self.view, title="添加新部门", parent_name=parent_name,
+                                     suggest=self.suggest_department_names)
         if dialog.dept_name:
             new_dept = self.model.add_department(dialog.dept_name, parent_id)
             if new_dept:
-                self.refresh_tree_view()
                 self.view.show_status(f"成功添加部门: {new_dept.name}")
             else:
                 messagebox.showerror("错误", "添加部门失败！")
 
+    @_blocked_while_busy
     def add_person(self):
         """处理添加新人员的逻辑。"""
         dialog = AddPersonDialog(self.view, title="添加新人员")
@@ -64,6 +191,7 @@ class Controller:
             else:
                 messagebox.showerror("错误", f"员工ID '{data['员工ID']}' 已存在！")
 
+    @_blocked_while_busy
     def assign_person(self):
         """处理分配人员到部门的逻辑。"""
         dept_id = self.view.get_selected_department_id()
@@ -74,26 +202,105 @@ class Controller:
         department = self.model.find_department(dept_id)
         all_people = list(self.model.personnel_roster.values())
 
-        dialog = AssignPersonDialog(self.view, "分配职位", all_people, department.name)
+        dialog = AssignPersonDialog(self.view, "分配职位", all_people, department.name,
+                                    dept_id=dept_id, suggest=self.suggest_departments)
         if dialog.result:
             data = dialog.result
             if not all([data["employee_id"], data["role_category"], data["position_title"]]):
                 messagebox.showerror("错误", "所有字段都不能为空！")
                 return
+            department = self._resolve_department(data["department_id"], data["department_name"])
+            if department is None:
+                return
 
             success = self.model.assign_person_to_department(
                 data["employee_id"],
-                dept_id,
+                department.department_id,
                 data["role_category"],
                 data["position_title"]
             )
             if success:
                 self.view.show_status(f"职位分配成功！")
-                # 刷新部门详情
-                self.view.display_department_details(department.role_categories)
             else:
                 messagebox.showerror("错误", "职位分配失败，请检查控制台输出。")
 
+    def _resolve_department(self, department_id, department_name):
+        """
+        确定对话框中选择的部门：优先按部门ID查找；只输入了名称时，名称必须唯一。
+        :return: Department 对象，无法确定时提示错误并返回 None
+        """
+        department = self.model.find_department(department_id) if department_id else None
+        if department is not None:
+            return department
+        matches = self.model.find_departments_by_name(department_name)
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            messagebox.showerror("错误", f"有 {len(matches)} 个名为【{department_name}】的部门，请从下拉列表中选择。")
+        else:
+            messagebox.showerror("错误", f"未找到部门【{department_name}】。")
+        return None
+
+    def suggest_departments(self, prefix: str, limit: int = SUGGESTION_LIMIT) -> list:
+        """
+        名称以 prefix 开头的部门，供输入部门时的下拉列表使用。
+        :return: Department 对象列表，按名称排列
+        """
+        if not prefix:
+            return []
+        return self.model.departments_with_prefix(prefix, limit)
+
+    def suggest_department_names(self, prefix: str, limit: int = SUGGESTION_LIMIT) -> list:
+        """已有的以 prefix 开头的部门名称（同名部门只列一次），供新建部门时参考。"""
+        return list(dict.fromkeys(dept.name for dept in self.suggest_departments(prefix, limit)))
+
+    @_blocked_while_busy
+    def import_people(self):
+        """从 CSV 或 JSON Lines 文件批量导入人员与任职，并显示逐行的错误报告。"""
+        filepath = filedialog.askopenfilename(
+            title="批量导入人员与任职",
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl"), ("All files", "*.*")]
+        )
+        if not filepath:
+            return
+        try:
+            rows = bulk_import.read_rows(filepath)
+        except (OSError, ValueError, csv.Error) as e:
+            messagebox.showerror("错误", f"读取 {filepath} 失败: {e}")
+            return
+
+        report = self.model.bulk_import(rows)
+        summary = f"共 {report['total']} 行，成功导入 {report['imported']} 行，{len(report['errors'])} 行出错。"
+        self.view.show_status(summary)
+        if report['errors']:
+            # 只列出前若干条，避免对话框过长
+            shown = report['errors'][:20]
+            details = "\n".join(f"第 {e['row']} 行 ({e['employee_id'] or '无ID'}): {e['error']}" for e in shown)
+            if len(report['errors']) > len(shown):
+                details += f"\n…… 其余 {len(report['errors']) - len(shown)} 行略"
+            messagebox.showwarning("导入报告", f"{summary}\n\n{details}")
+        else:
+            messagebox.showinfo("导入报告", summary)
+
+    def show_metrics(self):
+        """显示各操作的调用次数与耗时统计，并可保存为 JSON 文件；统计未开启时询问是否开启。"""
+        if not instrumentation.is_enabled():
+            if messagebox.askyesno("性能统计", "性能统计尚未开启，是否现在开启？"):
+                instrumentation.enable()
+                self.view.show_status("性能统计已开启")
+            return
+        if messagebox.askyesno("性能统计", instrumentation.summary() + "\n\n是否将完整统计保存为 JSON 文件？"):
+            filepath = filedialog.asksaveasfilename(
+                title="保存统计数据",
+                defaultextension=".json",
+                filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            )
+            if filepath:
+                if instrumentation.dump(filepath):
+                    self.view.show_status(f"统计数据已保存到 {filepath}")
+                else:
+                    messagebox.showerror("错误", f"保存到 {filepath} 失败！")
+
     def search_person(self):
         """调出人员查看/搜索对话框。"""
         # 这个方法现在只负责打开主查找窗口
@@ -107,45 +314,166 @@ class Controller:
         return self.model.get_all_people()
 
 
-    def execute_person_search(self, name_to_search: str) -> list:
+    def execute_person_search(self, name_to_search: str, limit: int = SEARCH_RESULT_LIMIT) -> list:
         """
         执行员工搜索的核心逻辑。
-        此方法由视图(AssignSearchDialog)调用。
+        此方法由视图(AssignSearchDialog)调用。输入姓名的一部分即可，如 "三丰" 可以找到 "张三丰"。
 
-        :param name_to_search: 要搜索的员工姓名。
-        :return: 从模型返回的搜索结果列表。
+        :param name_to_search: 要搜索的姓名或其中的一段文字。
+        :param limit: 最多返回的人数。
+        :return: 按相关程度排列的 Person 对象列表（姓名完全相同的在前，其次是以该文字开头的）。
         """
         if not name_to_search:
             return []
 
         # 逻辑核心：调用模型的方法
-        search_results = self.model.find_person_by_name(name_to_search)
+        search_results = self.model.search_people(name_to_search, limit)
 
-
-        print(f"执行搜索，关键词: '{name_to_search}', 找到 {len(search_results)} 条记录。")
+        logger.debug("执行搜索，关键词: '%s', 找到 %d 条记录。", name_to_search, len(search_results))
 
         return search_results
+    @_blocked_while_busy
     def save_data(self):
+        """保存数据。写文件在后台线程中进行，期间界面可以浏览，但不能修改。"""
         filepath = filedialog.asksaveasfilename(
             title="保存数据文件",
             defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            filetypes=[("JSON files", "*.json"), ("Snapshot files", "*.orgs"), ("All files", "*.*")]
         )
-        if filepath:
-            self.model.save_to_file(filepath)
+        if not filepath:
+            return
+        journal = self.model.journal
+        if (journal is not None and not journal.failed
+                and os.path.abspath(journal.snapshot_path) == os.path.abspath(filepath)):
+            # 修改早已逐条追加到日志中，这里只需在后台把日志合并进快照
+            journal.compact()
+            self.view.show_status(f"数据已保存到 {filepath}")
+            return
+        try:
+            # 冻结版本是此刻数据的一致视图，后台线程写它的同时界面仍可读取模型
+            org = self.model.freeze()
+        except UnsupportedOperation:
+            # 不能冻结的模型（如 SqliteOrgModel，其数据库连接只能在创建它的线程中使用）仍在界面线程中保存
+            if Journal.create(self.model, filepath, sync=False):
+                self.view.show_status(f"数据已保存到 {filepath}")
+            else:
+                messagebox.showerror("错误", f"保存到 {filepath} 失败！")
+            return
+
+        meta = new_snapshot_meta()
+
+        def work(task):
+            with org:
+                # 覆盖的文件上可能还有未结束的压缩，其结果不能覆盖新保存的快照
+                wait_for_compaction(filepath)
+                return org.save_to_file(filepath, meta=meta, progress=task.report)
+
+        self._start_task(f"保存到 {filepath}", work, lambda task: self._save_finished(task, filepath, meta))
+
+    def _save_finished(self, task, filepath: str, meta: dict):
+        if task.cancelled:
+            # 保存先写临时文件，取消后原文件不变
+            self.view.show_status(f"已取消保存，{filepath} 未改变")
+        elif task.result:
+            # 保存期间修改被阻止，快照即为模型当前的内容，从此开始记录新的日志
+            Journal.start(self.model, filepath, meta, sync=False)
             self.view.show_status(f"数据已保存到 {filepath}")
+        elif task.error is None:
+            messagebox.showerror("错误", f"保存到 {filepath} 失败！")
 
+    @_blocked_while_busy
     def load_data(self):
+        """加载数据。解析文件和重建模型在后台线程中的新模型上进行，完成后在界面线程中一次性替换。"""
         filepath = filedialog.askopenfilename(
             title="加载数据文件",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            filetypes=[("JSON files", "*.json"), ("Snapshot files", "*.orgs"), ("All files", "*.*")]
         )
-        if filepath:
-            self.model.load_from_file(filepath)
+        if not filepath:
+            return
+        if snapshot.is_snapshot(filepath):
+            # 二进制快照可以只解码前几层部门，先把组织树显示出来再完整加载
+            with snapshot.SnapshotReader(filepath) as reader:
+                preview = reader.tree_dict(depth=1)
+            if preview:
+                self.view.refresh_department_tree(preview)
+
+        # 在后台线程中加载到一个新模型（SqliteOrgModel 为内存模型）上，完成后由 _install_model 替换
+        staging = self.model.staging_model()
+
+        def work(task):
+            model = staging
+            # 加载快照并重放其后的操作日志，之后的修改会继续追加到该日志中
+            if not Journal.open(model, filepath, sync=False, progress=task.report):
+                return None
+            return model
+
+        self._start_task(f"加载 {filepath}", work, lambda task: self._load_finished(task, filepath))
+
+    def _load_finished(self, task, filepath: str):
+        loaded = task.result
+        if task.cancelled or loaded is None:
+            if loaded is not None and loaded.journal is not None:
+                # 加载已完成但随后被取消：丢弃新模型
+                loaded.journal.close()
+            # 恢复加载前的组织树（快照预览可能已替换了它）
             self.refresh_tree_view()
-            self.view.display_department_details(None)  # Clear details panel
-            self.view.show_status(f"数据已从 {filepath} 加载")
+            if task.cancelled:
+                self.view.show_status(f"已取消加载 {filepath}")
+            elif task.error is None:
+                messagebox.showerror("错误", f"加载 {filepath} 失败！")
+            return
+        self._install_model(loaded)
+        self.view.display_department_details(None)  # Clear details panel
+        self.view.show_status(f"数据已从 {filepath} 加载")
+
+    def _install_model(self, loaded):
+        """在界面线程中用加载好的模型替换当前模型，并把变更通知改为来自新模型。"""
+        old = self.model
+        if old.journal is not None:
+            old.journal.close()
+            old.journal = None
+        # SqliteOrgModel 把数据写入数据库并继续使用自身，内存模型则换成新加载的模型
+        model = old.replaced_by(loaded)
+        if model is not old:
+            old.unsubscribe(self.on_model_changed)
+            model.subscribe(self.on_model_changed)
+            self.model = model
+        self._invalidate_details()
+        self.refresh_tree_view()
 
+    def _start_task(self, title: str, work, on_done):
+        """
+        在后台线程中执行 work(task)，并定时在界面线程中更新进度；结束后调用 on_done(task)。
+        :param title: 任务名称，如 "保存到 data.json"
+        """
+        self._task = BackgroundTask(title, work).start()
+        self.view.show_status(f"正在{title} ...")
+        self.view.show_progress(-1)
+        self.view.after(_POLL_INTERVAL_MS, self._poll_task, on_done)
+
+    def _poll_task(self, on_done):
+        task = self._task
+        if not task.done:
+            fraction = task.fraction()
+            if fraction is not None:
+                self.view.show_progress(fraction)
+                if not task.cancelled:
+                    self.view.show_status(f"正在{task.title} ... {fraction:.0%}")
+            self.view.after(_POLL_INTERVAL_MS, self._poll_task, on_done)
+            return
+        self._task = None
+        self.view.show_progress(None)
+        if task.error is not None:
+            messagebox.showerror("错误", f"{task.title}失败: {task.error}")
+        on_done(task)
+
+    def cancel_task(self):
+        """取消正在进行的后台保存或加载。"""
+        if self._task is not None and not self._task.cancelled:
+            self._task.cancel()
+            self.view.show_status(f"正在取消{self._task.title} ...")
+
+    @_blocked_while_busy
     def delete_person(self):
         """处理删除新人员的逻辑。"""
         dialog = DeletePersonDialog(self.view, title="删除人员")
@@ -157,21 +485,63 @@ class Controller:
 
             success = self.model.delete_person(data)
             if success:
+                # 部门详情面板由 person_unassigned 事件刷新
                 self.view.show_status(f"成功删除人员: {data}")
+            else:
+                messagebox.showerror("错误", f"员工ID '{data}' 不存在！")
 
-                ##清空详情面板
-                self.view.display_department_details(None)
+    @_blocked_while_busy
+    def rename_department(self):
+        """处理部门重命名的逻辑。"""
+        dept_id = self.view.get_selected_department_id()
+        if not dept_id:
+            messagebox.showwarning("提示", "请先在组织结构树中选择一个部门！")
+            return
 
-                current_dept_id = self.view.get_selected_department_id()
-                if current_dept_id:
-                    # 从模型中获取该部门更新后的数据
-                    department = self.model.find_department(current_dept_id)
-                    if department:
-                        # 命令视图使用新数据刷新部门详情列表
-                        self.view.display_department_details(department.role_categories)
+        department = self.model.find_department(dept_id)
+        new_name = simpledialog.askstring("重命名部门", f"部门 '{department.name}' 的新名称:",
+                                          initialvalue=department.name, parent=self.view)
+        if new_name:
+            if self.model.rename_department(dept_id, new_name):
+                self.view.show_status(f"部门已重命名为: {new_name}")
             else:
-                messagebox.showerror("错误", f"员工ID '{data}' 不存在！")
+                messagebox.showerror("错误", "重命名部门失败！")
+
+    @_blocked_while_busy
+    def move_department(self):
+        """处理移动部门的逻辑：把选中的部门移到从下拉列表中选择的部门之下。"""
+        dept_id = self.view.get_selected_department_id()
+        if not dept_id:
+            messagebox.showwarning("提示", "请先在组织结构树中选择一个部门！")
+            return
+        department = self.model.find_department(dept_id)
+        if department.parent is None:
+            messagebox.showwarning("提示", "根部门不能移动！")
+            return
 
+        dialog = MoveDepartmentDialog(self.view, "移动部门", department.name,
+                                      suggest=functools.partial(self.suggest_move_targets, dept_id))
+        if dialog.target_id:
+            if self.model.move_department(dept_id, dialog.target_id):
+                self.view.show_status(f"成功移动部门: {department.name}")
+            else:
+                messagebox.showerror("错误", "移动部门失败！")
+
+    def suggest_move_targets(self, dept_id: str, prefix: str, limit: int = SUGGESTION_LIMIT) -> list:
+        """
+        名称以 prefix 开头、可以作为 dept_id 新上级的部门：不是它自身或它的下级部门，也不是它现在的上级。
+        :return: Department 对象列表，按名称排列
+        """
+        parent_id = self.model.find_department(dept_id).parent.department_id
+        targets = []
+        for candidate in self.model.departments_with_prefix(prefix):
+            if candidate.department_id != parent_id and not self.model.is_ancestor(dept_id, candidate.department_id):
+                targets.append(candidate)
+                if len(targets) == limit:
+                    break
+        return targets
+
+    @_blocked_while_busy
     def delete_department(self):
         """处理删除部门的逻辑。"""
         dept_id = self.view.get_selected_department_id()
@@ -189,8 +559,7 @@ class Controller:
         if is_confirmed:
             success = self.model.delete_department(dept_id)
             if success:
-                #更新可视化界面
-                self.refresh_tree_view()
+                self.view.display_department_details(None)
                 self.view.show_status(f"成功删除部门: {department_name}")
             else:
                 messagebox.showerror("错误", f"删除部门 '{department_name}' 失败！")
@@ -218,25 +587,39 @@ class Controller:
 
     def get_person_details_by_id(self, employee_id: str) -> dict | None:
         """
-        根据员工ID获取其格式化后的详细信息。
+        根据员工ID获取其格式化后的详细信息。该人员及其任职部门自上次取得以来没有变化时直接使用缓存，O(1)；
+        否则重新生成，代价与该人员的任职数成正比。
         :param employee_id: 员工ID
         :return: 包含员工信息的字典，或 None
         """
+        # 先取版本再生成详情：生成期间其他线程的修改会递增版本，下次取得时重新生成
+        version = (self._model_version, self._person_versions.get(employee_id, 0))
+        cached = self._details_cache.get(employee_id)
+        if cached is not None and cached[0] == version:
+            return self._copy_details(cached[1])
+
         person = self.model.get_person(employee_id)
         if not person:
             return None
 
-        # 使用模型中的 find_person_by_name 方法来获取格式化好的信息
-        # 因为它已经处理好了将部门对象转为名称的逻辑
-        all_people_info = self.model.find_person_by_name(person.name)
-
-        person_details = None
-        for info in all_people_info:
-            if info['employee_id'] == employee_id:
-                person_details = info
-                break
-        return person_details
-
+        assignments = list(person.assigment)
+        person_details = person.get_info()
+        # 为了显示清晰，将 assigment 中的对象转换为名称
+        person_details['assigment'] = [(dept.name, pos) for dept, pos in assignments]
+        # 与 assigment 一一对应的部门ID，卸任职位时据此区分同名部门
+        person_details['department_ids'] = [dept.department_id for dept, _ in assignments]
+        self._details_cache[employee_id] = (version, person_details)
+        return self._copy_details(person_details)
+
+    @staticmethod
+    def _copy_details(person_details: dict) -> dict:
+        """缓存详情的副本，其中的列表也被复制，调用方修改返回值不会影响缓存。"""
+        details = dict(person_details)
+        details['assigment'] = list(details['assigment'])
+        details['department_ids'] = list(details['department_ids'])
+        return details
+
+    @_blocked_while_busy
     def update_person_info(self, employee_id: str, new_data: dict) -> bool:
         """
         用于更新员工信息。
@@ -244,16 +627,10 @@ class Controller:
         """
         return self.model.update_person_info(employee_id, new_data)
 
-    def remove_person_assignment(self, employee_id: str, dept_name: str, position_title: str) -> bool:
+    @_blocked_while_busy
+    def remove_person_assignment(self, employee_id: str, department_id: str, position_title: str) -> bool:
         """
-        用于移除员工在某个部门中的职位。
+        用于移除员工在某个部门中的职位。部门按ID指定，同名的其他部门不受影响。
         """
-        success = self.model.remove_person_assignment(employee_id, dept_name, position_title)
-        if success:
-            # 职位移除成功后，需要刷新主界面上可能显示的部门详情
-            current_dept_id = self.view.get_selected_department_id()
-            if current_dept_id:
-                department = self.model.find_department(current_dept_id)
-                if department:
-                    self.view.display_department_details(department.role_categories, department.roles)
-        return success
\ No newline at end of file
+        # 主界面上的部门详情由 person_unassigned 事件刷新
+        return self.model.remove_assignment(employee_id, department_id, position_title)
\ No newline at end of file
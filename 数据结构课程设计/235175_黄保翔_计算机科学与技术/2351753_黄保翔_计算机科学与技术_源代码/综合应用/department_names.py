@@ -0,0 +1,83 @@
+'''部门名称索引'''
+# department_names.py
+#
+# 部门名称 -> 部门ID 的一对多映射。不同部门可以同名（如各学院都有“办公室”），
+# 按名称查找时全部列出，由调用方按部门ID区分。另保存按字符顺序排好的不同名称，
+# 输入部门名称时的前缀补全因此是一次二分查找，O(log 名称数 + 结果数)。
+# 由 OrgModel 在添加、改名、删除部门以及加载文件时维护。
+
+from bisect import bisect_left, insort
+
+
+class DepartmentNameIndex:
+    """部门名称 -> 部门ID（按加入索引的先后排列），以及排好序的名称列表。"""
+
+    __slots__ = ('_ids', '_names')
+
+    def __init__(self):
+        self._ids: dict[str, dict[str, None]] = {}
+        self._names: list[str] = []
+
+    @classmethod
+    def build(cls, departments):
+        """
+        由部门一次性建立索引（加载文件时使用），O(n log n)。
+        :param departments: Department 对象的可迭代对象
+        """
+        index = cls()
+        for dept in departments:
+            if isinstance(dept.name, str):
+                index._ids.setdefault(dept.name, {})[dept.department_id] = None
+        index._names = sorted(index._ids)
+        return index
+
+    def add(self, name, department_id: str):
+        if not isinstance(name, str):
+            return
+        ids = self._ids.get(name)
+        if ids is None:
+            ids = self._ids[name] = {}
+            insort(self._names, name)
+        ids[department_id] = None
+
+    def remove(self, name, department_id: str):
+        ids = self._ids.get(name)
+        if ids is None:
+            return
+        ids.pop(department_id, None)
+        if not ids:
+            del self._ids[name]
+            del self._names[bisect_left(self._names, name)]
+
+    def ids(self, name: str) -> list:
+        """名称为 name 的所有部门ID。"""
+        return list(self._ids.get(name, ()))
+
+    def ids_with_prefix(self, prefix: str, limit: int = None) -> list:
+        """
+        名称以 prefix 开头的部门ID，按名称的字符顺序排列，同名的按加入索引的先后排列。
+        :param limit: 最多返回的部门数，默认不限
+        """
+        found = []
+        if limit is not None and limit <= 0:
+            return found
+        names = self._names
+        for i in range(bisect_left(names, prefix), len(names)):
+            name = names[i]
+            if not name.startswith(prefix):
+                break
+            for department_id in self._ids[name]:
+                found.append(department_id)
+                if len(found) == limit:
+                    return found
+        return found
+
+    def __eq__(self, other):
+        """两个索引包含相同的名称与部门（同名部门的先后不计），用于一致性检查。"""
+        if not isinstance(other, DepartmentNameIndex):
+            return NotImplemented
+        return (self._names == other._names
+                and {name: set(ids) for name, ids in self._ids.items()}
+                == {name: set(ids) for name, ids in other._ids.items()})
+
+    __hash__ = None
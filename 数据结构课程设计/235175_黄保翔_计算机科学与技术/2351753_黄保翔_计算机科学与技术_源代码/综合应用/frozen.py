@@ -0,0 +1,314 @@
+'''组织模型的只读冻结版本'''
+# frozen.py
+#
+# OrgModel.freeze() 在 O(1) 时间内返回一个 FrozenOrg：它只记住当时的根部门、花名册和部门索引，
+# 不复制任何对象。此后模型每次修改部门或人员之前，先把这些对象修改前的状态交给每个仍然存活的
+# FrozenOrg 保存（写时复制）：被修改的部门连同其祖先链（统计量沿祖先链变化）以及受影响的人员，
+# 每个对象在每个 FrozenOrg 中最多保存一次。
+# FrozenOrg 读取对象时优先使用保存下来的旧状态；没有保存过的对象自冻结以来没有变化，直接读取当前对象。
+# 因此保存、导出、统计等只读操作可以在后台线程中基于一个一致的版本进行，编辑不必等待它们结束。
+#
+#     with model.freeze() as org:
+#         org.save_to_file('backup.json')
+#
+# 唯一的例外是花名册的顺序：冻结后第一次删除人员时，会复制一次当时的员工ID顺序（O(人员数)），
+# 以便已删除的人员仍按原位置输出。
+
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from Department import Department
+from Person import Person
+from OrgModel import OrgModel
+
+
+def department_state(dept) -> tuple:
+    """部门的可冻结状态：(名称, 父部门ID, 子部门ID, roles, role_categories, 子树统计)，其中人员以ID表示。"""
+    parent = dept.parent
+    return (
+        dept.name,
+        parent.department_id if parent is not None else None,
+        tuple(child.department_id for child in dept.children),
+        tuple((title, person.employee_id) for title, person in dept.roles.items()),
+        tuple((category, tuple(person.employee_id for person in staff))
+              for category, staff in dept.role_categories.items()),
+        dept.subtree_stats(),
+    )
+
+
+def person_state(person, positions) -> tuple:
+    """
+    人员的可冻结状态：(姓名, 年龄, 性别, 电话, 任职)，其中任职为 (部门ID, 职位类别, 职位名称)。
+    :param positions: 该人员在任职索引中的条目 [(部门, 职位类别, 职位名称), ...]
+    """
+    return (person.name, person.age, person.gender, person.phone_number,
+            tuple((dept.department_id, category, title) for dept, category, title in positions))
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("冻结版本中的对象是只读的")
+
+
+class _FrozenDepartment(Department):
+    """FrozenOrg 中的只读部门。父部门、子部门和人员在第一次访问时才生成。"""
+
+    def __init__(self, org, department_id, state):
+        # 不调用基类构造函数：parent、children 等由下面的属性按冻结状态提供
+        name, self._parent_id, self._child_ids, self._role_ids, self._category_ids, self._stats = state
+        self.department_id = department_id
+        self.name = name
+        self._org = org
+        self._children = None
+        self._roles = None
+        self._role_categories = None
+
+    @property
+    def parent(self):
+        return self._org.find_department(self._parent_id) if self._parent_id is not None else None
+
+    @property
+    def children(self):
+        if self._children is None:
+            self._children = [self._org.find_department(dept_id) for dept_id in self._child_ids]
+        return self._children
+
+    @property
+    def roles(self):
+        if self._roles is None:
+            self._roles = {title: self._org.get_person(employee_id) for title, employee_id in self._role_ids}
+        return MappingProxyType(self._roles)
+
+    @property
+    def role_categories(self):
+        if self._role_categories is None:
+            self._role_categories = {
+                category: tuple(self._org.get_person(employee_id) for employee_id in employee_ids)
+                for category, employee_ids in self._category_ids}
+        return MappingProxyType(self._role_categories)
+
+    @property
+    def subtree_size(self) -> int:
+        return self._stats['departments']
+
+    @property
+    def headcount(self) -> int:
+        return self._stats['headcount']
+
+    @property
+    def vacancies(self) -> int:
+        return self._stats['vacancies']
+
+    def subtree_stats(self) -> dict:
+        return {key: dict(value) if isinstance(value, dict) else value for key, value in self._stats.items()}
+
+    def member_count(self) -> int:
+        return sum(len(employee_ids) for _, employee_ids in self._category_ids)
+
+    add_member = add_members = remove_member = set_role = remove_role = _read_only
+    add_child = remove_child = recount_subtree = retally_member = _read_only
+
+
+class _FrozenPerson(Person):
+    """FrozenOrg 中的只读人员。任职列表在第一次访问时才生成。"""
+
+    def __init__(self, org, employee_id, state):
+        name, age, gender, phone_number, self._assignment_ids = state
+        self._org = org
+        self._assigment = None
+        super().__init__(employee_id, name, age, gender, phone_number, None)
+
+    @property
+    def assigment(self):
+        if self._assigment is None:
+            self._assigment = [(self._org.find_department(dept_id), title)
+                               for dept_id, _, title in self._assignment_ids]
+        return self._assigment
+
+    @assigment.setter
+    def assigment(self, value):
+        # 只在基类构造函数中被调用，任职取自冻结状态
+        pass
+
+    def to_dict(self, categories=None):
+        # 冻结状态中已是部门ID与职位类别，无需生成部门对象
+        return {
+            "employee_id": self.employee_id,
+            "name": self.name,
+            "age": self.age,
+            "gender": self.gender,
+            "phone_number": self.phone_number,
+            "assigment": [{'department_id': dept_id, 'position': title, 'role_category': category}
+                          for dept_id, category, title in self._assignment_ids]
+        }
+
+    add_assigment = _read_only
+
+
+class _FrozenRoster(Mapping):
+    """冻结版本的花名册：以 employee_id 为键的只读映射，保持冻结时的顺序。"""
+
+    def __init__(self, org):
+        self._org = org
+
+    def __getitem__(self, employee_id):
+        person = self._org.get_person(employee_id)
+        if person is None:
+            raise KeyError(employee_id)
+        return person
+
+    def __contains__(self, employee_id):
+        return self._org.get_person(employee_id) is not None
+
+    def __iter__(self):
+        return self._org._iter_employee_ids()
+
+    def __len__(self):
+        return sum(1 for _ in self._org._iter_employee_ids())
+
+
+class FrozenOrg:
+    """
+    某一时刻的组织模型的只读版本，由 OrgModel.freeze() 创建。
+    提供与 OrgModel 相同的只读接口（root_department、personnel_roster、get_person、find_department、
+    department_stats、find_person_by_name、get_all_people、supervisor_chain、save_to_file），可在任意线程中使用。
+    用完后调用 release()（或使用 with 语句），模型此后的修改就不再为它保存旧状态。
+    """
+
+    def __init__(self, model, lock: threading.Lock):
+        """
+        :param model: 被冻结的 OrgModel
+        :param lock: 模型保存旧状态时持有的锁；读取当前对象时也持有它，保证读到的是完整的状态
+        """
+        self._model = model
+        self._lock = lock
+        root = model.root_department
+        self._root_id = root.department_id if root is not None else None
+        self._roster = model.personnel_roster
+        self._index = model.department_index
+        self._positions = model.position_index
+        # 修改前保存下来的状态 {ID: 状态}
+        self._departments: dict[str, tuple] = {}
+        self._people: dict[str, tuple] = {}
+        # 冻结后才新增的部门和人员的ID，在本版本中不存在
+        self._added_departments: set[str] = set()
+        self._added_people: set[str] = set()
+        # 第一次删除人员前复制的员工ID顺序
+        self._roster_order: list[str] | None = None
+        # 已生成的只读对象 {ID: 对象}
+        self._department_views: dict[str, _FrozenDepartment] = {}
+        self._person_views: dict[str, _FrozenPerson] = {}
+
+    # --- 由 OrgModel 在修改之前调用（调用方已持有锁） ---
+
+    def _keep(self, departments=(), people=(), added_departments=(), added_people=(), removing_people=False):
+        """保存即将被修改的部门和人员的当前状态，并登记新增的对象。"""
+        kept, added = self._departments, self._added_departments
+        for dept in departments:
+            dept_id = dept.department_id
+            if dept_id not in kept and dept_id not in added:
+                kept[dept_id] = department_state(dept)
+        kept, added = self._people, self._added_people
+        for person in people:
+            employee_id = person.employee_id
+            if employee_id not in kept and employee_id not in added:
+                kept[employee_id] = self._person_state(person)
+        self._added_departments.update(added_departments)
+        self._added_people.update(added_people)
+        if removing_people and self._roster_order is None:
+            self._roster_order = list(self._roster)
+
+    # --- 读取 ---
+
+    def _state(self, kept: dict, added: set, live: dict, key: str, freeze) -> tuple | None:
+        with self._lock:
+            state = kept.get(key)
+            if state is None and key not in added:
+                obj = live.get(key)
+                if obj is not None:
+                    state = freeze(obj)
+        return state
+
+    def find_department(self, department_id: str, start_node=None) -> Department | None:
+        """
+        按ID查找冻结版本中的部门。
+        :param start_node: 指定时只返回位于该部门子树中的部门
+        """
+        dept = self._department_views.get(department_id)
+        if dept is None:
+            state = self._state(self._departments, self._added_departments, self._index,
+                                department_id, department_state)
+            if state is None:
+                return None
+            dept = self._department_views.setdefault(department_id,
+                                                     _FrozenDepartment(self, department_id, state))
+        if start_node is None:
+            return dept
+        node = dept
+        while node is not None:
+            if node is start_node:
+                return dept
+            node = node.parent
+        return None
+
+    def get_person(self, employee_id: str) -> Person | None:
+        """按员工ID查找冻结版本中的人员。"""
+        person = self._person_views.get(employee_id)
+        if person is None:
+            state = self._state(self._people, self._added_people, self._roster, employee_id, self._person_state)
+            if state is None:
+                return None
+            person = self._person_views.setdefault(employee_id, _FrozenPerson(self, employee_id, state))
+        return person
+
+    def _person_state(self, person) -> tuple:
+        return person_state(person, self._positions.get(person.employee_id, ()))
+
+    def assignment_categories(self, person) -> list:
+        """与 person.assigment 一一对应的职位类别，取自冻结状态。"""
+        return [category for _, category, _ in person._assignment_ids]
+
+    def _iter_employee_ids(self):
+        """按冻结时的花名册顺序产生员工ID。"""
+        with self._lock:
+            order = self._roster_order if self._roster_order is not None else list(self._roster)
+            kept, added = set(self._people), set(self._added_people)
+        roster = self._roster
+        for employee_id in order:
+            if employee_id in kept or (employee_id not in added and employee_id in roster):
+                yield employee_id
+
+    @property
+    def personnel_roster(self) -> Mapping:
+        return _FrozenRoster(self)
+
+    @property
+    def root_department(self) -> Department | None:
+        return self.find_department(self._root_id) if self._root_id is not None else None
+
+    department_stats = OrgModel.department_stats
+    find_person_by_name = OrgModel.find_person_by_name
+    get_all_people = OrgModel.get_all_people
+    supervisor_chain = OrgModel.supervisor_chain
+    save_to_file = OrgModel.save_to_file
+
+    def _people_named(self, name: str):
+        # 冻结版本没有姓名索引，逐个比较
+        return [person for person in self.personnel_roster.values() if person.name == name]
+
+    # --- 生命周期 ---
+
+    def release(self):
+        """停止为本版本保存旧状态。释放后不应再读取本版本。"""
+        model, self._model = self._model, None
+        if model is not None:
+            model._release_frozen(self)
+        # 只读对象与本版本互相引用，清空缓存以便及时回收
+        self._department_views.clear()
+        self._person_views.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,66 @@
+'''合成组织生成器'''
+# generator.py
+#
+# 通过模型的公共方法构造可复现的合成组织，供基准测试和压力测试使用。
+# 相同的参数与随机数种子总是生成完全相同的组织（部门ID、人员ID、任职都相同）。
+
+import random
+
+from Department import ROLE_CATEGORIES
+
+# 非首位任职者的职位类别：副主管与其他人员按 1:2 抽取
+_OTHER_CATEGORIES = (ROLE_CATEGORIES[1], ROLE_CATEGORIES[2], ROLE_CATEGORIES[2])
+
+
+def generate(model, people: int = 1000, depth: int = 4, fanout: int = 5, departments: int = None,
+             assignments_per_person: int = 1, seed: int = 1, on_departments_built=None) -> list:
+    """
+    在 model 中生成一个合成组织：部门树按层展开，每个部门有 fanout 个子部门，
+    共 depth 层（根部门为第 0 层），若给出 departments 则部门总数达到该值即停止；
+    随后添加 people 名人员，每人在 assignments_per_person 个不同的随机部门中任职。
+    每个部门的第一位任职者担任主管，其余为副主管或其他人员。
+    :param model: 空的 OrgModel 或 SqliteOrgModel
+    :param depth: 部门树层数上限（不含根部门）
+    :param fanout: 每个部门的子部门数
+    :param departments: 部门总数上限（含根部门），默认只受 depth 限制
+    :param assignments_per_person: 每名人员的任职数，不超过部门总数
+    :param seed: 随机数种子
+    :param on_departments_built: 部门建好、开始添加人员前调用的回调
+    :return: 按建立顺序排列的部门ID列表（含根部门）
+    """
+    rng = random.Random(seed)
+    root_id = model.root_department.department_id
+    dept_ids = [root_id]
+    limit = departments if departments is not None else float('inf')
+    # 按层展开：level 为当前层的部门ID
+    level = [root_id]
+    for _ in range(depth):
+        next_level = []
+        for parent_id in level:
+            for _ in range(fanout):
+                if len(dept_ids) >= limit:
+                    break
+                dept_id = f"d{len(dept_ids)}"
+                model.add_department(f"部门{len(dept_ids) % 500}", parent_id, department_id=dept_id)
+                dept_ids.append(dept_id)
+                next_level.append(dept_id)
+        level = next_level
+        if not level or len(dept_ids) >= limit:
+            break
+    if on_departments_built is not None:
+        on_departments_built()
+
+    per_person = min(assignments_per_person, len(dept_ids))
+    has_head = set()
+    for i in range(people):
+        employee_id = f"e{i}"
+        model.add_person(employee_id, f"员工{i % 1000}", str(20 + i % 40), "男女"[i % 2], str(13000000000 + i))
+        targets = rng.sample(dept_ids, per_person) if per_person != 1 else (rng.choice(dept_ids),)
+        for dept_id in targets:
+            if dept_id in has_head:
+                category = rng.choice(_OTHER_CATEGORIES)
+            else:
+                category = ROLE_CATEGORIES[0]
+                has_head.add(dept_id)
+            model.assign_person_to_department(employee_id, dept_id, category, f"职位{i % 50}")
+    return dept_ids
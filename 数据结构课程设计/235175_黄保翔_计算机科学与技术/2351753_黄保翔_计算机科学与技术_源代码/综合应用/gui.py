@@ -8,11 +8,16 @@ from tkinter.simpledialog import Dialog
 class MainApplication(tk.Frame):
     """主视图类，构建所有UI组件。"""
 
+    # 未加载子部门的节点下放置的占位节点标签
+    _PLACEHOLDER = "placeholder"
+
     def __init__(self, master=None):
         super().__init__(master)
         self.master = master
         self.pack(fill="both", expand=True)
         self.controller = None
+        # 已加载过子节点的部门ID（按加载顺序）
+        self._loaded_nodes: dict[str, bool] = {}
         self._create_widgets()
 
     def set_controller(self, controller):
@@ -20,6 +25,7 @@ class MainApplication(tk.Frame):
         self.controller = controller
         # 绑定 Treeview 的选择事件
         self.tree.bind("<<TreeviewSelect>>", self.controller.on_department_select)
+        self.tree.bind("<<TreeviewOpen>>", self._on_tree_open)
 
     def _create_widgets(self):
         # --- Top Control Frame ---
@@ -29,11 +35,15 @@ class MainApplication(tk.Frame):
         ttk.Button(control_frame, text="添加部门", command=lambda: self.controller.add_department()).pack(side="left",padx=2)
         ttk.Button(control_frame, text="添加人员", command=lambda: self.controller.add_person()).pack(side="left",padx=2)
         ttk.Button(control_frame, text="分配职位", command=lambda: self.controller.assign_person()).pack(side="left", padx=2)
+        ttk.Button(control_frame, text="批量导入", command=lambda: self.controller.import_people()).pack(side="left", padx=2)
         ttk.Button(control_frame, text="查找人员", command=lambda: self.controller.search_person()).pack(side="left", padx=2)
+        ttk.Button(control_frame, text="重命名部门", command=lambda: self.controller.rename_department()).pack(side="left",padx=2)
+        ttk.Button(control_frame, text="移动部门", command=lambda: self.controller.move_department()).pack(side="left",padx=2)
         ttk.Button(control_frame, text="删除部门", command=lambda: self.controller.delete_department()).pack(side="left",padx=2)
         ttk.Button(control_frame, text="删除人员", command=lambda: self.controller.delete_person()).pack(side="left",padx=2)
         ttk.Button(control_frame, text="保存数据", command=lambda: self.controller.save_data()).pack(side="left",padx=2)
         ttk.Button(control_frame, text="加载数据", command=lambda: self.controller.load_data()).pack(side="left", padx=2)
+        ttk.Button(control_frame, text="性能统计", command=lambda: self.controller.show_metrics()).pack(side="left", padx=2)
 
         # --- Main Paned Window (Resizable) ---
         main_pane = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
@@ -71,29 +81,134 @@ class MainApplication(tk.Frame):
         dept_tab.columnconfigure(0, weight=1)
 
         # --- Status Bar ---
+        status_frame = ttk.Frame(self)
+        status_frame.pack(side="bottom", fill="x")
         self.status_var = tk.StringVar(value="准备就绪")
-        status_bar = ttk.Label(self, textvariable=self.status_var, relief=tk.SUNKEN, anchor='w')
-        status_bar.pack(side="bottom", fill="x")
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor='w')
+        status_bar.pack(side="left", fill="x", expand=True)
+        # 后台保存、加载期间才显示的进度条与取消按钮
+        self.cancel_button = ttk.Button(status_frame, text="取消", command=lambda: self.controller.cancel_task())
+        self.progress_bar = ttk.Progressbar(status_frame, length=160, maximum=1.0)
 
     def show_status(self, message):
         """更新状态栏信息。"""
         self.status_var.set(message)
 
+    def show_progress(self, fraction):
+        """
+        在状态栏中显示后台任务的进度条和取消按钮。
+        :param fraction: 0~1 之间的进度；总量未知时为 -1（来回滚动）；为 None 时隐藏进度条
+        """
+        if fraction is None:
+            self.progress_bar.stop()
+            self.progress_bar.pack_forget()
+            self.cancel_button.pack_forget()
+            return
+        if not self.progress_bar.winfo_manager():
+            self.cancel_button.pack(side="right", padx=2)
+            self.progress_bar.pack(side="right", padx=2)
+        if fraction < 0:
+            if str(self.progress_bar['mode']) != 'indeterminate':
+                self.progress_bar.configure(mode='indeterminate')
+                self.progress_bar.start()
+        else:
+            if str(self.progress_bar['mode']) != 'determinate':
+                self.progress_bar.stop()
+                self.progress_bar.configure(mode='determinate')
+            self.progress_bar['value'] = fraction
+
     def refresh_department_tree(self, root_department_data):
-        """清空并用新数据刷新组织结构树。"""
-        for i in self.tree.get_children():
-            self.tree.delete(i)
+        """
+        清空并用新数据刷新组织结构树。只插入根部门及已展开的层级，其余子部门在展开时才加载；
+        刷新前已展开的节点和选中的节点在刷新后保持不变。
+        :param root_department_data: 根部门节点字典，含 department_id、name，
+                                     以及 children（已知的子节点列表）或 has_children（是否有子部门）
+        """
+        loaded = [iid for iid in self._loaded_nodes if self.tree.exists(iid)]
+        opened = {iid for iid in loaded if self.tree.item(iid, 'open')}
+        selection = self.tree.selection()
 
-        self._populate_tree(root_department_data, "")
+        self.tree.delete(*self.tree.get_children())
+        self._loaded_nodes = {}
+        if not root_department_data:
+            return
+        self._insert_department(root_department_data, "")
+
+        # 按原先的加载顺序（父节点总在子节点之前）重新加载子节点，恢复展开状态
+        for iid in loaded:
+            if self.tree.exists(iid):
+                self._load_children(iid)
+                self.tree.item(iid, open=iid in opened)
+        selection = [iid for iid in selection if self.tree.exists(iid)]
+        if selection:
+            self.tree.selection_set(selection)
+            self.tree.see(selection[0])
+
+    def _insert_department(self, department_data, parent_id):
+        """插入一个部门节点；预先给出的子节点一并插入，否则按需放置占位子节点。"""
+        stack = [(department_data, parent_id)]
+        while stack:
+            data, parent = stack.pop()
+            dept_id = data['department_id']
+            self.tree.insert(parent, "end", iid=dept_id, text=dept_id, values=(data['name'],))
+            if 'children' in data:
+                self._loaded_nodes[dept_id] = True
+                stack.extend((child, dept_id) for child in reversed(data['children']))
+            elif data.get('has_children'):
+                # 占位子节点让该部门显示展开标记，展开时再替换为真实的子部门
+                self.tree.insert(dept_id, "end", text="...", tags=(self._PLACEHOLDER,))
+
+    def _load_children(self, dept_id):
+        """将部门的占位子节点替换为真实的子部门（已加载过则不做任何事）。"""
+        if dept_id in self._loaded_nodes:
+            return
+        self._loaded_nodes[dept_id] = True
+        self.tree.delete(*self.tree.get_children(dept_id))
+        for child_data in self.controller.get_department_children(dept_id):
+            self._insert_department(child_data, dept_id)
 
-    def _populate_tree(self, department_data, parent_id):
-        """递归填充组织树的辅助函数。"""
-        dept_id = department_data['department_id']
-        dept_name = department_data['name']
-        self.tree.insert(parent_id, "end", iid=dept_id, text=dept_id, values=(dept_name,))
+    def _on_tree_open(self, event):
+        """展开节点时加载其子部门。"""
+        self._load_children(self.tree.focus())
 
-        for child_data in department_data['children']:
-            self._populate_tree(child_data, dept_id)
+    def insert_department_row(self, department_data, parent_id):
+        """
+        在父部门下插入一个新的部门行。父部门的子节点尚未加载时只确保其显示展开标记。
+        :param department_data: 部门节点字典，格式同 refresh_department_tree
+        :param parent_id: 父部门ID
+        """
+        if not self.tree.exists(parent_id):
+            return
+        if parent_id in self._loaded_nodes:
+            self._insert_department(department_data, parent_id)
+        elif not self.tree.get_children(parent_id):
+            self.tree.insert(parent_id, "end", text="...", tags=(self._PLACEHOLDER,))
+
+    def remove_department_row(self, dept_id):
+        """删除一个部门行（连同其下的所有行）。"""
+        if not self.tree.exists(dept_id):
+            return
+        # 被删除的行及其子孙都不再算作已加载
+        stack = [dept_id]
+        while stack:
+            iid = stack.pop()
+            self._loaded_nodes.pop(iid, None)
+            stack.extend(self.tree.get_children(iid))
+        self.tree.delete(dept_id)
+
+    def update_department_row(self, dept_id, name):
+        """更新部门行显示的名称。"""
+        if self.tree.exists(dept_id):
+            self.tree.item(dept_id, values=(name,))
+
+    def move_department_row(self, department_data, parent_id):
+        """将部门行移到新的父部门之下；新父部门已加载时保留该行的展开状态。"""
+        dept_id = department_data['department_id']
+        if self.tree.exists(dept_id) and parent_id in self._loaded_nodes and self.tree.exists(parent_id):
+            self.tree.move(dept_id, parent_id, "end")
+            return
+        self.remove_department_row(dept_id)
+        self.insert_department_row(department_data, parent_id)
 
     def display_department_details(self, dept_details, dept_roles=None):
         """在详情面板显示部门信息。"""
@@ -136,22 +251,72 @@ class MainApplication(tk.Frame):
 # --- 对话框类 ---
 
 class AddDepartmentDialog(Dialog):
-    def __init__(self, parent, title=None, parent_name=None):
+    def __init__(self, parent, title=None, parent_name=None, suggest=None):
+        """
+        :param suggest: 可选的补全函数 suggest(前缀) -> 已有部门名称列表，输入时在下拉列表中列出
+        """
         self.parent_name = parent_name
+        self.suggest = suggest
         self.dept_name = ""
         super().__init__(parent, title)
 
     def body(self, master):
         ttk.Label(master, text=f"父部门: {self.parent_name}").grid(row=0, columnspan=2)
         ttk.Label(master, text="新部门名称:").grid(row=1, sticky='w')
-        self.name_entry = ttk.Entry(master)
+        self.name_entry = ttk.Combobox(master)
         self.name_entry.grid(row=1, column=1)
+        if self.suggest is not None:
+            self.name_entry.bind("<KeyRelease>", self._update_suggestions)
         return self.name_entry
 
+    def _update_suggestions(self, event=None):
+        """按已输入的文字更新下拉列表中的已有部门名称。"""
+        self.name_entry['values'] = self.suggest(self.name_entry.get().strip())
+
     def apply(self):
         self.dept_name = self.name_entry.get().strip()
 
 
+class MoveDepartmentDialog(Dialog):
+    def __init__(self, parent, title, dept_name, suggest):
+        """
+        :param dept_name: 要移动的部门名称
+        :param suggest: 补全函数 suggest(前缀) -> Department 列表，只列出可以作为新上级的部门
+        """
+        self.dept_name = dept_name
+        self.suggest = suggest
+        # 下拉列表中出现过的 "名称 (ID)" -> 部门ID，只能从中选择
+        self._choices: dict[str, str] = {}
+        self.target_id = None
+        super().__init__(parent, title)
+
+    def body(self, master):
+        ttk.Label(master, text=f"将部门 '{self.dept_name}' 移动到:").grid(row=0, column=0, sticky='w')
+        self.target_combo = ttk.Combobox(master, width=30)
+        self.target_combo.grid(row=0, column=1)
+        self.target_combo.bind("<KeyRelease>", self._update_suggestions)
+        self._update_suggestions()
+        return self.target_combo
+
+    def _update_suggestions(self, event=None):
+        """按已输入的部门名称前缀更新下拉列表，同名部门以ID区分。"""
+        labels = []
+        for dept in self.suggest(self.target_combo.get().strip()):
+            label = f"{dept.name} ({dept.department_id})"
+            self._choices[label] = dept.department_id
+            labels.append(label)
+        self.target_combo['values'] = labels
+
+    def validate(self):
+        if self.target_combo.get() not in self._choices:
+            messagebox.showwarning("提示", "请从下拉列表中选择目标部门！", parent=self)
+            return False
+        return True
+
+    def apply(self):
+        self.target_id = self._choices[self.target_combo.get()]
+
+
 class AddPersonDialog(Dialog):
     def __init__(self, parent, title=None):
         self.result = None
@@ -231,14 +396,29 @@ class DeletePersonDialog(Dialog):
             # 设置 self.result 为 None (或保持不变)，并阻止对话框关闭
             self.result = None
 class AssignPersonDialog(Dialog):
-    def __init__(self, parent, title, people_list, dept_name):
+    def __init__(self, parent, title, people_list, dept_name, dept_id=None, suggest=None):
+        """
+        :param dept_name: 默认分配到的部门名称
+        :param dept_id: 默认部门的ID
+        :param suggest: 可选的补全函数 suggest(前缀) -> Department 列表；提供时可以输入名称改选其他部门
+        """
         self.people = people_list
         self.dept_name = dept_name
+        self.dept_id = dept_id
+        self.suggest = suggest
         self.result = None
         super().__init__(parent, title)
 
     def body(self, master):
-        ttk.Label(master, text=f"分配到部门: {self.dept_name}").grid(row=0, columnspan=2)
+        if self.suggest is None:
+            ttk.Label(master, text=f"分配到部门: {self.dept_name}").grid(row=0, columnspan=2)
+            self.dept_combo = None
+        else:
+            ttk.Label(master, text="分配到部门:").grid(row=0, column=0, sticky='w')
+            self.dept_combo = ttk.Combobox(master)
+            self.dept_combo.set(f"{self.dept_name} ({self.dept_id})")
+            self.dept_combo.grid(row=0, column=1)
+            self.dept_combo.bind("<KeyRelease>", self._update_suggestions)
 
         ttk.Label(master, text="选择员工:").grid(row=1, column=0, sticky='w')
         self.person_combo = ttk.Combobox(master, values=[f"{p.name} ({p.employee_id})" for p in self.people])
@@ -254,13 +434,27 @@ class AssignPersonDialog(Dialog):
 
         return self.person_combo
 
+    def _update_suggestions(self, event=None):
+        """按已输入的部门名称前缀更新下拉列表，同名部门以ID区分。"""
+        departments = self.suggest(self.dept_combo.get().strip())
+        self.dept_combo['values'] = [f"{dept.name} ({dept.department_id})" for dept in departments]
+
     def apply(self):
         person_str = self.person_combo.get()
         # 从 "姓名 (ID)" 格式中提取 ID
         emp_id = person_str.split('(')[-1].replace(')', '').strip()
 
+        dept_id, dept_name = self.dept_id, self.dept_name
+        if self.dept_combo is not None:
+            # 从下拉列表中选择时为 "名称 (ID)"；取出的ID不存在时（只输入了名称），由控制器按名称查找
+            dept_name = self.dept_combo.get().strip()
+            _, sep, rest = dept_name.rpartition(' (')
+            dept_id = rest[:-1] if sep and rest.endswith(')') else None
+
         self.result = {
             "employee_id": emp_id,
+            "department_id": dept_id,
+            "department_name": dept_name,
             "role_category": self.role_cat_combo.get(),
             "position_title": self.pos_title_entry.get().strip()
         }
@@ -358,18 +552,8 @@ class AssignSearchDialog(Dialog):
             self._show_all_people()
             return
 
-        search_results_info = self.controller.execute_person_search(name_to_search)
-
-        # 将搜索到的详细信息转换为 Person 对象列表（去重）
-        found_ids = set()
-        people_list = []
-        for info in search_results_info:
-            if info['employee_id'] not in found_ids:
-                person_obj = self.controller.model.get_person(info['employee_id'])
-                if person_obj:
-                    people_list.append(person_obj)
-                    found_ids.add(info['employee_id'])
-
+        # 按姓名的一部分查找，结果已按相关程度排好序
+        people_list = self.controller.execute_person_search(name_to_search)
         self._populate_tree(people_list)
 
     def _on_item_double_click(self, event):
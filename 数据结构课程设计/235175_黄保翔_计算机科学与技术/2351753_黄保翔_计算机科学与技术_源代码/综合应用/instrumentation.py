@@ -0,0 +1,302 @@
+'''运行时统计与日志'''
+# instrumentation.py
+#
+# 为 OrgModel、SqliteOrgModel、ThreadSafeOrgModel 和 Controller 的热点操作提供：
+#   * 每个操作的调用次数、失败次数、异常次数与耗时直方图
+#   * 统一的日志配置（可选输出为每行一个 JSON 对象的结构化日志）
+#   * 挂接 cProfile 或自定义追踪函数的钩子
+#
+# 统计默认关闭。enable() 把被测方法替换为计时包装，disable() 换回原方法，
+# 因此关闭时没有任何额外开销（连一次条件判断都没有）。
+#
+#     import instrumentation
+#     instrumentation.enable()
+#     ...
+#     print(instrumentation.snapshot())
+
+import functools
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+# 所有模块的日志器都位于 "org" 之下，如 org.model、org.controller
+LOGGER_NAME = 'org'
+
+# 各类中被统计的方法，按操作分组：查找、添加、分配、删除、保存、加载等
+INSTRUMENTED_OPS = {
+    'OrgModel': (
+        'get_person', 'find_department', 'find_departments_by_name', 'departments_with_prefix',
+        'find_person_by_name', 'search_people', 'select',
+        'add_person', 'add_department',
+        'assign_person_to_department', 'bulk_import', 'update_person_info',
+        'rename_department', 'move_department',
+        'delete_person', 'delete_department', 'remove_person_assignment', 'remove_assignment',
+        'save_to_file', 'load_from_file',
+    ),
+    'Controller': (
+        'refresh_tree_view', 'on_department_select', 'execute_person_search',
+        'add_department', 'add_person', 'assign_person', 'import_people',
+        'delete_person', 'delete_department', 'rename_department', 'move_department',
+        'save_data', 'load_data', 'get_person_details_by_id',
+    ),
+}
+# SqliteOrgModel 和 ThreadSafeOrgModel 与 OrgModel 的公共方法相同；
+# 后者的统计包含等待读写锁的时间
+INSTRUMENTED_OPS['SqliteOrgModel'] = INSTRUMENTED_OPS['OrgModel']
+INSTRUMENTED_OPS['ThreadSafeOrgModel'] = INSTRUMENTED_OPS['OrgModel']
+
+# 耗时直方图的桶上界（秒），按 1-2-5 递增，从 1 微秒到 10 秒；超过最后一个上界的计入 "inf" 桶
+BUCKET_BOUNDS = tuple(m * 10.0 ** e for e in range(-6, 1) for m in (1, 2, 5)) + (10.0,)
+
+
+class OpStats:
+    """单个操作的统计：调用次数、失败与异常次数、总耗时、最大耗时和耗时直方图。"""
+
+    __slots__ = ('calls', 'failures', 'errors', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        # 返回 None 或 False 的次数（查找未命中、操作被拒绝）
+        self.failures = 0
+        # 抛出异常的次数
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def observe(self, elapsed: float, failed: bool = False, error: bool = False):
+        self.calls += 1
+        self.failures += failed
+        self.errors += error
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.buckets[bisect_left(BUCKET_BOUNDS, elapsed)] += 1
+
+    def percentile(self, q: float) -> float:
+        """
+        由直方图估计分位数（取所在桶的上界，因此偏保守）。
+        :param q: 0~1 之间的分位
+        """
+        if not self.calls:
+            return 0.0
+        rank = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        histogram = {}
+        for i, count in enumerate(self.buckets):
+            if count:
+                label = f"<={_format_seconds(BUCKET_BOUNDS[i])}" if i < len(BUCKET_BOUNDS) else "inf"
+                histogram[label] = count
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'errors': self.errors,
+            'total_s': round(self.total, 6),
+            'mean_s': round(self.total / self.calls, 9) if self.calls else 0.0,
+            'p50_s': self.percentile(0.5),
+            'p95_s': self.percentile(0.95),
+            'p99_s': self.percentile(0.99),
+            'max_s': round(self.max, 9),
+            'histogram': histogram,
+        }
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:g}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:g}ms"
+    return f"{seconds:g}s"
+
+
+# 当前状态：原方法 {(类, 方法名): 原函数}；为空表示统计未开启
+_originals: dict = {}
+_stats: dict[str, OpStats] = {}
+_stats_lock = threading.Lock()
+_profiler = None
+_tracers: list = []
+# 每个线程当前所处的被统计调用层数与最内层调用的操作名，只在最外层调用上启停 profiler
+_depth = threading.local()
+# 其方法会转而调用 OrgModel 同名方法的类
+_DELEGATORS = ('ThreadSafeOrgModel', 'SqliteOrgModel')
+
+
+def _wrap(key: str, func):
+    """
+    生成计时包装：记录耗时与结果，并在最外层调用时启停 profiler、调用追踪函数。
+    ThreadSafeOrgModel 的加锁方法、SqliteOrgModel.save_to_file 会转而调用 OrgModel 的同名方法，
+    这样的内层调用不再记录，每次操作只计一次（记在外层的类名下）。
+    """
+    stats = _stats.setdefault(key, OpStats())
+    cls_name, _, name = key.rpartition('.')
+    delegators = {f"{delegator}.{name}" for delegator in _DELEGATORS} if cls_name == 'OrgModel' else ()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        outer = getattr(_depth, 'key', None)
+        if outer in delegators:
+            return func(*args, **kwargs)
+        depth = getattr(_depth, 'value', 0)
+        _depth.value = depth + 1
+        _depth.key = key
+        profiler = _profiler if depth == 0 else None
+        if profiler is not None:
+            profiler.enable()
+        error = False
+        result = None
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except BaseException:
+            error = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+            _depth.value = depth
+            _depth.key = outer
+            with _stats_lock:
+                stats.observe(elapsed, result is None or result is False, error)
+            for tracer in _tracers:
+                tracer(key, elapsed, result, error)
+
+    wrapper.__instrumented__ = func
+    return wrapper
+
+
+def _targets():
+    """按 INSTRUMENTED_OPS 给出所有要统计的 (类, 方法名)。只包装类自身定义的方法。"""
+    from OrgModel import OrgModel
+    from SqliteOrgModel import SqliteOrgModel
+    from ThreadSafeOrgModel import ThreadSafeOrgModel
+    from controller import Controller
+    for cls in (OrgModel, SqliteOrgModel, ThreadSafeOrgModel, Controller):
+        for name in INSTRUMENTED_OPS[cls.__name__]:
+            if name in cls.__dict__:
+                yield cls, name
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+def enable(profiler=None, tracer=None):
+    """
+    开启统计：把被统计的方法替换为计时包装。已开启时只更新 profiler 和 tracer。
+    :param profiler: 具有 enable()/disable() 方法的对象（如 cProfile.Profile()），只在被统计操作执行期间启用
+    :param tracer: 每次操作结束后调用的函数 tracer(操作名, 耗时秒数, 返回值, 是否抛出异常)
+    """
+    global _profiler
+    _profiler = profiler
+    if tracer is not None and tracer not in _tracers:
+        _tracers.append(tracer)
+    if _originals:
+        return
+    for cls, name in _targets():
+        func = cls.__dict__[name]
+        _originals[(cls, name)] = func
+        setattr(cls, name, _wrap(f"{cls.__name__}.{name}", func))
+    logging.getLogger(LOGGER_NAME).debug("性能统计已开启，共 %d 个方法", len(_originals))
+
+
+def disable():
+    """关闭统计：恢复原方法，移除 profiler 与 tracer。已收集的数据保留到 reset() 为止。"""
+    global _profiler
+    for (cls, name), func in _originals.items():
+        setattr(cls, name, func)
+    _originals.clear()
+    _profiler = None
+    _tracers.clear()
+
+
+def reset():
+    """清空已收集的统计数据。"""
+    with _stats_lock:
+        for stats in _stats.values():
+            stats.__init__()
+
+
+def snapshot() -> dict:
+    """
+    返回当前统计数据的副本 {操作名: {...}}，只包含至少被调用过一次的操作。
+    """
+    with _stats_lock:
+        return {key: stats.to_dict() for key, stats in sorted(_stats.items()) if stats.calls}
+
+
+def dump(filepath: str) -> bool:
+    """
+    把统计数据写入 JSON 文件。
+    :return: 成功返回 True, 失败返回 False
+    """
+    try:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump({'enabled': is_enabled(), 'operations': snapshot()}, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        logging.getLogger(LOGGER_NAME).error("统计数据保存失败: %s", e)
+        return False
+    return True
+
+
+def summary(limit: int = 10) -> str:
+    """按总耗时从高到低列出前 limit 个操作，用于在界面上显示。"""
+    rows = sorted(snapshot().items(), key=lambda item: item[1]['total_s'], reverse=True)[:limit]
+    if not rows:
+        return "尚无统计数据。"
+    lines = [f"{'操作':<40}{'次数':>8}{'总耗时':>12}{'p95':>12}"]
+    for key, data in rows:
+        lines.append(f"{key:<40}{data['calls']:>8}{data['total_s']:>11.4f}s"
+                     f"{_format_seconds(data['p95_s']):>12}")
+    return "\n".join(lines)
+
+
+class StructuredFormatter(logging.Formatter):
+    """把日志记录格式化为一行 JSON：时间、级别、日志器、消息，以及消息参数和通过 extra 传入的字段。"""
+
+    _STANDARD_ATTRS = frozenset(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime'}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if record.args:
+            entry['args'] = [str(arg) if not isinstance(arg, (int, float, bool)) else arg
+                             for arg in (record.args if isinstance(record.args, tuple) else (record.args,))]
+        for key, value in record.__dict__.items():
+            if key not in self._STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level=logging.INFO, structured: bool = False, stream=None):
+    """
+    配置 "org" 日志器：输出到 stream（默认 stderr），级别为 level。重复调用会替换之前的处理器。
+    :param level: 日志级别（logging 常量或 'DEBUG'/'INFO' 等名称）
+    :param structured: 为 True 时每条日志输出为一行 JSON
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(StructuredFormatter() if structured
+                         else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    return logger
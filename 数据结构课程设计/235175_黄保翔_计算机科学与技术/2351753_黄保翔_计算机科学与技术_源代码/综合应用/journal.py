@@ -0,0 +1,321 @@
+'''追加写的操作日志'''
+# journal.py
+#
+# 每次成功的修改操作都以一行 JSON 追加到 "<快照文件>.journal" 中：
+#     {"seq": 序号, "op": 方法名, "args": {参数}}
+# 日志文件的第一行为 {"journal_id": 标识}。快照的附带信息中记录同一个 journal_id，
+# 只有标识相同的日志才属于该快照，其他程序写出或被覆盖过的快照不会重放旁边残留的日志。
+# 打开时先加载快照，再按序号重放属于它的日志记录。保存只需写出新增的一行，
+# 崩溃时至多丢失正在写入的那一条记录。日志文件在第一次修改时才创建，只读目录中的文件照样可以打开。
+# 压缩（compact）在后台线程中把旧快照与日志合并为新快照，快照中记录其已包含的
+# 最后一个序号 journal_seq，因此压缩中途崩溃也不会重复重放。
+# 另存为其他文件时，原文件自上次保存以来的日志被丢弃，原文件保持上次保存时的内容。
+# 打开、保存同一快照之前先等待其上正在进行的压缩结束，以免读到替换前的快照却找不到已删除的旧日志，
+# 或新保存的快照被压缩结果覆盖。
+
+import json
+import logging
+import os
+import threading
+import uuid
+
+from OrgModel import OrgModel
+
+logger = logging.getLogger('org.journal')
+
+JOURNAL_SUFFIX = '.journal'
+# 压缩期间被轮换出来、尚未并入快照的旧日志
+ROTATED_SUFFIX = '.journal.old'
+
+# 允许记录和重放的 OrgModel 修改方法
+JOURNALED_OPS = frozenset({
+    'add_person', 'delete_person', 'add_department', 'delete_department',
+    'assign_person_to_department', 'remove_person_assignment', 'remove_assignment', 'update_person_info',
+    'rename_department', 'move_department', 'bulk_import',
+})
+
+# 正在进行（或最近一次）的后台压缩：快照文件的绝对路径 -> 执行压缩的线程
+_compactors: dict[str, threading.Thread] = {}
+_compactors_lock = threading.Lock()
+
+
+def new_snapshot_meta() -> dict:
+    """新快照的附带信息：以它作为 meta 保存快照，之后交给 Journal.start 开始记录日志。"""
+    return {'journal_seq': 0, 'journal_id': uuid.uuid4().hex}
+
+
+def wait_for_compaction(snapshot_path: str):
+    """等待该快照文件上正在进行的后台压缩结束；没有时立即返回。"""
+    with _compactors_lock:
+        compactor = _compactors.get(os.path.abspath(snapshot_path))
+    if compactor is not None and compactor is not threading.current_thread():
+        compactor.join()
+
+
+def _journal_id(path: str):
+    """日志文件标识行中的 journal_id；文件不存在或标识行不完整时返回 None。"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    return header.get('journal_id') if isinstance(header, dict) else None
+
+
+def _trim_partial_line(path: str):
+    """截去文件末尾不完整的一行（写入时崩溃留下的），使之后追加的记录从新的一行开始。"""
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        if not end:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b'\n':
+            return
+        pos = end
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            newline = f.read(step).rfind(b'\n')
+            if newline >= 0:
+                f.truncate(pos + newline + 1)
+                return
+        f.truncate(0)
+
+
+def read_journal(path: str, journal_id: str, after_seq: int = 0):
+    """
+    逐条读取属于 journal_id 的日志记录，跳过序号不大于 after_seq 的记录。
+    日志文件的标识不同时不产生任何记录；遇到不完整的最后一行（写入时崩溃）即停止。
+    """
+    if _journal_id(path) != journal_id:
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        f.readline()  # 标识行
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                return
+            if entry['seq'] > after_seq:
+                yield entry
+
+
+def replay(model, entries) -> int:
+    """
+    在模型上重放日志记录，重放期间不再写日志。
+    :return: 最后一条已重放记录的序号（没有记录时为 0）
+    """
+    journal, model.journal = model.journal, None
+    last_seq = 0
+    try:
+        for entry in entries:
+            if entry['op'] in JOURNALED_OPS:
+                getattr(model, entry['op'])(**entry['args'])
+            last_seq = entry['seq']
+    finally:
+        model.journal = journal
+    return last_seq
+
+
+class Journal:
+    """某个快照文件对应的操作日志。通过 Journal.open、Journal.create 或 Journal.start 挂接到模型上。"""
+
+    def __init__(self, snapshot_path: str, journal_id: str, seq: int = 0, sync: bool = True):
+        """
+        :param snapshot_path: 快照文件路径，日志文件位于其旁边
+        :param journal_id: 快照中记录的日志标识
+        :param seq: 已使用的最后一个序号
+        :param sync: 每条记录写入后是否调用 fsync 落盘；为 False 时由调用方适时调用 sync_to_disk
+        """
+        self.snapshot_path = snapshot_path
+        self.path = snapshot_path + JOURNAL_SUFFIX
+        self.rotated_path = snapshot_path + ROTATED_SUFFIX
+        self.journal_id = journal_id
+        self.seq = seq
+        self.sync = sync
+        # 日志文件无法写入时为 True：此后的修改不再记录，保存时必须完整保存
+        self.failed = False
+        self._lock = threading.Lock()
+        self._file = None  # 第一次追加时才打开
+
+    @classmethod
+    def open(cls, model, snapshot_path: str, sync: bool = True, progress=None) -> bool:
+        """
+        加载快照并重放属于它的日志，再把日志挂接到模型上以记录后续修改。
+        快照不是经由日志保存的（没有 journal_id，如其他程序写出的文件）时不挂接日志，第一次保存后才开始记录。
+        :param progress: 加载快照时的进度回调（见 OrgModel.load_from_file）
+        :return: 快照是否加载成功
+        """
+        _detach(model)
+        wait_for_compaction(snapshot_path)
+        if not model.load_from_file(snapshot_path, progress=progress):
+            return False
+        journal_id = model.file_meta.get('journal_id')
+        if journal_id is None:
+            return True
+        seq = model.file_meta.get('journal_seq', 0)
+        # 先重放上次压缩未完成时留下的旧日志，再重放当前日志
+        for path in (snapshot_path + ROTATED_SUFFIX, snapshot_path + JOURNAL_SUFFIX):
+            seq = max(seq, replay(model, read_journal(path, journal_id, seq)))
+        model.journal = cls(snapshot_path, journal_id, seq, sync)
+        return True
+
+    @classmethod
+    def create(cls, model, snapshot_path: str, sync: bool = True):
+        """
+        把模型完整保存为新快照，并开始记录后续修改（见 start）。
+        :return: Journal 对象；保存失败时返回 None，原来的日志保持挂接
+        """
+        meta = new_snapshot_meta()
+        wait_for_compaction(snapshot_path)
+        if not model.save_to_file(snapshot_path, meta=meta):
+            return None
+        return cls.start(model, snapshot_path, meta, sync)
+
+    @classmethod
+    def start(cls, model, snapshot_path: str, meta: dict, sync: bool = True):
+        """
+        快照已由调用方以 meta（见 new_snapshot_meta）保存（例如在后台线程中保存冻结版本）之后，
+        清除该快照旁残留的日志并开始记录后续修改。保存快照到调用本方法之间模型不应被修改，
+        调用方保存之前应先调用 wait_for_compaction。
+        模型原来记录的是另一个文件的日志时，丢弃那个文件自上次保存以来的日志，使其保持上次保存时的内容。
+        :return: Journal 对象
+        """
+        wait_for_compaction(snapshot_path)
+        old = model.journal
+        if old is not None:
+            model.journal = None
+            if os.path.abspath(old.snapshot_path) == os.path.abspath(snapshot_path):
+                old.close()
+            else:
+                old.discard()
+        for path in (snapshot_path + JOURNAL_SUFFIX, snapshot_path + ROTATED_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
+        journal = cls(snapshot_path, meta['journal_id'], meta['journal_seq'], sync)
+        model.journal = journal
+        return journal
+
+    def _open_file(self):
+        """打开日志文件以追加；文件不存在或属于其他快照时改写为只有标识行的新文件。"""
+        if _journal_id(self.path) == self.journal_id:
+            _trim_partial_line(self.path)
+            return open(self.path, 'a', encoding='utf-8')
+        f = open(self.path, 'w', encoding='utf-8')
+        f.write(json.dumps({'journal_id': self.journal_id}) + '\n')
+        return f
+
+    def append(self, op: str, args: dict):
+        """追加一条记录，sync 为 True 时立即落盘。日志文件无法写入时只警告一次，此后不再记录。"""
+        with self._lock:
+            if self.failed:
+                return
+            try:
+                if self._file is None:
+                    self._file = self._open_file()
+                line = json.dumps({'seq': self.seq + 1, 'op': op, 'args': args}, ensure_ascii=False)
+                self._file.write(line + '\n')
+                self._file.flush()
+                self.seq += 1
+                if self.sync:
+                    os.fsync(self._file.fileno())
+            except OSError as e:
+                self._fail(e)
+
+    def sync_to_disk(self):
+        """把已追加的记录落盘（sync 为 False 时由调用方定时调用）。"""
+        with self._lock:
+            if self._file is None or self.failed:
+                return
+            try:
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                self._fail(e)
+
+    def _fail(self, error):
+        self.failed = True
+        logger.warning("无法写入操作日志 %s，此后的修改只在完整保存时写入文件: %s", self.path, error)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def discard(self):
+        """关闭日志并删除自上次保存以来的记录。已开始合并的旧日志属于已保存的修改，不受影响。"""
+        self.close()
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError as e:
+            logger.warning("无法删除操作日志 %s: %s", self.path, e)
+
+    def compact(self, background: bool = True):
+        """
+        将快照与日志合并为新快照。当前日志先被轮换为旧日志，之后的修改写入新日志，
+        合并工作在独立的模型上完成，不会读取或阻塞正在编辑的模型。
+        :param background: 为 True 时在后台线程中执行
+        :return: 执行合并的线程（前台执行或没有需要合并的记录时为 None）
+        """
+        key = os.path.abspath(self.snapshot_path)
+        with _compactors_lock:
+            compactor = _compactors.get(key)
+        if compactor is not None and compactor.is_alive():
+            return compactor  # 上一次压缩尚未结束
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            has_rotated = _journal_id(self.rotated_path) == self.journal_id
+            if _journal_id(self.path) == self.journal_id:
+                if has_rotated:
+                    # 上一次压缩失败留下的旧日志：把当前日志的记录接在其后
+                    _trim_partial_line(self.rotated_path)
+                    with open(self.path, 'r', encoding='utf-8') as src, \
+                            open(self.rotated_path, 'a', encoding='utf-8') as dst:
+                        src.readline()  # 标识行
+                        dst.write(src.read())
+                    os.remove(self.path)
+                else:
+                    os.replace(self.path, self.rotated_path)
+            elif not has_rotated:
+                return None  # 自上次保存以来没有修改
+            upto_seq = self.seq
+
+        args = (self.snapshot_path, self.rotated_path, self.journal_id, upto_seq)
+        if not background:
+            _compact_files(*args)
+            return None
+        compactor = threading.Thread(target=_compact_files, args=args, name="journal-compaction", daemon=True)
+        with _compactors_lock:
+            # 在锁内启动，等待者不会取到尚未启动的线程
+            _compactors[key] = compactor
+            compactor.start()
+        return compactor
+
+
+def _detach(model):
+    """关闭并移除模型上原有的日志。"""
+    if model.journal is not None:
+        model.journal.close()
+        model.journal = None
+
+
+def _compact_files(snapshot_path: str, rotated_path: str, journal_id: str, upto_seq: int):
+    """在独立的模型上执行 快照 + 旧日志 -> 新快照，然后删除旧日志。"""
+    model = OrgModel()
+    if not model.load_from_file(snapshot_path) or model.file_meta.get('journal_id') != journal_id:
+        return
+    replay(model, read_journal(rotated_path, journal_id, model.file_meta.get('journal_seq', 0)))
+
+    # 先写临时文件再原子替换；保留扩展名，使快照格式保持不变
+    root, ext = os.path.splitext(snapshot_path)
+    temp_path = f"{root}.compacting{ext}"
+    if not model.save_to_file(temp_path, meta={'journal_seq': upto_seq, 'journal_id': journal_id}):
+        return
+    with open(temp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(temp_path, snapshot_path)
+    os.remove(rotated_path)
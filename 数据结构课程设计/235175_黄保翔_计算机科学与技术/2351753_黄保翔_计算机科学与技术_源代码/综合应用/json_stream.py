@@ -0,0 +1,273 @@
+'''组织数据的流式 JSON 读写'''
+# json_stream.py
+#
+# 与 OrgModel.save_to_file 原有的文件结构保持一致：
+#     {"personnel": [人员, ...], "departments": {根部门, "children": [...]}}
+# 写入时逐个人员、逐个部门输出，读取时逐条产生记录，全程不使用递归，
+# 也不在内存中构造整个嵌套字典，因此树再深也不会触及递归深度限制。
+
+import json
+import re
+
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+
+
+def dump_org(model, f, indent=None, meta=None, progress=None, every=4096):
+    """
+    将组织模型以流式方式写入文本文件。
+    :param model: 提供 personnel_roster、root_department 和 assignment_categories 的模型
+    :param f: 以文本模式打开的可写文件对象
+    :param indent: 缩进空格数；默认为 None，输出紧凑格式
+    :param meta: 附加写入顶层的额外键值（读取时以 'meta' 记录返回）
+    :param progress: 进度回调 progress(已写出的人员与部门数, 总数)，每写出 every 条调用一次
+    """
+    if indent is None:
+        item_sep, key_sep = ',', ':'
+    else:
+        item_sep, key_sep = ',', ': '
+
+    def nl(level):
+        """返回第 level 层的换行与缩进（紧凑格式下为空串）。"""
+        return '' if indent is None else '\n' + ' ' * (indent * level)
+
+    def dumps(value, level):
+        text = json.dumps(value, ensure_ascii=False, indent=indent, separators=(item_sep, key_sep))
+        return text if indent is None else text.replace('\n', nl(level))
+
+    root = model.root_department
+    if progress is not None:
+        total = len(model.personnel_roster) + (root.subtree_size if root is not None else 0)
+    written = 0
+
+    f.write('{')
+    for key, value in (meta or {}).items():
+        f.write(nl(1) + dumps(key, 1) + key_sep + dumps(value, 1) + item_sep)
+
+    # 1. 逐个写出人员
+    f.write(nl(1) + '"personnel"' + key_sep + '[')
+    first = True
+    for person in model.personnel_roster.values():
+        if not first:
+            f.write(item_sep)
+        first = False
+        f.write(nl(2) + dumps(person.to_dict(model.assignment_categories(person)), 2))
+        written += 1
+        if progress is not None and written % every == 0:
+            progress(written, total)
+    f.write((nl(1) if not first else '') + ']' + item_sep)
+
+    # 2. 用显式栈按先序写出部门树，children 放在每个部门的最后
+    f.write(nl(1) + '"departments"' + key_sep)
+    if root is None:
+        f.write('null' + nl(0) + '}')
+        return
+    stack = [(iter([root]), True)]
+    while stack:
+        children, first = stack[-1]
+        dept = next(children, None)
+        level = 2 * len(stack) - 1  # 当前部门对象所在的缩进层级
+        if dept is None:
+            stack.pop()
+            if stack:
+                # 关闭上一层部门的 children 列表与部门对象本身
+                f.write((nl(level - 1) if not first else '') + ']' + nl(level - 2) + '}')
+            continue
+        stack[-1] = (children, False)
+        if not first:
+            f.write(item_sep)
+        if len(stack) > 1:
+            f.write(nl(level))
+        fields = (
+            ('department_id', dept.department_id),
+            ('name', dept.name),
+            ('roles', {title: person.employee_id for title, person in dept.roles.items()}),
+            ('role_categories', {category: [person.employee_id for person in plist]
+                                 for category, plist in dept.role_categories.items()}),
+        )
+        f.write('{')
+        for key, value in fields:
+            f.write(nl(level + 1) + dumps(key, level + 1) + key_sep + dumps(value, level + 1) + item_sep)
+        f.write(nl(level + 1) + '"children"' + key_sep + '[')
+        stack.append((iter(dept.children), True))
+        written += 1
+        if progress is not None and written % every == 0:
+            progress(written, total)
+    f.write(nl(0) + '}')
+
+
+class _EventReader:
+    """在分块读入的缓冲区上工作的最小 JSON 扫描器，只负责结构符号，值交给 json 解码。"""
+
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+        self.scan_once = self.decoder.scan_once
+
+    def _fill(self, size=None) -> bool:
+        """读入更多数据，同时丢弃已处理的部分。到达文件末尾时返回 False。"""
+        if self.eof:
+            return False
+        chunk = self.f.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """跳过空白并返回下一个字符，文件结束时返回空串。"""
+        while True:
+            pos = _WHITESPACE.match(self.buf, self.pos).end()
+            self.pos = pos
+            if pos < len(self.buf):
+                return self.buf[pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, ch: str):
+        found = self.peek()
+        if found != ch:
+            raise ValueError(f"JSON 格式错误: 期望 '{ch}'，实际为 '{found or '文件结束'}'")
+        self.pos += 1
+
+    def value(self):
+        """解码下一个完整的 JSON 值。"""
+        buf = self.buf
+        pos = _WHITESPACE.match(buf, self.pos).end()
+        # 快速路径：值完整地位于缓冲区中
+        try:
+            obj, end = self.scan_once(buf, pos)
+            if end < len(buf):
+                self.pos = end
+                return obj
+        except (StopIteration, ValueError):
+            pass
+        self.pos = pos
+        return self._value_across_chunks()
+
+    def _value_across_chunks(self):
+        """值跨越缓冲区末尾时，按倍增的块大小继续读入后再解码。"""
+        size = self.chunk_size
+        while True:
+            self.peek()
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            # 数字等值可能恰好在缓冲区末尾被截断，需读入更多数据后再确认
+            if end == len(self.buf) and self._fill(size):
+                size *= 2
+                continue
+            self.pos = end
+            return obj
+
+    def array_values(self):
+        """逐个产生数组中的值（调用前已读过 '['）。"""
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            ch = self.peek()
+            self.pos += 1
+            if ch == ']':
+                return
+            if ch != ',':
+                raise ValueError(f"JSON 格式错误: 数组中出现意外的 '{ch or '文件结束'}'")
+
+    def next_member(self, first: bool) -> bool:
+        """在对象或数组内部前进到下一个成员；没有更多成员时返回 False。"""
+        ch = self.peek()
+        if not ch:
+            raise ValueError("JSON 格式错误: 文件意外结束")
+        if ch in '}]':
+            self.pos += 1
+            return False
+        if not first:
+            self.expect(',')
+        return True
+
+
+def iter_org_records(f, chunk_size=1 << 16):
+    """
+    流式读取组织数据文件，逐条产生记录：
+      ('person', 人员字典)                          —— 与 Person.to_dict 结构相同
+      ('department', 部门字典)                      —— 含 department_id、name、roles、
+                                                      role_categories 以及 parent_id（根部门为 None）；
+                                                      按后序产生，即子部门先于父部门
+      ('meta', (键, 值))                            —— 其余顶层键
+    :param f: 以文本模式打开的文件对象
+    :param chunk_size: 每次读入的字符数
+    """
+    reader = _EventReader(f, chunk_size)
+    reader.expect('{')
+    first = True
+    while reader.next_member(first):
+        first = False
+        key = reader.value()
+        reader.expect(':')
+        if key == 'personnel':
+            reader.expect('[')
+            for person_data in reader.array_values():
+                yield 'person', person_data
+        elif key == 'departments':
+            if reader.peek() == 'n':
+                reader.value()
+                continue
+            yield from _iter_departments(reader)
+        else:
+            yield 'meta', (key, reader.value())
+
+
+def _iter_departments(reader: _EventReader):
+    """
+    用显式栈解析嵌套的部门对象，遇到部门对象结束时产生该部门的记录。
+    子部门的 parent_id 在其对象结束时取自父部门的 department_id。JSON 对象中的键没有固定顺序，
+    父部门的 department_id 位于 children 之后时，其子部门的记录暂存到父部门对象结束时再依次产生。
+    """
+    reader.expect('{')
+    # 每一帧: [部门记录, 是否为对象中的第一个键, 是否正处于 children 数组中, children 中是否为第一个元素,
+    #         等待父部门ID的子部门记录]
+    stack = [[{}, True, False, True, []]]
+    while stack:
+        frame = stack[-1]
+        record = frame[0]
+        if frame[2]:
+            # 位于 children 数组中：要么进入下一个子部门，要么结束数组
+            if reader.next_member(frame[3]):
+                frame[3] = False
+                reader.expect('{')
+                stack.append([{}, True, False, True, []])
+            else:
+                frame[2] = False
+            continue
+        if not reader.next_member(frame[1]):
+            stack.pop()
+            for child in frame[4]:
+                child['parent_id'] = record.get('department_id')
+                yield 'department', child
+            if not stack:
+                record['parent_id'] = None
+            elif 'department_id' in stack[-1][0]:
+                record['parent_id'] = stack[-1][0]['department_id']
+            else:
+                stack[-1][4].append(record)
+                continue
+            yield 'department', record
+            continue
+        frame[1] = False
+        key = reader.value()
+        reader.expect(':')
+        if key == 'children':
+            reader.expect('[')
+            frame[2], frame[3] = True, True
+        else:
+            record[key] = reader.value()
@@ -1,20 +1,39 @@
 # main.py
 
+import argparse
+import atexit
 import tkinter as tk
 from OrgModel import OrgModel
+from SqliteOrgModel import SqliteOrgModel
 from gui import MainApplication
 from controller import Controller
+import instrumentation
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="高校组织机构管理系统")
+    parser.add_argument('--db', metavar='PATH', help="使用 SQLite 数据库文件存储数据（默认全部保存在内存中）")
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="日志级别（默认 INFO）")
+    parser.add_argument('--log-json', action='store_true', help="以每行一个 JSON 对象的形式输出日志")
+    parser.add_argument('--metrics', metavar='PATH', nargs='?', const='',
+                        help="开启性能统计；给出 PATH 时在退出时把统计数据写入该文件")
+    args = parser.parse_args()
+
+    instrumentation.configure_logging(args.log_level, structured=args.log_json)
+    if args.metrics is not None:
+        instrumentation.enable()
+        if args.metrics:
+            atexit.register(instrumentation.dump, args.metrics)
+
     # 1. 创建 Tkinter 根窗口
     root = tk.Tk()
     root.title("高校组织机构管理系统")
     root.geometry("1000x700")
 
     # 2. 实例化 MVC 组件
-    model = OrgModel()
+    model = SqliteOrgModel(args.db) if args.db else OrgModel()
     view = MainApplication(master=root)
     controller = Controller(model, view)
 
     # 3. 启动主事件循环
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
@@ -0,0 +1,344 @@
+'''人员的二级索引'''
+# person_index.py
+#
+# OrgModel 在每次修改时同步维护的人员索引，使按属性筛选人员不必扫描整个花名册：
+#   年龄    年龄 -> 员工ID，另有排好序的不同年龄值，用二分查找取出年龄区间，O(log 年龄值数 + 结果数)
+#   电话    电话号码 -> 员工ID，O(1)
+#   性别    性别 -> 员工ID，O(1)
+#   任职数  任职数 -> 员工ID，用于“没有任职的人员”“身兼多职的人员”等查询
+#   姓名    姓名 -> 员工ID，以及 二元组 -> 含有该二元组的姓名 的倒排索引，用于子串与前缀查找
+# 同一键下的员工ID以字典（有序集合）保存，按加入索引的先后排列，增删都是 O(1)；
+# 电话号码和姓名大多各不相同，为节省内存只有一人时直接保存员工ID，多人共用时才改为有序集合。
+# 年龄无法解析为整数（为空或填写有误）的人员不进入年龄索引。
+#
+# 姓名索引按不同的姓名（而不是按人员）建立：每个姓名前后加上起止标记后切成相邻的二元组，
+# 如 "张三丰" -> "^张" "张三" "三丰" "丰$"（^、$ 表示起止标记）。查找 "三丰" 只需取出二元组 "三丰" 的姓名集合，
+# 查找以 "张" 开头的姓名只需取出 "^张" 的集合；再逐个确认，因此代价与候选姓名数成正比，
+# 与人员总数无关。只有单字的子串查找需要合并所有含该字的二元组。
+
+import heapq
+from bisect import bisect_left, bisect_right, insort
+
+# 姓名的起止标记，不会出现在正常的姓名中
+_START, _END = '\x02', '\x03'
+
+
+def age_key(age) -> int | None:
+    """年龄在索引中的键：可解析为整数时为该整数，否则为 None。"""
+    try:
+        return int(age)
+    except (TypeError, ValueError):
+        return None
+
+
+def _multi_add(mapping: dict, key, value: str):
+    """一对多映射：只有一个值时直接保存该值，多个值时保存为字典（有序集合），增删都是 O(1)。"""
+    values = mapping.get(key)
+    if values is None:
+        mapping[key] = value
+    elif isinstance(values, dict):
+        values[value] = None
+    else:
+        mapping[key] = {values: None, value: None}
+
+
+def _multi_remove(mapping: dict, key, value: str) -> bool:
+    """从一对多映射中移除一个值；返回移除的是否为该键的最后一个值。"""
+    values = mapping.get(key)
+    if values == value:
+        del mapping[key]
+        return True
+    if isinstance(values, dict) and value in values:
+        del values[value]
+        if len(values) == 1:
+            mapping[key] = next(iter(values))
+    return False
+
+
+def _multi_get(mapping: dict, key) -> tuple | dict:
+    values = mapping.get(key)
+    if values is None:
+        return ()
+    return values if isinstance(values, dict) else (values,)
+
+
+def _bigrams(text: str):
+    return (text[i:i + 2] for i in range(len(text) - 1))
+
+
+def _name_order(name: str):
+    return len(name), name
+
+
+class _Buckets:
+    """键 -> 员工ID 的有序集合。ordered 为 True 时另保存排好序的键，支持按键的区间查询。"""
+
+    __slots__ = ('groups', 'keys')
+
+    def __init__(self, ordered: bool = False):
+        self.groups: dict = {}
+        self.keys: list | None = [] if ordered else None
+
+    def add(self, key, employee_id: str):
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = {}
+            if self.keys is not None:
+                insort(self.keys, key)
+        group[employee_id] = None
+
+    def discard(self, key, employee_id: str):
+        group = self.groups.get(key)
+        if group is not None:
+            group.pop(employee_id, None)
+            if not group:
+                del self.groups[key]
+                if self.keys is not None:
+                    del self.keys[bisect_left(self.keys, key)]
+
+    def count(self, key) -> int:
+        return len(self.groups.get(key, ()))
+
+    def ids(self, key):
+        return iter(self.groups.get(key, ()))
+
+    def _keys_between(self, low, high) -> list:
+        keys = self.keys
+        lo = bisect_left(keys, low) if low is not None else 0
+        hi = bisect_right(keys, high) if high is not None else len(keys)
+        return keys[lo:hi]
+
+    def count_between(self, low, high) -> int:
+        """键在 [low, high] 内的员工数；low、high 为 None 表示不限。"""
+        groups = self.groups
+        return sum(len(groups[key]) for key in self._keys_between(low, high))
+
+    def ids_between(self, low, high):
+        """按键从小到大产生键在 [low, high] 内的员工ID。"""
+        groups = self.groups
+        for key in self._keys_between(low, high):
+            yield from groups[key]
+
+    def normalized(self) -> dict:
+        return {key: set(group) for key, group in self.groups.items()}
+
+
+class PersonIndex:
+    """人员的年龄、电话、性别与任职数索引。"""
+
+    def __init__(self):
+        self._ages = _Buckets(ordered=True)
+        self._phones: dict[str, str | dict[str, None]] = {}
+        self._genders = _Buckets()
+        self._posts = _Buckets(ordered=True)
+        self._names: dict[str, str | dict[str, None]] = {}
+        # 二元组 -> 含有它的姓名；单字 -> 含有该字的二元组（单字子串查找时使用）
+        # 倒排表以字典（有序集合）保存，删除姓名为 O(1)，不受同一二元组下姓名多少的影响
+        self._grams: dict[str, dict[str, None]] = {}
+        self._char_grams: dict[str, dict[str, None]] = {}
+
+    @classmethod
+    def build(cls, roster: dict, position_index: dict):
+        """
+        由花名册和任职索引一次性建立索引（加载文件时使用），O(n)。
+        :param roster: {员工ID: Person}
+        :param position_index: {员工ID: 任职列表}
+        """
+        index = cls()
+        for employee_id, person in roster.items():
+            index.add(person, len(position_index.get(employee_id, ())))
+        return index
+
+    # ---------- 维护 ----------
+
+    def add(self, person, posts: int = 0):
+        """登记新人员。"""
+        employee_id = person.employee_id
+        age = age_key(person.age)
+        if age is not None:
+            self._ages.add(age, employee_id)
+        _multi_add(self._phones, person.phone_number, employee_id)
+        self._genders.add(person.gender, employee_id)
+        self._posts.add(posts, employee_id)
+        self._add_name(person.name, employee_id)
+
+    def remove(self, person, posts: int):
+        """移除人员。:param posts: 该人员当前在索引中的任职数"""
+        employee_id = person.employee_id
+        self._ages.discard(age_key(person.age), employee_id)
+        _multi_remove(self._phones, person.phone_number, employee_id)
+        self._genders.discard(person.gender, employee_id)
+        self._posts.discard(posts, employee_id)
+        self._remove_name(person.name, employee_id)
+
+    def update(self, person, old_name, old_age, old_gender, old_phone):
+        """人员的姓名、年龄、性别或电话改变后更新索引。:param old_name: 修改前的姓名，其余类推"""
+        employee_id = person.employee_id
+        if old_name != person.name:
+            self._remove_name(old_name, employee_id)
+            self._add_name(person.name, employee_id)
+        age = age_key(person.age)
+        if age_key(old_age) != age:
+            self._ages.discard(age_key(old_age), employee_id)
+            if age is not None:
+                self._ages.add(age, employee_id)
+        if old_gender != person.gender:
+            self._genders.discard(old_gender, employee_id)
+            self._genders.add(person.gender, employee_id)
+        if old_phone != person.phone_number:
+            _multi_remove(self._phones, old_phone, employee_id)
+            _multi_add(self._phones, person.phone_number, employee_id)
+
+    def move_posts(self, employee_id: str, old: int, new: int):
+        """人员的任职数由 old 变为 new。"""
+        if old != new:
+            self._posts.discard(old, employee_id)
+            self._posts.add(new, employee_id)
+
+    def _add_name(self, name, employee_id: str):
+        if not isinstance(name, str):
+            return
+        if name not in self._names:
+            # 新出现的姓名才需要登记二元组
+            grams = self._grams
+            for gram in _bigrams(_START + name + _END):
+                postings = grams.get(gram)
+                if postings is None:
+                    postings = grams[gram] = {}
+                    for char in gram:
+                        if char != _START and char != _END:
+                            self._char_grams.setdefault(char, {})[gram] = None
+                postings[name] = None
+        _multi_add(self._names, name, employee_id)
+
+    def _remove_name(self, name, employee_id: str):
+        if not isinstance(name, str) or not _multi_remove(self._names, name, employee_id):
+            return
+        # 已没有人使用该姓名，从倒排索引中删去
+        for gram in _bigrams(_START + name + _END):
+            postings = self._grams.get(gram)
+            if postings is None:
+                # 同一姓名中重复出现的二元组（如 "三三"），已在前面删除
+                continue
+            postings.pop(name, None)
+            if not postings:
+                del self._grams[gram]
+                for char in gram:
+                    grams = self._char_grams.get(char)
+                    if grams is not None:
+                        grams.pop(gram, None)
+                        if not grams:
+                            del self._char_grams[char]
+
+    # ---------- 查询 ----------
+    # 每种索引都提供 count_*（候选数量，供查询选择最有选择性的索引）和 *_ids（产生员工ID）。
+    # *_ids 返回的迭代器直接遍历索引本身，遍历结束前不应修改模型
+
+    def count_age(self, low: int = None, high: int = None) -> int:
+        return self._ages.count_between(low, high)
+
+    def age_ids(self, low: int = None, high: int = None):
+        """按年龄从小到大产生年龄在 [low, high] 内的员工ID；low、high 为 None 表示不限。"""
+        return self._ages.ids_between(low, high)
+
+    def count_phone(self, phone_number) -> int:
+        return len(_multi_get(self._phones, phone_number))
+
+    def phone_ids(self, phone_number):
+        return iter(_multi_get(self._phones, phone_number))
+
+    def count_gender(self, gender) -> int:
+        return self._genders.count(gender)
+
+    def gender_ids(self, gender):
+        return self._genders.ids(gender)
+
+    def count_posts(self, low: int = 0, high: int = None) -> int:
+        return self._posts.count_between(low, high)
+
+    def posts_ids(self, low: int = 0, high: int = None):
+        """按任职数从少到多产生任职数在 [low, high] 内的员工ID。"""
+        return self._posts.ids_between(low, high)
+
+    def name_ids(self, name: str):
+        """姓名与 name 完全相同的员工ID。"""
+        return iter(_multi_get(self._names, name))
+
+    def _names_with(self, pattern: str):
+        """
+        产生可能包含 pattern 的姓名（pattern 可以以起始标记开头），由调用方逐个确认。
+        取 pattern 的各二元组中姓名最少的那个；单字时合并所有含该字的二元组。
+        """
+        if len(pattern) >= 2:
+            return iter(min((self._grams.get(gram, ()) for gram in _bigrams(pattern)), key=len))
+        grams = self._grams
+        return iter({name: None for gram in self._char_grams.get(pattern, ()) for name in grams[gram]})
+
+    def count_name_containing(self, text: str) -> int:
+        """姓名包含 text 的人数的上界（候选姓名数，同名的多人只算一次，仅用于比较选择性）。"""
+        if len(text) >= 2:
+            return min(len(self._grams.get(gram, ())) for gram in _bigrams(text))
+        return sum(len(self._grams[gram]) for gram in self._char_grams.get(text, ()))
+
+    def name_containing_ids(self, text: str):
+        """产生姓名包含 text 的员工ID（不排序）。"""
+        for name in self._names_with(text):
+            if text in name:
+                yield from _multi_get(self._names, name)
+
+    def search_name(self, text: str, limit: int = None) -> list:
+        """
+        按相关程度返回姓名包含 text 的员工ID：姓名与 text 完全相同的在前，其次是以 text 开头的，
+        最后是在其他位置包含 text 的；同一档中姓名较短的在前（等长的按字符顺序），
+        同名的人按员工ID排列（与 SqliteOrgModel.search_people 相同，且不受改名的影响）。
+        两个字以上的查找只检查一个二元组的候选姓名；单字的查找要检查含该字的所有姓名。
+        :param text: 要查找的文字（非空）
+        :param limit: 最多返回的人数，默认不限
+        :return: 员工ID列表
+        """
+        found = []
+        if not text or (limit is not None and limit <= 0):
+            return found
+
+        def take(names) -> bool:
+            for name in names:
+                for employee_id in sorted(_multi_get(self._names, name)):
+                    found.append(employee_id)
+                    if len(found) == limit:
+                        return True
+            return False
+
+        if take((text,) if text in self._names else ()):
+            return found
+        for prefix_tier in (True, False):
+            if prefix_tier:
+                names = [name for name in self._names_with(_START + text)
+                         if name != text and name.startswith(text)]
+            else:
+                names = [name for name in self._names_with(text)
+                         if text in name and not name.startswith(text)]
+            # 每个姓名至少对应一人，取最短的 (limit - 已找到人数) 个姓名即可
+            if limit is None:
+                names.sort(key=_name_order)
+            else:
+                names = heapq.nsmallest(limit - len(found), names, key=_name_order)
+            if take(names):
+                break
+        return found
+
+    def __eq__(self, other):
+        """两个索引的内容相同（不比较同一键下员工ID的先后顺序）。用于一致性检查。"""
+        if not isinstance(other, PersonIndex):
+            return NotImplemented
+        return (self._ages.keys == other._ages.keys and self._posts.keys == other._posts.keys
+                and all(mine.normalized() == theirs.normalized() for mine, theirs in
+                        ((self._ages, other._ages), (self._genders, other._genders),
+                         (self._posts, other._posts)))
+                and all({key: sorted(_multi_get(mine, key)) for key in mine}
+                        == {key: sorted(_multi_get(theirs, key)) for key in theirs}
+                        for mine, theirs in ((self._phones, other._phones), (self._names, other._names)))
+                and all({key: set(values) for key, values in mine.items()}
+                        == {key: set(values) for key, values in theirs.items()}
+                        for mine, theirs in ((self._grams, other._grams), (self._char_grams, other._char_grams))))
+
+    __hash__ = None
@@ -0,0 +1,257 @@
+'''人员查询'''
+# query.py
+#
+# 可组合的人员查询。Query 只描述条件，由 OrgModel.select 执行：
+#
+#     from query import Query
+#     women_30s = Query().gender('女').age(30, 39)
+#     model.select(women_30s.in_department('d3'))        # 限定在某部门子树中
+#     model.select(Query().posts(3))                     # 身兼三职及以上
+#     model.select(Query().unassigned())                 # 没有任职
+#     model.select(Query().name('三丰').age(60))           # 姓名中含有“三丰”
+#     model.explain(women_30s)                           # 查看执行计划
+#
+# 各条件之间为“且”的关系。执行时先估计每个带索引的条件的候选人数（见 person_index.py），
+# 从候选最少的索引取出员工ID，再用其余条件逐个检查，因此代价取决于最有选择性的条件，
+# 而不是花名册的大小。没有任何可用索引时才扫描整个花名册。
+
+from abc import ABC, abstractmethod
+
+from person_index import age_key
+
+
+class _Condition(ABC):
+    """单个查询条件。"""
+
+    indexed = False
+
+    @abstractmethod
+    def matches(self, model, person) -> bool:
+        """该人员是否满足条件。"""
+
+
+class _IndexedCondition(_Condition):
+    """可用索引的查询条件。"""
+
+    indexed = True
+
+    @abstractmethod
+    def estimate(self, model) -> int:
+        """候选人数（可以偏大，不能偏小）。"""
+
+    @abstractmethod
+    def candidates(self, model):
+        """产生满足条件的员工ID（可以包含不满足的，它们由 matches 排除）。"""
+
+
+class _Age(_IndexedCondition):
+    def __init__(self, low, high):
+        self.low, self.high = low, high
+
+    def estimate(self, model):
+        return model.person_index.count_age(self.low, self.high)
+
+    def candidates(self, model):
+        return model.person_index.age_ids(self.low, self.high)
+
+    def matches(self, model, person):
+        age = age_key(person.age)
+        return (age is not None and (self.low is None or age >= self.low)
+                and (self.high is None or age <= self.high))
+
+    def __repr__(self):
+        return f"年龄 [{self.low if self.low is not None else ''}, {self.high if self.high is not None else ''}]"
+
+
+class _Gender(_IndexedCondition):
+    def __init__(self, gender):
+        self.gender = gender
+
+    def estimate(self, model):
+        return model.person_index.count_gender(self.gender)
+
+    def candidates(self, model):
+        return model.person_index.gender_ids(self.gender)
+
+    def matches(self, model, person):
+        return person.gender == self.gender
+
+    def __repr__(self):
+        return f"性别 = {self.gender}"
+
+
+class _Phone(_IndexedCondition):
+    def __init__(self, phone_number):
+        self.phone_number = phone_number
+
+    def estimate(self, model):
+        return model.person_index.count_phone(self.phone_number)
+
+    def candidates(self, model):
+        return model.person_index.phone_ids(self.phone_number)
+
+    def matches(self, model, person):
+        return person.phone_number == self.phone_number
+
+    def __repr__(self):
+        return f"电话 = {self.phone_number}"
+
+
+class _Name(_IndexedCondition):
+    def __init__(self, text):
+        self.text = text
+
+    def estimate(self, model):
+        if not self.text:
+            # 空字符串包含于任何姓名中，索引无从筛选
+            return len(model.personnel_roster)
+        return model.person_index.count_name_containing(self.text)
+
+    def candidates(self, model):
+        if not self.text:
+            return iter(model.personnel_roster)
+        return model.person_index.name_containing_ids(self.text)
+
+    def matches(self, model, person):
+        return isinstance(person.name, str) and self.text in person.name
+
+    def __repr__(self):
+        return f"姓名包含 {self.text}"
+
+
+class _Posts(_IndexedCondition):
+    def __init__(self, low, high):
+        self.low, self.high = low, high
+
+    def estimate(self, model):
+        return model.person_index.count_posts(self.low, self.high)
+
+    def candidates(self, model):
+        return model.person_index.posts_ids(self.low, self.high)
+
+    def matches(self, model, person):
+        posts = len(model.position_index.get(person.employee_id, ()))
+        return posts >= self.low and (self.high is None or posts <= self.high)
+
+    def __repr__(self):
+        return f"任职数 [{self.low}, {self.high if self.high is not None else ''}]"
+
+
+class _Subtree(_IndexedCondition):
+    def __init__(self, department_id):
+        self.department_id = department_id
+
+    def estimate(self, model):
+        # 子树中的任职数（同一人的多条任职各算一次），由任职索引上的二分查找得出
+        return model._subtree_assignment_count(self.department_id)
+
+    def candidates(self, model):
+        return (person.employee_id for person in model.people_in_subtree(self.department_id))
+
+    def matches(self, model, person):
+        return any(model.is_ancestor(self.department_id, dept.department_id)
+                   for dept, _, _ in model.position_index.get(person.employee_id, ()))
+
+    def __repr__(self):
+        return f"任职于部门 {self.department_id} 的子树"
+
+
+class _Predicate(_Condition):
+    def __init__(self, predicate, description):
+        self.predicate = predicate
+        self.description = description
+
+    def matches(self, model, person):
+        return self.predicate(person)
+
+    def __repr__(self):
+        return self.description
+
+
+class Query:
+    """
+    人员查询条件，各条件之间为“且”的关系。每个方法都返回新的 Query，原对象不变，
+    因此可以把公共的条件保存下来，再分别追加不同的条件。
+    """
+
+    __slots__ = ('conditions',)
+
+    def __init__(self, conditions=()):
+        self.conditions = tuple(conditions)
+
+    def _and(self, condition):
+        return Query(self.conditions + (condition,))
+
+    def age(self, low: int = None, high: int = None):
+        """年龄在 [low, high] 内（两端都包含，None 表示不限）。年龄无法解析为整数的人员不匹配。"""
+        return self._and(_Age(low, high))
+
+    def gender(self, gender: str):
+        return self._and(_Gender(gender))
+
+    def name(self, text: str):
+        """姓名中含有 text（任意位置）。需要按相关程度排序时改用 OrgModel.search_people。"""
+        return self._and(_Name(text))
+
+    def phone(self, phone_number: str):
+        return self._and(_Phone(phone_number))
+
+    def posts(self, low: int = 0, high: int = None):
+        """任职数在 [low, high] 内（high 为 None 表示不限）。"""
+        return self._and(_Posts(low, high))
+
+    def unassigned(self):
+        """没有任何任职。"""
+        return self.posts(0, 0)
+
+    def in_department(self, department_id: str):
+        """在该部门或其任一下级部门中任职。"""
+        return self._and(_Subtree(department_id))
+
+    def where(self, predicate, description: str = "自定义条件"):
+        """
+        任意条件 predicate(person) -> bool。它不能使用索引，只用于检查其他条件选出的候选人员。
+        :param description: 在执行计划中显示的说明
+        """
+        return self._and(_Predicate(predicate, description))
+
+    def __repr__(self):
+        return f"Query({' 且 '.join(map(repr, self.conditions)) or '全部人员'})"
+
+
+def plan(model, query: Query) -> tuple:
+    """
+    选出候选最少的索引条件。
+    :return: (驱动条件, 其余条件, 候选人数)；没有可用索引时驱动条件为 None，候选为整个花名册
+    """
+    best, best_count = None, len(model.personnel_roster)
+    for condition in query.conditions:
+        if condition.indexed:
+            count = condition.estimate(model)
+            if best is None or count < best_count:
+                best, best_count = condition, count
+                if not count:
+                    break
+    rest = [condition for condition in query.conditions if condition is not best]
+    return best, rest, best_count
+
+
+def run(model, query: Query, limit: int = None) -> list:
+    """
+    执行查询，见 OrgModel.select。
+    """
+    driver, rest, _ = plan(model, query)
+    roster = model.personnel_roster
+    if driver is None:
+        people = iter(roster.values())
+    else:
+        people = (roster[employee_id] for employee_id in driver.candidates(model))
+    found = []
+    if limit is not None and limit <= 0:
+        return found
+    for person in people:
+        if all(condition.matches(model, person) for condition in rest):
+            found.append(person)
+            if len(found) == limit:
+                break
+    return found
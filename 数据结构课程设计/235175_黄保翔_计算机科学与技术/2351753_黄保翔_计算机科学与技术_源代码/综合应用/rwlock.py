@@ -0,0 +1,93 @@
+'''读写锁'''
+# rwlock.py
+#
+# 允许多个读者同时持有、写者独占的锁。写者优先：有写者在等待时，新的读者需要等待，
+# 避免持续不断的读操作（查找、导出）让编辑永远无法进行。
+# 两种锁都可在同一线程中重入；持有写锁的线程也可以再获取读锁（写操作内部会调用查找方法），
+# 但持有读锁时不能再获取写锁（两个读者同时升级会互相等待）。
+#
+#     lock = RWLock()
+#     with lock.read():
+#         ...
+#     with lock.write():
+#         ...
+
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """写者优先、可重入的读写锁。"""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers: dict[int, int] = {}  # 线程ID -> 该线程持有读锁的层数
+        self._writer: int | None = None     # 持有写锁的线程ID
+        self._write_depth = 0
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me or me in self._readers:
+                # 重入：不必等待排队的写者，否则会与自己持有的锁互相等待
+                self._readers[me] = self._readers.get(me, 0) + 1
+                return
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers[me] = 1
+
+    def release_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            depth = self._readers.get(me)
+            if not depth:
+                raise RuntimeError("当前线程没有持有读锁")
+            if depth == 1:
+                del self._readers[me]
+                if not self._readers:
+                    self._cond.notify_all()
+            else:
+                self._readers[me] = depth - 1
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("持有读锁时不能获取写锁")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("当前线程没有持有写锁")
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,311 @@
+'''组织数据的二进制快照格式'''
+# snapshot.py
+#
+# 与 JSON 格式一一对应、可精确互相转换的紧凑二进制快照。文件布局（小端序）：
+#
+#   文件头      魔数 b'ORGS'、版本号、各类记录数量与各节的偏移
+#   字符串表    (字符串数 + 1) 个 u32 偏移，随后是 UTF-8 数据；
+#               所有 ID、姓名、职位名称等只存一份，记录中以下标引用
+#   部门记录    按层序 (BFS) 存放，同一部门的子部门在表中连续，
+#               因此只解码根部门及前几层就能显示组织树
+#   人员记录    顺序与花名册一致
+#   任职记录    每个人员的任职连续存放 (部门下标, 职位名称, 职位类别)；版本 1 没有职位类别
+#   成员记录    每个部门 role_categories 中的成员 (人员下标, 职位类别)
+#   职务记录    每个部门 roles 中的条目 (职位名称, 人员下标)
+#   附加信息    （可选，文件头标志位 FLAG_META）u32 长度 + UTF-8 JSON 对象
+#
+# 所有记录定长，打开时通过 mmap 映射文件，只在访问时才解码对应记录。
+
+import mmap
+import json
+import struct
+
+MAGIC = b'ORGS'
+VERSION = 2
+SNAPSHOT_SUFFIX = '.orgs'
+
+# 文件头标志位：文件末尾带有附加信息
+FLAG_META = 0x1
+
+# 职位类别在记录中以编号存放
+CATEGORIES = ('主管', '副主管', '其他人员')
+_CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORIES)}
+
+# 字符串引用：NO_STRING 表示 None；最高位为 1 表示该字符串是非字符串值的 JSON 文本
+NO_STRING = 0xFFFFFFFF
+_JSON_FLAG = 0x80000000
+
+_HEADER = struct.Struct('<4sHH6I7Q')
+# 部门: id, 名称, 父部门下标(根为 -1), 子部门起始下标, 子部门数, 成员起始, 成员数, 职务起始, 职务数
+_DEPARTMENT = struct.Struct('<IIiIIIIII')
+# 人员: id, 姓名, 年龄, 性别, 电话, 任职起始, 任职数
+_PERSON = struct.Struct('<IIIIIII')
+# 任职: 部门下标, 职位名称, 职位类别
+_ASSIGNMENT = struct.Struct('<IIB3x')
+# 版本 1 的任职: 部门下标, 职位名称
+_ASSIGNMENT_V1 = struct.Struct('<II')
+# 成员: 人员下标, 职位类别
+_MEMBER = struct.Struct('<IB3x')
+# 职务: 职位名称, 人员下标
+_ROLE = struct.Struct('<II')
+_OFFSET = struct.Struct('<I')
+
+
+def is_snapshot(filepath: str) -> bool:
+    """根据文件开头的魔数判断是否为二进制快照。"""
+    try:
+        with open(filepath, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class _StringTable:
+    """写入时使用的字符串驻留表。"""
+
+    def __init__(self):
+        self.refs: dict[str, int] = {}
+        self.strings: list[str] = []
+
+    def ref(self, value) -> int:
+        if value is None:
+            return NO_STRING
+        flag = 0
+        if not isinstance(value, str):
+            value = json.dumps(value, ensure_ascii=False)
+            flag = _JSON_FLAG
+        ref = self.refs.get(value)
+        if ref is None:
+            ref = self.refs[value] = len(self.strings)
+            self.strings.append(value)
+        return ref | flag
+
+
+def write_snapshot(model, filepath: str, meta=None, progress=None, every=4096):
+    """
+    将组织模型写成二进制快照。
+    :param model: 提供 personnel_roster、root_department 和 assignment_categories 的模型
+    :param filepath: 输出文件路径
+    :param meta: 附加信息字典（读取时以 'meta' 记录返回）
+    :param progress: 进度回调 progress(已编码的人员与部门数, 总数)，每编码 every 条调用一次
+    """
+    strings = _StringTable()
+    ref = strings.ref
+
+    # 1. 层序排列部门，使每个部门的子部门在表中连续
+    departments = [model.root_department] if model.root_department is not None else []
+    dept_index = {}
+    i = 0
+    while i < len(departments):
+        dept = departments[i]
+        dept_index[id(dept)] = i
+        departments.extend(dept.children)
+        i += 1
+
+    people = list(model.personnel_roster.values())
+    person_index = {id(person): i for i, person in enumerate(people)}
+
+    total = len(people) + len(departments)
+
+    # 2. 人员与任职记录
+    person_records, assignment_records = [], []
+    for person in people:
+        if progress is not None and len(person_records) % every == 0:
+            progress(len(person_records), total)
+        start = len(assignment_records)
+        for (dept, position), category in zip(person.assigment, model.assignment_categories(person)):
+            if id(dept) in dept_index:
+                assignment_records.append(_ASSIGNMENT.pack(dept_index[id(dept)], ref(position),
+                                                           _CATEGORY_CODES[category]))
+        person_records.append(_PERSON.pack(
+            ref(person.employee_id), ref(person.name), ref(person.age), ref(person.gender),
+            ref(person.phone_number), start, len(assignment_records) - start))
+
+    # 3. 部门、成员与职务记录
+    dept_records, member_records, role_records = [], [], []
+    child_start = 1
+    for i, dept in enumerate(departments):
+        if progress is not None and i % every == 0:
+            progress(len(people) + i, total)
+        member_start = len(member_records)
+        for category, staff_list in dept.role_categories.items():
+            for person in staff_list:
+                member_records.append(_MEMBER.pack(person_index[id(person)], _CATEGORY_CODES[category]))
+        role_start = len(role_records)
+        for title, person in dept.roles.items():
+            role_records.append(_ROLE.pack(ref(title), person_index[id(person)]))
+        parent = dept_index[id(dept.parent)] if i > 0 else -1
+        dept_records.append(_DEPARTMENT.pack(
+            ref(dept.department_id), ref(dept.name), parent, child_start, len(dept.children),
+            member_start, len(member_records) - member_start, role_start, len(role_records) - role_start))
+        child_start += len(dept.children)
+
+    # 4. 字符串表
+    encoded = [s.encode('utf-8') for s in strings.strings]
+    offsets = bytearray()
+    position = 0
+    for data in encoded:
+        offsets += _OFFSET.pack(position)
+        position += len(data)
+    offsets += _OFFSET.pack(position)
+
+    sections = [bytes(offsets), b''.join(encoded), b''.join(dept_records), b''.join(person_records),
+                b''.join(assignment_records), b''.join(member_records), b''.join(role_records)]
+    section_offsets = []
+    position = _HEADER.size
+    for data in sections:
+        section_offsets.append(position)
+        position += len(data)
+
+    flags = 0
+    if meta:
+        flags |= FLAG_META
+        meta_data = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        sections.append(_OFFSET.pack(len(meta_data)) + meta_data)
+
+    header = _HEADER.pack(MAGIC, VERSION, flags, len(strings.strings), len(dept_records), len(person_records),
+                          len(assignment_records), len(member_records), len(role_records), *section_offsets)
+    with open(filepath, 'wb') as f:
+        f.write(header)
+        for data in sections:
+            f.write(data)
+
+
+class SnapshotReader:
+    """
+    以 mmap 方式打开二进制快照，按需解码记录。
+    可以只读取根部门及其前几层用于显示，也可以逐条产生与 JSON 读取相同格式的记录。
+    """
+
+    def __init__(self, filepath: str):
+        self._file = open(filepath, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            self._file.close()
+            raise ValueError(f"{filepath} 不是有效的快照文件")
+        fields = _HEADER.unpack_from(self._map, 0) if len(self._map) >= _HEADER.size else None
+        if fields is None or fields[0] != MAGIC:
+            self.close()
+            raise ValueError(f"{filepath} 不是有效的快照文件")
+        if fields[1] > VERSION:
+            self.close()
+            raise ValueError(f"不支持的快照版本: {fields[1]}")
+        (_, self.version, self.flags, self.string_count, self.department_count, self.person_count,
+         self.assignment_count, self.member_count, self.role_count,
+         self._offsets_at, self._strings_at, self._departments_at, self._people_at,
+         self._assignments_at, self._members_at, self._roles_at) = fields
+        self._strings: list = [None] * self.string_count
+        self.meta = {}
+        if self.flags & FLAG_META:
+            meta_at = self._roles_at + _ROLE.size * self.role_count
+            length, = _OFFSET.unpack_from(self._map, meta_at)
+            self.meta = json.loads(self._map[meta_at + 4:meta_at + 4 + length].decode('utf-8'))
+
+    def close(self):
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def string(self, ref: int):
+        """按引用解码字符串（带缓存）。"""
+        if ref == NO_STRING:
+            return None
+        index = ref & ~_JSON_FLAG
+        value = self._strings[index]
+        if value is None:
+            start, = _OFFSET.unpack_from(self._map, self._offsets_at + 4 * index)
+            end, = _OFFSET.unpack_from(self._map, self._offsets_at + 4 * index + 4)
+            value = self._strings[index] = self._map[self._strings_at + start:self._strings_at + end].decode('utf-8')
+        return json.loads(value) if ref & _JSON_FLAG else value
+
+    def department(self, index: int) -> tuple:
+        """返回第 index 个部门的原始记录。"""
+        return _DEPARTMENT.unpack_from(self._map, self._departments_at + _DEPARTMENT.size * index)
+
+    def tree_dict(self, depth: int = 1) -> dict | None:
+        """
+        只解码前 depth 层部门，返回与 Department.to_dict 结构相同（仅含 ID、名称与子部门）的字典，
+        用于在完整加载之前先显示组织树。第 depth 层的部门不带 children，而以 has_children 表示是否有子部门。
+        """
+        if self.department_count == 0:
+            return None
+        record = self.department(0)
+        root = {'department_id': self.string(record[0]), 'name': self.string(record[1])}
+        stack = [(root, record, 0)]
+        while stack:
+            node, record, level = stack.pop()
+            if level >= depth:
+                node['has_children'] = record[4] > 0
+                continue
+            node['children'] = []
+            for i in range(record[3], record[3] + record[4]):
+                child_record = self.department(i)
+                child = {'department_id': self.string(child_record[0]), 'name': self.string(child_record[1])}
+                node['children'].append(child)
+                stack.append((child, child_record, level + 1))
+        return root
+
+    def _decode_all_strings(self) -> list:
+        """一次性解码整个字符串表（完整加载时比逐个解码更快）。"""
+        offsets = struct.unpack_from(f'<{self.string_count + 1}I', self._map, self._offsets_at)
+        blob = self._map[self._strings_at:self._strings_at + offsets[-1]]
+        strings = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(self.string_count)]
+        self._strings = list(strings)
+        return strings
+
+    def iter_records(self):
+        """逐条产生与 json_stream.iter_org_records 相同格式的记录，供 OrgModel 重建模型。"""
+        for item in self.meta.items():
+            yield 'meta', item
+
+        strings = self._decode_all_strings()
+        count = len(strings)
+        slow = self.string
+
+        def string(ref):
+            # 普通字符串直接取表；None 与 JSON 编码的值引用都大于字符串数
+            return strings[ref] if ref < count else slow(ref)
+
+        buf = self._map
+        department_ids = [string(record[0]) for record in _DEPARTMENT.iter_unpack(
+            buf[self._departments_at:self._departments_at + _DEPARTMENT.size * self.department_count])]
+        record = _ASSIGNMENT if self.version >= 2 else _ASSIGNMENT_V1
+        assignments_table = list(record.iter_unpack(
+            buf[self._assignments_at:self._assignments_at + record.size * self.assignment_count]))
+        person_ids = []
+        for emp, name, age, gender, phone, start, n in _PERSON.iter_unpack(
+                buf[self._people_at:self._people_at + _PERSON.size * self.person_count]):
+            person_ids.append(string(emp))
+            assignments = []
+            for fields in assignments_table[start:start + n]:
+                assignment = {'department_id': department_ids[fields[0]], 'position': string(fields[1])}
+                if len(fields) > 2:
+                    assignment['role_category'] = CATEGORIES[fields[2]]
+                assignments.append(assignment)
+            yield 'person', {'employee_id': person_ids[-1], 'name': string(name), 'age': string(age),
+                             'gender': string(gender), 'phone_number': string(phone), 'assigment': assignments}
+
+        members_table = list(_MEMBER.iter_unpack(
+            buf[self._members_at:self._members_at + _MEMBER.size * self.member_count]))
+        roles_table = list(_ROLE.iter_unpack(
+            buf[self._roles_at:self._roles_at + _ROLE.size * self.role_count]))
+        for i in range(self.department_count):
+            (dept_id, name, parent, _, _, member_start, member_count,
+             role_start, role_count) = self.department(i)
+            role_categories = {category: [] for category in CATEGORIES}
+            for person, category in members_table[member_start:member_start + member_count]:
+                role_categories[CATEGORIES[category]].append(person_ids[person])
+            roles = {string(title): person_ids[person]
+                     for title, person in roles_table[role_start:role_start + role_count]}
+            yield 'department', {'department_id': department_ids[i], 'name': string(name),
+                                 'parent_id': department_ids[parent] if parent >= 0 else None,
+                                 'roles': roles, 'role_categories': role_categories}
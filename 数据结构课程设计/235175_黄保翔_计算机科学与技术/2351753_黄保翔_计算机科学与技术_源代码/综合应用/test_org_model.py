@@ -0,0 +1,713 @@
+'''OrgModel 单元测试'''
+# test_org_model.py
+#
+# 在本目录下运行: python -m pytest -q
+# 每组修改之后都用 consistency.check_consistency 核对增量维护的索引与部门树、花名册是否一致。
+
+import json
+import os
+import random
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import benchmark
+import generator
+import journal
+import snapshot
+import OrgModel as org_model
+from consistency import check_consistency
+from controller import Controller
+from journal import Journal, new_snapshot_meta
+from OrgModel import OrgModel
+from OrgModelBase import UnsupportedOperation
+from query import Query
+from SqliteOrgModel import SqliteOrgModel
+from ThreadSafeOrgModel import ThreadSafeOrgModel
+
+
+def _departments(model) -> list:
+    return list(model.root_department.iter_subtree('pre'))
+
+
+@pytest.mark.parametrize('model_class', [OrgModel, ThreadSafeOrgModel])
+def test_mixed_operations_keep_indexes_consistent(model_class, tmp_path):
+    rng = random.Random(7)
+    model = model_class()
+    generator.generate(model, 300, depth=3, fanout=4, seed=7)
+    assert check_consistency(model) == []
+
+    # 先查询一次，使区间编号与任职索引已经建立，之后的修改都走增量维护的路径
+    model.is_ancestor('root', 'root')
+    model.people_in_subtree('root')
+    for i in range(40):
+        parent = rng.choice(_departments(model))
+        assert model.add_department(f"新部门{i % 7}", parent.department_id, f"t-d{i}") is not None
+    assert check_consistency(model) == []
+
+    people = list(model.personnel_roster)
+    for i in range(30):
+        dept = rng.choice(_departments(model))
+        assert model.assign_person_to_department(rng.choice(people), dept.department_id, '其他人员', f"兼职{i}")
+    for employee_id in rng.sample(people, 10):
+        dept, _, title = model.position_index[employee_id][0]
+        assert model.remove_assignment(employee_id, dept.department_id, title)
+    assert check_consistency(model) == []
+
+    moved = 0
+    for _ in range(40):
+        dept, target = rng.sample(_departments(model)[1:], 2)
+        # 不能移到自己的子树中
+        if not model.is_ancestor(dept.department_id, target.department_id):
+            assert model.move_department(dept.department_id, target.department_id)
+            moved += 1
+    assert moved and check_consistency(model) == []
+
+    for dept in rng.sample(_departments(model)[1:], 10):
+        if model.find_department(dept.department_id) is dept:
+            assert model.delete_department(dept.department_id)
+    assert check_consistency(model) == []
+
+    path = os.fspath(tmp_path / 'org.json')
+    assert model.save_to_file(path)
+    loaded = model_class()
+    assert loaded.load_from_file(path)
+    assert check_consistency(loaded) == []
+    assert loaded.personnel_roster.keys() == model.personnel_roster.keys()
+    assert loaded.department_index.keys() == model.department_index.keys()
+
+    dept_ids = list(loaded.department_index)
+    existing = list(loaded.personnel_roster)
+    rows = [{'employee_id': f"t-e{i}", 'name': f"导入{i}", 'age': 20 + i % 40, 'gender': "男女"[i % 2],
+             'phone_number': f"139{i:08d}", 'department_id': rng.choice(dept_ids),
+             'role_category': '其他人员', 'position_title': f"导入职位{i}"} for i in range(60)]
+    # 已有人员的新任职，以及一行引用不存在部门的错误行
+    rows += [{'employee_id': employee_id, 'department_id': rng.choice(dept_ids),
+              'role_category': '副主管', 'position_title': f"兼任{i}"}
+             for i, employee_id in enumerate(rng.sample(existing, 20))]
+    rows.append({'employee_id': 't-bad', 'name': '错误', 'department_id': 'no-such-department',
+                 'role_category': '其他人员', 'position_title': '无'})
+    loaded.is_ancestor('root', 'root')
+    report = loaded.bulk_import(rows)
+    assert report['imported'] == 80 and len(report['errors']) == 1
+    assert check_consistency(loaded) == []
+
+    # 导入之后继续修改
+    for employee_id in rng.sample(list(loaded.personnel_roster), 30):
+        assert loaded.delete_person(employee_id)
+    dept = rng.choice(list(loaded.department_index.values())[1:])
+    assert loaded.delete_department(dept.department_id)
+    assert check_consistency(loaded) == []
+
+
+def test_check_consistency_reports_stale_indexes():
+    model = OrgModel()
+    generator.generate(model, 50, depth=2, fanout=3, seed=1)
+    model.is_ancestor('root', 'root')
+    dept = next(iter(model.department_index.values()))
+    model.department_index.pop(dept.department_id)
+    model._tour['root'] = (0, 0)
+    problems = check_consistency(model)
+    assert "部门索引与部门树不一致" in problems
+    assert "部门区间编号与部门树不一致" in problems
+
+
+def test_bulk_import_updates_ancestor_stats():
+    """只向一个第 2 层部门导入时，其父部门与根部门的统计量也要包含新任职。"""
+    model = OrgModel()
+    model.add_department("学院", 'root', 'college')
+    model.add_department("系", 'college', 'dept')
+    model.add_department("其他学院", 'root', 'other')
+    model.add_person('e0', "原有", 45, "男", "13900000000")
+    model.assign_person_to_department('e0', 'other', '主管', "院长")
+    before = {department_id: model.department_stats(department_id) for department_id in ('college', 'root')}
+
+    rows = [{'employee_id': f"e{i}", 'name': f"导入{i}", 'age': age, 'gender': gender,
+             'phone_number': f"1390000000{i}", 'department_id': 'dept',
+             'role_category': '其他人员', 'position_title': f"职位{i}"}
+            for i, (age, gender) in enumerate([(23, "女"), (27, "女"), (31, "男")], start=1)]
+    assert model.bulk_import(rows)['imported'] == 3
+
+    for department_id in ('dept', 'college', 'root'):
+        stats = model.department_stats(department_id)
+        old = before.get(department_id, {'headcount': 0, 'gender': {}, 'age': {}})
+        assert stats['headcount'] == old['headcount'] + 3
+        assert stats['gender'] == {**old['gender'], "女": old['gender'].get("女", 0) + 2,
+                                   "男": old['gender'].get("男", 0) + 1}
+        assert stats['age'] == {**old['age'], '20-29': old['age'].get('20-29', 0) + 2,
+                                '30-39': old['age'].get('30-39', 0) + 1}
+    assert model.department_stats('other')['headcount'] == 1
+    assert check_consistency(model) == []
+
+
+def test_thread_safe_model_under_concurrent_writes():
+    """多线程混合读写之后，ThreadSafeOrgModel 的索引仍与部门树一致，且没有操作抛出异常。"""
+    result = benchmark.bench_stress(threads=4, seconds=1.5, people=300, seed=3)
+    assert result['model'] == 'ThreadSafeOrgModel'
+    assert result['operations'] > 0
+    assert result['error_count'] == 0, result['errors']
+    assert result['consistent'], result['problems']
+
+
+@pytest.mark.parametrize('crowded', [False, True])
+def test_interval_labels_are_kept_across_structural_edits(crowded, monkeypatch):
+    """区间编号建立之后，增删、移动部门和批量导入都只局部调整编号，查询结果与沿父指针向上查找一致。"""
+    if crowded:
+        # 极小的编号范围：几乎每次加入都要重排祖先子树，并多次扩大整个编号范围
+        monkeypatch.setattr(org_model, '_LABEL_SPAN', 1 << 6)
+        monkeypatch.setattr(org_model, '_LABEL_SHARE', 2)
+        monkeypatch.setattr(org_model, '_LABEL_MIN_UNIT', 2)
+        monkeypatch.setattr(org_model, '_LABEL_RELABEL_UNIT', 8)
+    rng = random.Random(13)
+    model = OrgModel()
+    generator.generate(model, 200, depth=3, fanout=3, seed=13)
+    tour = model._ensure_tour()
+    members = model._member_index
+
+    def walk_up(ancestor_id, department_id):
+        dept = model.find_department(department_id)
+        while dept is not None and dept.department_id != ancestor_id:
+            dept = dept.parent
+        return dept is not None
+
+    for step in range(300):
+        dept_ids = list(model.department_index)
+        op = rng.randrange(5)
+        if op <= 1:
+            # 一半加在前几个部门之下，使其末尾的空隙很快用尽
+            parent = rng.choice(dept_ids[:4] if op == 0 else dept_ids)
+            model.add_department("新部门", parent, f"t-d{step}")
+        elif op == 2:
+            model.move_department(rng.choice(dept_ids), rng.choice(dept_ids))
+        elif op == 3 and len(dept_ids) > 30:
+            model.delete_department(rng.choice(dept_ids[1:]))
+        else:
+            model.bulk_import([{'employee_id': f"t-e{step}", 'name': "导入", 'department_id': rng.choice(dept_ids),
+                                'role_category': '其他人员', 'position_title': "职位"}])
+        assert model._tour is tour and model._member_index is members
+        dept_ids = list(model.department_index)
+        for _ in range(5):
+            a, b = rng.choice(dept_ids), rng.choice(dept_ids)
+            assert model.is_ancestor(a, b) == walk_up(a, b)
+        dept = model.find_department(rng.choice(dept_ids))
+        expected = {person.employee_id for d in dept.iter_subtree()
+                    for staff in d.role_categories.values() for person in staff}
+        assert {person.employee_id for person in model.people_in_subtree(dept.department_id)} == expected
+    assert check_consistency(model) == []
+
+
+@pytest.mark.parametrize('model_class', [OrgModel, SqliteOrgModel])
+def test_removing_one_of_two_positions_keeps_member_order(model_class, tmp_path):
+    """同一分类中有两条任职的人员删去较早的一条后，去掉的是其最后一次出现，其余成员顺序不变。"""
+    model = model_class(os.fspath(tmp_path / 'org.db')) if model_class is SqliteOrgModel else model_class()
+    model.add_department("学院", 'root', 'college')
+    for employee_id in ('e1', 'e2', 'e3'):
+        model.add_person(employee_id, employee_id, 30, "男", "13900000000")
+    model.assign_person_to_department('e1', 'college', '其他人员', "职位1")
+    model.assign_person_to_department('e2', 'college', '其他人员', "职位1")
+    model.assign_person_to_department('e1', 'college', '其他人员', "职位2")
+    model.assign_person_to_department('e3', 'college', '其他人员', "职位1")
+    assert model.remove_assignment('e1', 'college', "职位1")
+    staff = model.find_department('college').role_categories['其他人员']
+    assert [person.employee_id for person in staff] == ['e1', 'e2', 'e3']
+
+
+def test_select_matches_linear_filter():
+    """组合查询的结果与逐个检查花名册的结果相同，无论由哪个条件驱动。"""
+    model = OrgModel()
+    generator.generate(model, 400, depth=3, fanout=3, assignments_per_person=2, seed=22)
+    for i in range(20):
+        model.add_person(f"t-e{i}", f"无任职{i}", str(25 + i), "男女"[i % 2], f"139{i:08d}")
+    people = list(model.personnel_roster.values())
+
+    def posts(person):
+        return len(model.position_index.get(person.employee_id, ()))
+
+    def in_subtree(department_id, person):
+        return any(model.is_ancestor(department_id, dept.department_id)
+                   for dept, _, _ in model.position_index.get(person.employee_id, ()))
+
+    cases = [
+        (Query().gender('女').age(30, 39), lambda p: p.gender == '女' and 30 <= int(p.age) <= 39),
+        (Query().name('员工1').age(50), lambda p: '员工1' in p.name and int(p.age) >= 50),
+        (Query().phone('13000000007'), lambda p: p.phone_number == '13000000007'),
+        (Query().unassigned(), lambda p: posts(p) == 0),
+        (Query().posts(2).gender('男'), lambda p: posts(p) >= 2 and p.gender == '男'),
+        (Query().in_department('d2').age(high=30), lambda p: in_subtree('d2', p) and int(p.age) <= 30),
+        (Query().where(lambda p: p.employee_id.endswith('7')), lambda p: p.employee_id.endswith('7')),
+    ]
+    for query, predicate in cases:
+        expected = {p.employee_id for p in people if predicate(p)}
+        assert {p.employee_id for p in model.select(query)} == expected, query
+        assert len(model.select(query, limit=3)) == min(3, len(expected))
+
+
+@pytest.mark.parametrize('model_class', [OrgModel, SqliteOrgModel])
+def test_search_people_matches_substring_scan(model_class):
+    """二元组索引查找的结果与逐个比较姓名的结果相同，包括改名之后与有 limit 时。"""
+    rng = random.Random(23)
+    model = model_class()
+    chars = "张王李赵三丰小明华"
+    for i in range(300):
+        model.add_person(f"e{i:03d}", "".join(rng.choice(chars) for _ in range(rng.randint(1, 4))),
+                         30, "男", "13900000000")
+    for employee_id in rng.sample(sorted(model.personnel_roster), 50):
+        assert model.update_person_info(employee_id, {'name': "".join(rng.choice(chars) for _ in range(3))})
+
+    def expected(text):
+        people = sorted(model.get_all_people(), key=lambda p: p.employee_id)
+        matched = [p for p in people if text in p.name]
+        tier = {id(p): 0 if p.name == text else 1 if p.name.startswith(text) else 2 for p in matched}
+        return [p.employee_id for p in sorted(matched, key=lambda p: (tier[id(p)], len(p.name), p.name))]
+
+    for text in ["张", "三丰", "小明", "王李", "华华", "张三丰小", "无"]:
+        assert [p.employee_id for p in model.search_people(text)] == expected(text), text
+        assert [p.employee_id for p in model.search_people(text, limit=5)] == expected(text)[:5], text
+
+
+@pytest.mark.parametrize('model_class', [OrgModel, SqliteOrgModel])
+def test_background_load_replaces_model_data(model_class, tmp_path):
+    """控制器的后台加载流程：staging_model 上加载，replaced_by 取代原数据，不需要区分模型类型。"""
+    source = OrgModel()
+    generator.generate(source, 60, depth=2, fanout=3, seed=7)
+    path = os.fspath(tmp_path / 'org.json')
+    assert source.save_to_file(path, meta={'journal_seq': 0})
+
+    model = model_class()
+    staging = model.staging_model()
+    assert staging.load_from_file(path)
+    current = model.replaced_by(staging)
+    assert (current is model) == (model_class is SqliteOrgModel)
+    assert sorted(current.personnel_roster) == sorted(source.personnel_roster)
+    assert current.find_department('d5').name == source.find_department('d5').name
+    assert current.file_meta == {'journal_seq': 0}
+    if model_class is SqliteOrgModel:
+        with pytest.raises(UnsupportedOperation):
+            model.freeze()
+
+
+@pytest.mark.parametrize('model_class', [OrgModel, SqliteOrgModel])
+def test_move_targets_exclude_subtree_and_parent(model_class):
+    """移动部门的下拉列表只列出合法的新上级：不含该部门自身、其下级部门与现在的上级。"""
+    model = model_class()
+    generator.generate(model, 0, depth=3, fanout=3, seed=9)
+    controller = SimpleNamespace(model=model)
+    for dept_id in ('d1', 'd5', 'd20'):
+        department = model.find_department(dept_id)
+        expected = {d.department_id for d in model.departments_with_prefix('')
+                    if d is not department.parent and not model.is_ancestor(dept_id, d.department_id)}
+        targets = Controller.suggest_move_targets(controller, dept_id, '', limit=None)
+        assert {d.department_id for d in targets} == expected
+        assert len(Controller.suggest_move_targets(controller, dept_id, '部门1', limit=3)) == 3
+        # 列出的目标都可以移入，移入后再移回原处
+        parent_id = department.parent.department_id
+        for target in targets[:5]:
+            assert model.move_department(dept_id, target.department_id)
+            assert model.move_department(dept_id, parent_id)
+
+
+def _journal_model(path):
+    model = OrgModel()
+    assert Journal.open(model, path)
+    return model
+
+
+def test_journal_replays_edits_and_compaction(tmp_path):
+    """快照之后的修改由日志重放；压缩合并之后再修改，重新打开的结果仍与原模型相同。"""
+    path = os.fspath(tmp_path / 'org.json')
+    model = OrgModel()
+    generator.generate(model, 50, depth=2, fanout=3, seed=6)
+    assert Journal.create(model, path)
+    model.add_department("新部门", 'd1', 't-d1')
+    model.add_person('t-e1', "新人", 30, "女", "13900000000")
+    model.assign_person_to_department('t-e1', 't-d1', '主管', "负责人")
+    model.move_department('d2', 't-d1')
+    model.delete_person('e3')
+    model.journal.close()
+
+    loaded = _journal_model(path)
+    assert check_consistency(loaded) == []
+    assert sorted(loaded.personnel_roster) == sorted(model.personnel_roster)
+    assert loaded.find_department('d2').parent.department_id == 't-d1'
+
+    loaded.journal.compact(background=False)
+    assert not os.path.exists(path + '.journal.old')
+    loaded.update_person_info('t-e1', {'name': "改名"})
+    loaded.journal.close()
+    again = _journal_model(path)
+    assert again.file_meta['journal_seq'] == 5
+    assert again.get_person('t-e1').name == "改名"
+    assert check_consistency(again) == []
+
+
+def test_journal_stops_at_truncated_last_line(tmp_path):
+    """崩溃时写了一半的最后一条记录被忽略；之后追加的记录从新的一行开始，不受它影响。"""
+    path = os.fspath(tmp_path / 'org.json')
+    model = OrgModel()
+    assert Journal.create(model, path)
+    for i in range(3):
+        model.add_person(f"e{i}", f"人员{i}", 30, "男", "13900000000")
+    model.journal.close()
+    with open(path + '.journal', 'rb+') as f:
+        f.truncate(f.seek(0, os.SEEK_END) - 10)
+
+    loaded = _journal_model(path)
+    assert sorted(loaded.personnel_roster) == ['e0', 'e1']
+    loaded.add_person('e9', "人员9", 30, "男", "13900000000")
+    loaded.journal.close()
+    assert sorted(_journal_model(path).personnel_roster) == ['e0', 'e1', 'e9']
+
+
+
+def test_open_waits_for_running_compaction(tmp_path, monkeypatch):
+    """后台压缩进行中打开同一文件时，先等压缩结束，不会漏掉已轮换到旧日志中的修改。"""
+    path = os.fspath(tmp_path / 'org.json')
+    model = OrgModel()
+    assert Journal.create(model, path)
+    model.add_person('e1', "新人", 30, "男", "13900000000")
+    release = threading.Event()
+    compact_files = journal._compact_files
+
+    def slow_compact(*args):
+        release.wait()
+        compact_files(*args)
+
+    monkeypatch.setattr(journal, '_compact_files', slow_compact)
+    compactor = model.journal.compact()
+    loaded = OrgModel()
+    opener = threading.Thread(target=Journal.open, args=(loaded, path))
+    opener.start()
+    opener.join(0.2)
+    assert opener.is_alive()  # 压缩结束之前不读取快照
+    release.set()
+    compactor.join()
+    opener.join()
+    assert not os.path.exists(path + '.journal.old')
+    assert sorted(loaded.personnel_roster) == ['e1']
+    assert loaded.journal is not None
+
+def test_save_as_leaves_original_file_unchanged(tmp_path):
+    """打开 a、修改、另存为 b 之后，a 仍是上次保存时的内容，修改只在 b 中。"""
+    a, b = os.fspath(tmp_path / 'a.json'), os.fspath(tmp_path / 'b.json')
+    model = OrgModel()
+    assert Journal.create(model, a)
+    model.journal.close()
+
+    model = _journal_model(a)
+    model.add_person('e1', "新人", 30, "男", "13900000000")
+    # 与 Controller.save_data 相同：后台保存冻结版本，完成后开始记录新文件的日志
+    meta = new_snapshot_meta()
+    with model.freeze() as org:
+        assert org.save_to_file(b, meta=meta)
+    Journal.start(model, b, meta)
+    model.add_person('e2', "新人", 30, "男", "13900000000")
+    model.journal.close()
+
+    assert not os.path.exists(a + '.journal')
+    assert list(_journal_model(a).personnel_roster) == []
+    assert sorted(_journal_model(b).personnel_roster) == ['e1', 'e2']
+
+
+def test_journal_is_created_lazily_and_ignores_foreign_files(tmp_path):
+    """只加载不修改时不创建日志文件；快照被其他方式覆盖后，残留的日志不再重放；日志无法写入时修改照常进行。"""
+    path = os.fspath(tmp_path / 'org.json')
+    model = OrgModel()
+    assert Journal.create(model, path)
+    model.journal.close()
+    model = _journal_model(path)
+    assert not os.path.exists(path + '.journal')
+    model.add_person('e1', "新人", 30, "男", "13900000000")
+    model.journal.close()
+
+    # 不经日志直接覆盖快照：旁边的日志属于旧快照
+    assert OrgModel().save_to_file(path)
+    model = _journal_model(path)
+    assert model.journal is None and list(model.personnel_roster) == []
+
+    other = os.fspath(tmp_path / 'other.json')
+    model = OrgModel()
+    assert Journal.create(model, other)
+    os.mkdir(other + '.journal')  # 无法作为文件打开
+    assert model.add_person('e1', "新人", 30, "男", "13900000000")
+    assert model.journal.failed and 'e1' in model.personnel_roster
+
+
+def test_json_round_trip_deeper_than_recursion_limit(tmp_path):
+    """流式保存与加载不使用递归：比递归深度上限更深的部门链也能原样往返。"""
+    depth = sys.getrecursionlimit() + 200
+    model = OrgModel()
+    parent_id = 'root'
+    for i in range(depth):
+        parent_id = model.add_department(f"第{i}层", parent_id, f"d{i}").department_id
+    model.add_person('e1', "最底层", 30, "男", "13900000000")
+    model.assign_person_to_department('e1', parent_id, '主管', "负责人")
+
+    path = os.fspath(tmp_path / 'deep.json')
+    assert model.save_to_file(path, indent=2, meta={'note': "深"})
+    loaded = OrgModel()
+    assert loaded.load_from_file(path)
+    assert loaded.file_meta == {'note': "深"}
+    assert loaded.department_depth(parent_id) == depth
+    assert [d.department_id for d in loaded.root_department.iter_subtree('pre')] == \
+           [d.department_id for d in model.root_department.iter_subtree('pre')]
+    assert loaded.find_department(parent_id).roles["负责人"].employee_id == 'e1'
+    assert check_consistency(loaded) == []
+
+
+def test_snapshot_round_trip_matches_json(tmp_path):
+    """二进制快照与 JSON 保存同一模型，分别加载后再导出的 JSON 完全相同。"""
+    model = OrgModel()
+    generator.generate(model, 200, depth=3, fanout=3, assignments_per_person=2, seed=5)
+    model.add_person('t-e1', "无电话", 41, "女", None)  # 非字符串的年龄与缺失的电话
+    model.assign_person_to_department('t-e1', 'd1', '其他人员', "顾问")
+    model.assign_person_to_department('t-e1', 'd1', '其他人员', "兼任顾问")
+    json_path, orgs_path = os.fspath(tmp_path / 'org.json'), os.fspath(tmp_path / 'org.orgs')
+    meta = {'journal_seq': 3, 'note': "快照"}
+    assert model.save_to_file(json_path, meta=meta)
+    assert model.save_to_file(orgs_path, meta=meta)
+    assert snapshot.is_snapshot(orgs_path) and not snapshot.is_snapshot(json_path)
+
+    with snapshot.SnapshotReader(orgs_path) as reader:
+        preview = reader.tree_dict(depth=1)
+    assert [child['department_id'] for child in preview['children']] == \
+           [child.department_id for child in model.root_department.children]
+
+    exported = []
+    for i, path in enumerate((json_path, orgs_path)):
+        loaded = OrgModel()
+        assert loaded.load_from_file(path)
+        assert loaded.file_meta == meta
+        assert check_consistency(loaded) == []
+        out = os.fspath(tmp_path / f"out{i}.json")
+        assert loaded.save_to_file(out, meta=loaded.file_meta)
+        with open(out, encoding='utf-8') as f:
+            exported.append(f.read())
+    assert exported[0] == exported[1]
+    with open(json_path, encoding='utf-8') as f:
+        assert f.read() == exported[0]
+
+
+@pytest.mark.parametrize('model_class', [OrgModel, SqliteOrgModel])
+def test_ancestor_queries_match_parent_walk(model_class):
+    """最近公共祖先、第 k 级祖先与主管链的结果与沿父指针逐级向上查找相同，移动部门之后也一样。"""
+    rng = random.Random(14)
+    model = model_class()
+    generator.generate(model, 150, depth=4, fanout=3, seed=14)
+
+    def path_up(department_id):
+        dept, path = model.find_department(department_id), []
+        while dept is not None:
+            path.append(dept.department_id)
+            dept = dept.parent
+        return path
+
+    def check(dept_ids):
+        for _ in range(100):
+            a, b = rng.choice(dept_ids), rng.choice(dept_ids)
+            up_a, up_b = path_up(a), set(path_up(b))
+            assert model.lowest_common_ancestor(a, b).department_id == next(d for d in up_a if d in up_b)
+            assert model.department_depth(a) == len(up_a) - 1
+            k = rng.randrange(len(up_a) + 1)
+            found = model.kth_ancestor(a, k)
+            assert (found.department_id if found else None) == (up_a[k] if k < len(up_a) else None)
+        for employee_id in rng.sample(sorted(model.personnel_roster), 30):
+            person = model.get_person(employee_id)
+            start = person.assigment[0][0].department_id
+            expected = [(d, head.employee_id) for d in path_up(start)
+                        for head in model.find_department(d).role_categories['主管'] if head is not person]
+            assert [(d.department_id, head.employee_id)
+                    for d, head in model.supervisor_chain(employee_id)] == expected
+
+    dept_ids = sorted(d.department_id for d in model.root_department.iter_subtree())
+    check(dept_ids)
+    for _ in range(15):
+        dept_id, target = rng.sample([d for d in dept_ids if d != 'root'], 2)
+        if not model.is_ancestor(dept_id, target):
+            assert model.move_department(dept_id, target)
+    check(dept_ids)
+
+
+def test_frozen_version_is_unchanged_by_later_edits(tmp_path):
+    """冻结之后的各种修改都不影响冻结版本：它导出的文件与冻结时保存的文件相同。"""
+    rng = random.Random(19)
+    model = OrgModel()
+    generator.generate(model, 200, depth=3, fanout=3, assignments_per_person=2, seed=19)
+    before = os.fspath(tmp_path / 'before.json')
+    assert model.save_to_file(before)
+    stats = model.department_stats('d1')
+
+    with model.freeze() as org:
+        # 部分对象在修改前就已读取过
+        assert org.get_person('e1').name == model.get_person('e1').name
+        for i in range(20):
+            model.add_department(f"新部门{i}", rng.choice(list(model.department_index)), f"t-d{i}")
+            model.add_person(f"t-e{i}", f"新人{i}", 30, "男", "13900000000")
+            model.assign_person_to_department(f"t-e{i}", 'd1', '其他人员', f"职位{i}")
+        for employee_id in rng.sample(sorted(p for p in model.personnel_roster if p.startswith('e')), 20):
+            model.delete_person(employee_id)
+        model.update_person_info('e1', {'name': "改名", 'age': 99})
+        model.rename_department('d2', "改名部门")
+        model.move_department('d3', 'd1')
+        model.delete_department('d4')
+
+        after = os.fspath(tmp_path / 'after.json')
+        assert org.save_to_file(after)
+        assert org.department_stats('d1') == stats
+        assert org.find_department('d3').parent.department_id == 'root'
+        assert org.find_department('t-d0') is None
+    with open(before, encoding='utf-8') as f1, open(after, encoding='utf-8') as f2:
+        assert f1.read() == f2.read()
+    assert check_consistency(model) == []
+
+
+class _NullView:
+    """不显示任何内容的视图，用于在测试中构造 Controller。"""
+
+    def get_selected_department_id(self):
+        return None
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+@pytest.mark.parametrize('model_class', [OrgModel, SqliteOrgModel])
+def test_person_details_cache_follows_model_changes(model_class):
+    """人员详情缓存在修改人员信息、任职、部门改名和删除部门之后失效，未受影响的人员继续使用缓存。"""
+    model = model_class()
+    generator.generate(model, 30, depth=2, fanout=3, seed=25)
+    controller = Controller(model, _NullView())
+    person = model.get_person('e1')
+    other = next(p for p in model.get_all_people() if not any(d is person.assigment[0][0] for d, _ in p.assigment))
+
+    def details(employee_id):
+        return controller.get_person_details_by_id(employee_id)
+
+    first, other_details = details('e1'), details(other.employee_id)
+    cached = controller._details_cache['e1']
+    assert details('e1') == first and controller._details_cache['e1'] is cached
+    assert controller.update_person_info('e1', {'name': "改名", 'phone_number': "13800000000"})
+    assert details('e1')['name'] == "改名" and details('e1')['phone_number'] == "13800000000"
+
+    assert model.assign_person_to_department('e1', 'd2', '其他人员', "兼职")
+    assert ("部门2", "兼职") in details('e1')['assigment']
+    assert controller.remove_person_assignment('e1', 'd2', "兼职")
+    assert ("部门2", "兼职") not in details('e1')['assigment']
+
+    dept = person.assigment[0][0]
+    assert model.rename_department(dept.department_id, "改名部门")
+    assert details('e1')['assigment'][0][0] == "改名部门"
+    # 与 e1 无关的修改不会使其他人员的缓存失效
+    cached = controller._details_cache[other.employee_id]
+    assert details(other.employee_id) == other_details
+    assert controller._details_cache[other.employee_id] is cached
+
+    assert model.delete_department(dept.department_id)
+    assert details('e1')['assigment'] == []
+    assert model.delete_person('e1')
+    assert details('e1') is None
+
+
+
+def test_person_details_cache_is_not_changed_through_returned_lists():
+    """修改取得的详情（包括其中的任职列表）不会影响之后取得的详情。"""
+    model = OrgModel()
+    generator.generate(model, 30, depth=2, fanout=3, assignments_per_person=2, seed=26)
+    controller = Controller(model, _NullView())
+    first = controller.get_person_details_by_id('e1')
+    expected = {key: list(value) if isinstance(value, list) else value for key, value in first.items()}
+    first['assigment'].clear()
+    first['department_ids'].append('d-none')
+    first['name'] = "改名"
+    assert controller.get_person_details_by_id('e1') == expected
+
+def _positions(model) -> dict:
+    """每名员工的任职 (部门ID, 职位类别, 职位名称)，按任职顺序排列。"""
+    return {employee_id: [(dept.department_id, category, title) for dept, category, title in entries]
+            for employee_id, entries in model.position_index.items()}
+
+
+@pytest.mark.parametrize('suffix', ['.json', '.orgs'])
+@pytest.mark.parametrize('frozen', [False, True])
+def test_load_keeps_category_of_each_position(suffix, frozen, tmp_path):
+    """同一部门中先任“其他人员”、后任“主管”的人员，加载后每个职位仍属于原来的类别。"""
+    model = OrgModel()
+    model.add_department("学院", 'root', 'c')
+    model.add_person('e1', "张三", 50, "男", "13900000000")
+    model.add_person('e2', "李四", 45, "女", "13900000001")
+    assert model.assign_person_to_department('e1', 'c', '其他人员', "教授")
+    assert model.assign_person_to_department('e1', 'c', '主管', "院长")
+    path = os.fspath(tmp_path / f"org{suffix}")
+    if frozen:
+        with model.freeze() as org:
+            model.remove_assignment('e1', 'c', "院长")  # 冻结之后的修改不影响保存的内容
+            assert org.save_to_file(path)
+        model.assign_person_to_department('e1', 'c', '主管', "院长")
+    else:
+        assert model.save_to_file(path)
+
+    loaded = OrgModel()
+    assert loaded.load_from_file(path)
+    assert _positions(loaded) == _positions(model)
+    assert check_consistency(loaded) == []
+    # 卸任“教授”之后仍是主管，不能再任命第二名主管
+    assert loaded.remove_assignment('e1', 'c', "教授")
+    assert [p.employee_id for p in loaded.find_department('c').role_categories['主管']] == ['e1']
+    assert not loaded.assign_person_to_department('e2', 'c', '主管', "副院长")
+    assert check_consistency(loaded) == []
+
+
+@pytest.mark.parametrize('model_class', [OrgModel, SqliteOrgModel])
+@pytest.mark.parametrize('suffix', ['.json', '.orgs'])
+def test_member_order_survives_save_and_load(model_class, suffix, tmp_path):
+    """担任多个同类职务的人员，每次出现都保持其任职时在成员列表中的位置，保存加载后顺序不变。"""
+    model = model_class(os.fspath(tmp_path / 'org.db')) if model_class is SqliteOrgModel else model_class()
+    model.add_department("学院", 'root', 'c')
+    for employee_id in ('e1', 'e2', 'e3'):
+        model.add_person(employee_id, employee_id, 30, "男", "13900000000")
+    for employee_id, title in (('e1', "职位1"), ('e2', "职位1"), ('e1', "职位2"), ('e3', "职位1"), ('e1', "职位3")):
+        assert model.assign_person_to_department(employee_id, 'c', '其他人员', title)
+
+    def members(org):
+        return [person.employee_id for person in org.find_department('c').role_categories['其他人员']]
+
+    assert members(model) == ['e1', 'e2', 'e1', 'e3', 'e1']
+    path = os.fspath(tmp_path / f"org{suffix}")
+    assert model.save_to_file(path)
+    loaded = OrgModel()
+    assert loaded.load_from_file(path)
+    assert members(loaded) == ['e1', 'e2', 'e1', 'e3', 'e1']
+    # 去掉的是最后一次出现
+    for org in (model, loaded):
+        assert org.remove_assignment('e1', 'c', "职位1")
+        assert members(org) == ['e1', 'e2', 'e1', 'e3']
+    assert check_consistency(loaded) == []
+
+
+def test_load_accepts_children_before_department_id(tmp_path):
+    """部门对象中 children 写在 department_id 之前时，子部门仍挂在原来的父部门下。"""
+    model = OrgModel()
+    generator.generate(model, 60, depth=3, fanout=3, assignments_per_person=2, seed=4)
+    path = os.fspath(tmp_path / 'org.json')
+    assert model.save_to_file(path)
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    # 隔层倒转部门对象中键的顺序，两种顺序的父子部门都会出现
+    stack = [(data['departments'], True)]
+    while stack:
+        dept, reverse = stack.pop()
+        if reverse:
+            for key in reversed(list(dept)):
+                dept[key] = dept.pop(key)
+        stack.extend((child, not reverse) for child in dept['children'])
+    keys = list(data['departments'])
+    assert keys.index('children') < keys.index('department_id')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+    loaded = OrgModel()
+    assert loaded.load_from_file(path)
+    assert loaded.root_department.to_dict() == model.root_department.to_dict()
+    assert _positions(loaded) == _positions(model)
+    assert check_consistency(loaded) == []